@@ -0,0 +1,261 @@
+# app/controller/analysis.py
+# Headless batch analysis: reads EPD/FEN files, analyses every position with
+# one engine configuration across a process pool and streams results as they
+# finish. EPD `bm`/`am` opcodes are scored, so a tactical test suite doubles
+# as a strength and throughput regression test. With --mate N positions go to
+# the dedicated mate solver instead (puzzle batches; `dm` opcodes are scored).
+#
+# Usage:
+#   python -m app.Controller.analysis suite.epd --engine med:4 --movetime 1 --concurrency 4
+#   python -m app.Controller.analysis positions.fen --engine med --depth 3 --jsonl out.jsonl
+#   python -m app.Controller.analysis mates.epd --mate 4 --movetime 5
+
+import argparse
+import json
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import chess
+from app.Model import engine_med, mate_search
+from app.Model.engine_api import SearchLimits, check_spec, get_engine
+from app.View import terminal_ui
+
+
+def parse_position(line):
+    """
+    Parse one EPD or FEN line.
+
+    Returns:
+        (board, ops) where ops holds the EPD opcodes (empty for plain FEN)
+    """
+    fields = line.split()
+    # A plain FEN ends with the halfmove clock and fullmove number
+    if len(fields) == 6 and fields[4].isdigit() and fields[5].isdigit():
+        return chess.Board(line), {}
+    return chess.Board.from_epd(line)
+
+
+def load_positions(paths):
+    """
+    Read positions from EPD/FEN files. Blank lines and '#' comments are skipped.
+
+    Returns:
+        list of task dicts (index, id, fen, bm, am, dm), moves as UCI strings
+    """
+    tasks = []
+    for path in paths:
+        with open(path, 'r') as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    board, ops = parse_position(line)
+                except ValueError as e:
+                    print(f"{path}:{lineno}: skipped ({e})")
+                    continue
+                tasks.append({
+                    "index": len(tasks),
+                    "id": str(ops.get("id", f"{path}:{lineno}")),
+                    "fen": board.fen(),
+                    "bm": [m.uci() for m in ops.get("bm", [])],
+                    "am": [m.uci() for m in ops.get("am", [])],
+                    "dm": int(ops["dm"]) if "dm" in ops else None,
+                })
+    return tasks
+
+
+def is_solved(move, bm, am, dm=None, mate=None):
+    """
+    True/False for positions with bm/am/dm opcodes, None when there is nothing
+    to check. `dm` (direct mate in N) is met by a found mate of at most N moves.
+    """
+    if dm is not None:
+        if mate is None or not 0 < mate <= dm:
+            return False
+        if not bm and not am:
+            return True
+    if not bm and not am:
+        return None
+    if move is None:
+        return False
+    if bm and move not in bm:
+        return False
+    return move not in am
+
+
+def analyse_position(task):
+    """
+    Analyse one position in a worker process.
+
+    Args:
+        task: dict from load_positions() plus engine, depth, movetime, nodes,
+              mate (solve with the mate solver up to this many moves) and seed
+
+    Returns:
+        dict with move, san, score (side to move, pawns), depth, pv (SAN),
+        mate (moves to mate, None if no mate is known), nodes, nps, time and solved
+    """
+    random.seed(task["seed"])
+    engine = get_engine(task["engine"])
+    engine.new_game()
+    board = chess.Board(task["fen"])
+    info = queue.SimpleQueue()
+    if task["movetime"]:
+        limits = SearchLimits.movetime(task["movetime"], depth=task["depth"], nodes=task["nodes"], info=info)
+    else:
+        limits = SearchLimits(depth=task["depth"], nodes=task["nodes"], info=info)
+
+    start = time.perf_counter()
+    if task["mate"]:
+        solver = mate_search.MateSolver(task["nodes"], limits)
+        found = solver.solve(board, task["mate"])
+        move = found.move if found else None
+    else:
+        move = engine.search(board.copy(), limits)
+    elapsed = time.perf_counter() - start
+
+    # Keep the latest value of every field the engine reported
+    last = {}
+    while not info.empty():
+        last.update(info.get())
+    if task["mate"]:
+        last["nodes"] = solver.nodes
+        if found:
+            last.update(score=engine_med.MATE_SCORE - (2 * found.moves - 1), depth=2 * found.moves - 1,
+                        pv=[m.uci() for m in found.pv])
+
+    pv = [chess.Move.from_uci(uci) for uci in last.get("pv", [])]
+    if move is not None and (not pv or pv[0] != move):
+        pv = [move]
+    try:
+        pv_san = board.variation_san(pv) if pv else ""
+    except ValueError:
+        pv_san = " ".join(m.uci() for m in pv)
+
+    uci = move.uci() if move else None
+    nodes = last.get("nodes", 0)
+    mate = engine_med.mate_in(last.get("score"))
+    return {
+        "index": task["index"],
+        "id": task["id"],
+        "fen": task["fen"],
+        "move": uci,
+        "san": board.san(move) if move else None,
+        "score": last.get("score"),
+        "depth": last.get("depth"),
+        "pv": pv_san,
+        "mate": mate,
+        "nodes": nodes,
+        "nps": int(nodes / elapsed) if elapsed > 0 else 0,
+        "time": elapsed,
+        "bm": task["bm"],
+        "am": task["am"],
+        "dm": task["dm"],
+        "solved": is_solved(uci, task["bm"], task["am"], task["dm"], mate),
+    }
+
+
+def summarize(results, elapsed):
+    scored = [r for r in results if r["solved"] is not None]
+    solved = sum(1 for r in scored if r["solved"])
+    nodes = sum(r["nodes"] for r in results)
+    think = sum(r["time"] for r in results)
+    return {
+        "positions": len(results),
+        "scored": len(scored),
+        "solved": solved,
+        "solve_rate": solved / len(scored) if scored else None,
+        "nodes": nodes,
+        "nps": int(nodes / think) if think > 0 else 0,
+        "elapsed": elapsed,
+        "positions_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_analysis(tasks, engine="med", depth=None, movetime=0.0, nodes=None,
+                 concurrency=None, seed=0, on_result=None, mate=None):
+    """
+    Analyse `tasks` across a process pool.
+
+    Args:
+        on_result: optional callback(result) called as each position finishes
+        mate: solve with the mate solver up to this many moves instead of `engine`
+
+    Returns:
+        dict with the results (in input order) and a summary
+    """
+    jobs = [dict(t, engine=engine, depth=depth, movetime=movetime, nodes=nodes, mate=mate,
+                 seed=seed + t["index"])
+            for t in tasks]
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(analyse_position, job) for job in jobs]
+        for fut in as_completed(futures):
+            result = fut.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["index"])
+    return {"results": results, "summary": summarize(results, elapsed)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse EPD/FEN positions in parallel")
+    parser.add_argument("files", nargs="+", help="EPD or FEN files, one position per line")
+    parser.add_argument("--engine", default="med", help="engine spec: easy, med[:depth], hard[:model]")
+    parser.add_argument("--depth", type=int, default=None, help="maximum search depth")
+    parser.add_argument("--movetime", type=float, default=None, help="seconds per position")
+    parser.add_argument("--nodes", type=int, default=None, help="node budget per position")
+    parser.add_argument("--concurrency", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--mate", type=int, default=None, metavar="N",
+                        help="use the mate solver: shortest forced mate in up to N moves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jsonl", help="also write one JSON result per line to this file")
+    parser.add_argument("--min-solve-rate", type=float, default=None,
+                        help="exit with status 1 if the bm/am/dm solve rate is below this (0-1)")
+    args = parser.parse_args(argv)
+
+    try:
+        check_spec(args.engine)
+    except ValueError as e:
+        parser.error(str(e))
+    movetime = args.movetime
+    if movetime is None and args.depth is None and args.nodes is None:
+        movetime = 1.0
+
+    tasks = load_positions(args.files)
+    if not tasks:
+        parser.error("no positions found")
+
+    out = open(args.jsonl, 'w') if args.jsonl else None
+
+    def on_result(result):
+        terminal_ui.show_analysis_result(result)
+        if out:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+        sys.stdout.flush()
+
+    terminal_ui.show_analysis_header()
+    try:
+        report = run_analysis(tasks, args.engine, args.depth, movetime or 0.0, args.nodes,
+                              args.concurrency, args.seed, on_result, args.mate)
+    finally:
+        if out:
+            out.close()
+    summary = report["summary"]
+    terminal_ui.show_analysis_summary(summary)
+    if args.min_solve_rate is not None and (summary["solve_rate"] or 0.0) < args.min_solve_rate:
+        print(f"Solve rate below {args.min_solve_rate:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# app/controller/loadtest.py
+# Client simulator for the game server: opens many concurrent sessions, plays
+# random human moves against the AI and reports latency percentiles,
+# throughput and the server's own queue metrics.
+#
+# Usage:
+#   python -m app.Controller.loadtest --sessions 300 --moves 5 --level 1
+#   python -m app.Controller.loadtest --spawn-server --workers 4 --sessions 200
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import chess
+from app.Model.profiler import Histogram
+
+
+class Client:
+    """One TCP connection; requests are matched to responses by id."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._reader_task = asyncio.create_task(self._read())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            msg = json.loads(line)
+            fut = self._waiting.pop(msg.get("id"), None)
+            if fut is not None and not fut.done():
+                fut.set_result(msg)
+        for fut in self._waiting.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("server closed connection"))
+
+    async def call(self, **request):
+        self._next_id += 1
+        request["id"] = self._next_id
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = fut
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return await fut
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except asyncio.CancelledError:
+            pass
+
+
+async def play_session(client, level, moves, rng, latency, stats):
+    state = await client.call(op="new", level=level)
+    sid = state["session"]
+    board = chess.Board()
+    for _ in range(moves):
+        if board.is_game_over():
+            break
+        move = rng.choice(list(board.legal_moves))
+        start = time.perf_counter()
+        reply = await client.call(op="move", session=sid, move=move.uci())
+        latency.add((time.perf_counter() - start) * 1e6)
+        if "error" in reply:
+            stats["errors"][reply["error"]] = stats["errors"].get(reply["error"], 0) + 1
+            if reply["error"] in ("overloaded", "session busy"):
+                await asyncio.sleep(0.05)
+                continue
+            break
+        board.push(move)
+        if reply.get("ai_move"):
+            board.push_uci(reply["ai_move"])
+            stats["ai_moves"] += 1
+    await client.call(op="close", session=sid)
+
+
+async def run_load(host, port, sessions, connections, moves, level, seed):
+    latency = Histogram()
+    stats = {"ai_moves": 0, "errors": {}}
+    clients = [await Client.connect(host, port) for _ in range(connections)]
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        play_session(clients[i % connections], level, moves, random.Random(rng.random()), latency, stats)
+        for i in range(sessions)
+    ])
+    elapsed = time.perf_counter() - start
+    metrics = await clients[0].call(op="metrics")
+    for c in clients:
+        await c.close()
+    return {
+        "sessions": sessions,
+        "connections": connections,
+        "elapsed_s": elapsed,
+        "ai_moves": stats["ai_moves"],
+        "ai_moves_per_s": stats["ai_moves"] / elapsed if elapsed else 0.0,
+        "errors": stats["errors"],
+        "move_latency": latency.summary(),
+        "server": metrics,
+    }
+
+
+async def main_async(args):
+    server = None
+    if args.spawn_server:
+        from app.Controller.server import GameServer
+        server = GameServer(workers=args.workers, movetime=args.movetime)
+        await server.start(args.host, args.port)
+    try:
+        report = await run_load(args.host, args.port, args.sessions, args.connections,
+                                args.moves, args.level, args.seed)
+    finally:
+        if server is not None:
+            await server.close()
+    print(json.dumps(report, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the game server with simulated clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent game sessions")
+    parser.add_argument("--connections", type=int, default=50, help="TCP connections shared by the sessions")
+    parser.add_argument("--moves", type=int, default=5, help="human moves per session")
+    parser.add_argument("--level", type=int, default=1, choices=(1, 2, 3))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn-server", action="store_true", help="run an in-process server for the test")
+    parser.add_argument("--workers", type=int, default=None, help="engine workers for --spawn-server")
+    parser.add_argument("--movetime", type=float, default=1.0, help="AI seconds per move for --spawn-server")
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
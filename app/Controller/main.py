@@ -1,49 +1,123 @@
 # app/controller/main.py
 # Main controller: glue between model and view, picks engine by difficulty.
 
+import threading
 import time
 import chess
 from app.Model.game import Game
-from app.Model import engine_easy, engine_med, engine_hard
+from app.Model import engine_easy, engine_med, engine_hard, memstats, profiler, see
+from app.Model.analysis_cache import AnalysisCache
 from app.Model.learning import LearningMemory
+from app.Model.persistence import PersistenceWorker
+from app.Controller import postgame
 from app.View import terminal_ui
 
 # Initialize memory
 memory = LearningMemory()
+memstats.watch(memory)
 
-def ai_move_for_level(level, board, hard_inst=None):
-    # 1. Try learned move first (for all levels)
-    learned_move = memory.get_best_move(board)
+# How learned moves are used:
+#   "prior"    - the medium search tries learned moves first (better cutoffs,
+#                still fully searched); easy/hard play a learned move only if
+#                it doesn't lose material by SEE
+#   "override" - any learned move is played without searching
+#   "off"      - learned moves are ignored
+LEARNING_MODES = ("prior", "override", "off")
+learning_mode = "prior"
+engine_med.set_move_prior(memory)
+
+# Learn from finished games through the background post-game analyser
+# (engine-verified winner moves only) instead of every winner move at once
+postgame_analysis = True
+ANALYSER_POLL_MS = 2000
+
+def set_learning_mode(mode):
+    global learning_mode
+    if mode not in LEARNING_MODES:
+        raise ValueError(f"unknown learning mode: {mode}")
+    learning_mode = mode
+    engine_med.set_move_prior(memory if mode == "prior" else None)
+
+def ai_move_for_level(level, board, hard_inst=None, limits=None):
+    # limits: optional engine_api.SearchLimits (deadline / cancellation)
+    with profiler.span("ai_move", level=level, ply=board.ply()):
+        return _ai_move_for_level(level, board, hard_inst, limits)
+
+def _ai_move_for_level(level, board, hard_inst, limits):
+    # 1. Try learned move first (level 2 uses it as a search prior instead)
+    learned_move = None
+    if learning_mode == "override" or (learning_mode == "prior" and level != 2):
+        learned_move = memory.get_best_move(board)
+        if learned_move and learning_mode == "prior" and not see.see_ge(board, learned_move):
+            profiler.count("ai_move.learned_rejected")
+            learned_move = None
     if learned_move:
+        profiler.count("ai_move.learned")
+        if limits is not None:
+            limits.publish(pv=[learned_move.uci()], source="memory")
         return learned_move
 
     # 2. Fallback to engines
     if level == 1:
-        return engine_easy.pick(board)
+        with profiler.span("engine.easy"):
+            return engine_easy.pick(board)
     if level == 2:
-        return engine_med.best_move(board, depth=3)
+        with profiler.span("engine.med", depth=3):
+            return engine_med.best_move(board, depth=3, limits=limits)
     if level == 3:
         if hard_inst is None:
             hard_inst = engine_hard.HardEngine()
-        return hard_inst.pick(board)
+        return hard_inst.pick(board, limits=limits)
     return engine_easy.pick(board)
 
 def play_gui():
     g = Game()
     hard = engine_hard.HardEngine()
+    memstats.watch(hard)
+    # End-of-game saves go through a background writer so the Tk thread never
+    # blocks on JSON dumps; bursts to the same file coalesce into one write.
+    writer = PersistenceWorker()
+    memory.writer = writer
+    # Searches warm-start from results of earlier sessions
+    cache = AnalysisCache()
+    engine_med.set_analysis_cache(cache)
+    
+    # Post-game analyser process: "proc" is None until the launch job has run,
+    # then the Popen (False if it couldn't start); "queued" notes games that
+    # ended while it was running
+    analyser = {"running": False, "proc": None, "queued": False}
+    
+    def launch_analyser():
+        # Runs on the persistence thread, after the pending history write
+        analyser["proc"] = postgame.start_background() or False
     
-    def ai_func(level, board):
-        return ai_move_for_level(level, board, hard_inst=hard)
+    def reload_memory():
+        memory.load()
+        if learning_mode == "prior":
+            engine_med.set_move_prior(memory)
+    
+    def poll_analyser():
+        proc = analyser["proc"]
+        if proc is None or (proc and proc.poll() is None):
+            gui.root.after(ANALYSER_POLL_MS, poll_analyser)
+            return
+        analyser["running"] = False
+        # Learned moves are only written by the analyser, so reloading never drops any
+        threading.Thread(target=reload_memory, name="memory-reload", daemon=True).start()
+        if analyser["queued"]:
+            start_analyser()
+    
+    def start_analyser():
+        analyser.update(running=True, proc=None, queued=False)
+        writer.submit("postgame", launch_analyser)
+        gui.root.after(ANALYSER_POLL_MS, poll_analyser)
+    
+    def ai_func(level, board, limits=None):
+        return ai_move_for_level(level, board, hard_inst=hard, limits=limits)
     
     # Trigger learning and history at game end
     def on_game_end(game_instance):
         # 1. Learning
-        moves = []
-        temp_board = chess.Board()
-        for move in game_instance.b.move_stack:
-            moves.append((temp_board.fen(), move.uci()))
-            temp_board.push(move)
-            
         result = game_instance.result()
         winner = None
         if result == "1-0":
@@ -51,9 +125,24 @@ def play_gui():
         elif result == "0-1":
             winner = chess.BLACK
             
-        if winner is not None:
+        if postgame_analysis:
+            # The history write is still queued on the persistence worker; the
+            # analyser is launched by a job queued behind it, so this never blocks
+            print(f"Game Over ({result}). Queued for post-game analysis")
+            if analyser["running"]:
+                analyser["queued"] = True
+            else:
+                start_analyser()
+        elif winner is not None:
             print(f"Game Over. Learning from winner: {result}")
+            moves = []
+            temp_board = chess.Board()
+            for move in game_instance.b.move_stack:
+                moves.append((temp_board.fen(), move.uci()))
+                temp_board.push(move)
             memory.learn_game(moves, winner)
+            if learning_mode == "prior":
+                engine_med.set_move_prior(memory)
             
         # 2. History
         # We need to access the history manager. It's in the GUI instance, 
@@ -71,8 +160,20 @@ def play_gui():
         pass
 
     from app.View.gui import InteractiveGui
-    gui = InteractiveGui(g, ai_func, on_game_end_callback=on_game_end)
-    gui.start()
+    def on_close():
+        # A launch still queued behind the history write would start an analyser
+        # after the window is gone; the next analyser run picks the game up instead
+        if writer.discard("postgame"):
+            print("Post-game analysis deferred to the next analyser run")
+    
+    gui = InteractiveGui(g, ai_func, on_game_end_callback=on_game_end, writer=writer,
+                         on_close_callback=on_close)
+    try:
+        gui.start()
+    finally:
+        writer.shutdown()
+        # Only flushed: an abandoned AI thread may still be reading it
+        cache.flush()
 
 if __name__ == "__main__":
     # Default to GUI
@@ -0,0 +1,395 @@
+# app/controller/postgame.py
+# Background post-game analysis: re-analyses finished games from the history
+# archive with engine_med under a node budget, marks mistakes and blunders,
+# records the eval swing of every ply and feeds only engine-verified moves
+# of the winner into LearningMemory.
+#
+# Runs as a separate low-priority process (nice 19 / idle priority class) with
+# a pool of workers on the idle cores. Progress is checkpointed to
+# data/game_analysis.json after every batch of positions, so an interrupted
+# run resumes where it stopped. A lock file keeps a second instance from
+# starting while one is running.
+#
+# Usage:
+#   python -m app.Controller.postgame                    # analyse pending games, then exit
+#   python -m app.Controller.postgame --nodes 50000 --workers 2
+#   python -m app.Controller.postgame --show             # blunders of the latest analysed game
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+from app.Model import engine_med
+from app.Model.engine_api import SearchLimits
+from app.Model.history import HistoryManager
+from app.Model.learning import LearningMemory
+from app.Model.persistence import write_json_atomic
+
+STATE_FILE = "data/game_analysis.json"
+LOCK_FILE = "data/postgame.lock"
+LOG_FILE = "data/postgame.log"
+
+DEFAULT_NODES = 20_000
+DEFAULT_DEPTH = 6
+WORKER_TABLE_LIMIT = 200_000
+
+# Loss (pawns, against the engine's best move) that marks a move
+MISTAKE = 1.0
+BLUNDER = 2.0
+# A played move within this margin of the engine's best counts as verified
+VERIFY_MARGIN = 0.3
+
+# Positions analysed per worker before each checkpoint
+BATCH_PER_WORKER = 4
+# A lock file that hasn't been touched for this long belongs to a dead run
+LOCK_STALE_SECONDS = 600
+
+
+# --- Worker process side ---
+
+_context = None
+
+
+def _init_worker():
+    global _context
+    _context = engine_med.SearchContext(table_limit=WORKER_TABLE_LIMIT)
+
+
+def analyse_position(job):
+    """
+    Search one position in a worker process.
+
+    Args:
+        job: (fen, move played from it in UCI or None, nodes, depth)
+
+    Returns:
+        (score, best move UCI or None, score of the played move or None, nodes);
+        scores are from the side to move's point of view
+    """
+    fen, played, nodes, depth = job
+    board = chess.Board(fen)
+    if board.is_checkmate():
+        return -engine_med.MATE_SCORE, None, None, 0
+    if board.is_game_over(claim_draw=True):
+        return 0.0, None, None, 0
+    start = _context.nodes
+    move, score, reached = _context.iterative_deepening(board, SearchLimits(depth=depth, nodes=nodes), depth)
+    best = move.uci() if move else None
+    played_score = None
+    if played is not None:
+        played_score = score
+        if played != best:
+            # Scored at the depth the best move reached, on the same table, so the
+            # difference is the move's loss and not the horizon noise between two
+            # independent searches
+            [(_, played_score)] = _context.score_moves(
+                board, [chess.Move.from_uci(played)], max(1, min(reached, depth)))
+    return score, best, played_score, _context.nodes - start
+
+
+# --- Analysis ---
+
+def game_positions(entry):
+    """FENs before every move and after the last one."""
+    board = chess.Board(entry.get("start_fen") or chess.STARTING_FEN)
+    fens = [board.fen()]
+    for uci in entry["moves"]:
+        board.push_uci(uci)
+        fens.append(board.fen())
+    return fens
+
+
+def annotate(entry, fens, scores, bests, played):
+    """
+    Per-ply annotation of a game from the search of each position.
+
+    The loss of a move is the best score minus the score the same search gave
+    the played move (played[i], side to move's point of view).
+
+    Returns:
+        dict with the game id, result and one record per ply: move (UCI and
+        SAN), eval after the move and swing (pawns, White's point of view),
+        engine best move, loss, verified and mark ("mistake"/"blunder"/None)
+    """
+    plies = []
+    marks = {"white": {"mistake": 0, "blunder": 0}, "black": {"mistake": 0, "blunder": 0}}
+    for i, uci in enumerate(entry["moves"]):
+        board = chess.Board(fens[i])
+        white = board.turn == chess.WHITE
+        before = scores[i] if white else -scores[i]
+        after = played[i] if white else -played[i]
+        loss = max(0.0, scores[i] - played[i])
+        mark = "blunder" if loss >= BLUNDER else ("mistake" if loss >= MISTAKE else None)
+        if mark:
+            marks["white" if white else "black"][mark] += 1
+        plies.append({
+            "ply": i + 1,
+            "move": uci,
+            "san": board.san(chess.Move.from_uci(uci)),
+            "eval": round(after, 2),
+            "swing": round(after - before, 2),
+            "best": bests[i],
+            "loss": round(loss, 2),
+            "verified": uci == bests[i] or loss <= VERIFY_MARGIN,
+            "mark": mark,
+        })
+    return {
+        "id": entry["id"],
+        "timestamp": entry.get("timestamp"),
+        "result": entry.get("result"),
+        "analysed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "marks": marks,
+        "plies": plies,
+    }
+
+
+def verified_moves(entry, annotation, fens):
+    """(fen, move) pairs the winner played that the engine agrees with."""
+    result = entry.get("result")
+    if result == "1-0":
+        winner = chess.WHITE
+    elif result == "0-1":
+        winner = chess.BLACK
+    else:
+        return []
+    moves = []
+    for i, ply in enumerate(annotation["plies"]):
+        if chess.Board(fens[i]).turn == winner and ply["verified"]:
+            moves.append((fens[i], ply["move"]))
+    return moves
+
+
+# --- State, lock and priority ---
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    except (OSError, ValueError) as e:
+        print(f"Error loading analysis state: {e}")
+        state = {}
+    state.setdefault("games", {})
+    state.setdefault("partial", {})
+    return state
+
+
+def save_state(state):
+    write_json_atomic(STATE_FILE, json.dumps(state))
+
+
+def acquire_lock():
+    """Create the lock file; False if another live run holds it."""
+    folder = os.path.dirname(LOCK_FILE)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(LOCK_FILE) > LOCK_STALE_SECONDS:
+            os.remove(LOCK_FILE)
+    except OSError:
+        pass
+    try:
+        fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def touch_lock():
+    try:
+        os.utime(LOCK_FILE)
+    except OSError:
+        pass
+
+
+def release_lock():
+    try:
+        os.remove(LOCK_FILE)
+    except OSError:
+        pass
+
+
+def lower_priority():
+    """Run this process (and the pool it starts) at the lowest CPU priority."""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(19)
+        except OSError:
+            pass
+
+
+def pending_games(state):
+    """History entries with moves that haven't been analysed yet, oldest first."""
+    history = HistoryManager().get_history()
+    return [e for e in reversed(history)
+            if e.get("id") and e.get("moves") and e["id"] not in state["games"]]
+
+
+def analyse_games(nodes=DEFAULT_NODES, depth=DEFAULT_DEPTH, workers=None, max_games=None, on_game=None):
+    """
+    Analyse every pending game, checkpointing after each batch of positions.
+    Games finished while this runs are picked up before it returns.
+
+    Args:
+        on_game: optional callback(entry, annotation, learned) per finished game
+
+    Returns:
+        number of games analysed, or None if another run holds the lock
+    """
+    if not acquire_lock():
+        return None
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    done = 0
+    try:
+        state = load_state()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            while max_games is None or done < max_games:
+                # One history read per pass; games finished meanwhile wait for the next pass
+                games = pending_games(state)
+                if not games:
+                    break
+                for entry in games:
+                    if max_games is not None and done >= max_games:
+                        break
+                    result = analyse_game(pool, state, entry, nodes, depth, workers)
+                    if result is None:
+                        continue
+                    annotation, learned = result
+                    if learned:
+                        LearningMemory().learn_moves(learned)
+                    done += 1
+                    if on_game is not None:
+                        on_game(entry, annotation, len(learned))
+    finally:
+        release_lock()
+    return done
+
+
+def analyse_game(pool, state, entry, nodes, depth, workers):
+    """
+    Analyse one game, checkpointing after each batch of positions, and record
+    it as done in `state`.
+
+    Returns:
+        (annotation, verified (fen, move) pairs to learn), or None if the
+        game's moves couldn't be replayed
+    """
+    gid = entry["id"]
+    try:
+        fens = game_positions(entry)
+    except ValueError as e:
+        print(f"Skipping game {gid}: {e}")
+        state["games"][gid] = {"id": gid, "error": str(e)}
+        save_state(state)
+        return None
+    partial = state["partial"].get(gid)
+    if partial is None or "played" not in partial:
+        # Checkpoints from before played-move scores were recorded start over
+        partial = state["partial"][gid] = {"scores": [], "bests": [], "played": [], "nodes": 0}
+    moves = entry["moves"]
+    batch = workers * BATCH_PER_WORKER
+    while len(partial["scores"]) < len(fens):
+        start = len(partial["scores"])
+        jobs = [(fens[i], moves[i] if i < len(moves) else None, nodes, depth)
+                for i in range(start, min(start + batch, len(fens)))]
+        for score, best, played, used in pool.map(analyse_position, jobs):
+            partial["scores"].append(score)
+            partial["bests"].append(best)
+            partial["played"].append(played)
+            partial["nodes"] += used
+        save_state(state)
+        touch_lock()
+
+    annotation = annotate(entry, fens, partial["scores"], partial["bests"], partial["played"])
+    annotation["nodes"] = partial["nodes"]
+    learned = verified_moves(entry, annotation, fens)
+    annotation["learned"] = len(learned)
+    # Record the game as done before learning, so a crash in between
+    # can't make a resumed run count its moves twice
+    state["games"][gid] = annotation
+    del state["partial"][gid]
+    save_state(state)
+    return annotation, learned
+
+
+def start_background(nodes=DEFAULT_NODES, depth=DEFAULT_DEPTH):
+    """
+    Launch the analyser as a detached low-priority process (no-op if one is
+    already running; it picks up new games before exiting).
+
+    Returns:
+        subprocess.Popen, or None if it couldn't be started
+    """
+    folder = os.path.dirname(LOG_FILE)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    args = [sys.executable, "-m", "app.Controller.postgame", "--nodes", str(nodes), "--depth", str(depth)]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.IDLE_PRIORITY_CLASS | subprocess.CREATE_NO_WINDOW
+    try:
+        with open(LOG_FILE, 'a') as log:
+            return subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs)
+    except OSError as e:
+        print(f"Error starting post-game analysis: {e}")
+        return None
+
+
+def show_latest(state):
+    games = [g for g in state["games"].values() if "plies" in g]
+    if not games:
+        print("No analysed games yet.")
+        return
+    game = max(games, key=lambda g: g.get("analysed_at") or "")
+    print(f"Game {game['id']} ({game.get('timestamp')}, {game.get('result')}), "
+          f"{game.get('nodes', 0)} nodes, {game.get('learned', 0)} moves learned")
+    for p in game["plies"]:
+        if p["mark"]:
+            number = (p["ply"] + 1) // 2
+            dots = "." if p["ply"] % 2 else "..."
+            print(f"  {number}{dots}{p['san']:<8} {p['mark']:<8} loss {p['loss']:.2f}  "
+                  f"eval {p['eval']:+.2f}  best {p['best']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-analyse finished games and learn engine-verified moves")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="node budget per position")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="maximum search depth")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count - 1)")
+    parser.add_argument("--max-games", type=int, default=None, help="stop after this many games")
+    parser.add_argument("--show", action="store_true", help="print the latest analysed game's mistakes and exit")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        show_latest(load_state())
+        return 0
+
+    lower_priority()
+
+    def on_game(entry, annotation, learned):
+        marks = annotation["marks"]
+        print(f"{time.strftime('%H:%M:%S')} game {entry['id'][:8]} {entry.get('result')}: "
+              f"{len(annotation['plies'])} plies, "
+              f"blunders W{marks['white']['blunder']}/B{marks['black']['blunder']}, "
+              f"mistakes W{marks['white']['mistake']}/B{marks['black']['mistake']}, {learned} moves learned")
+        sys.stdout.flush()
+
+    done = analyse_games(args.nodes, args.depth, args.workers, args.max_games, on_game)
+    if done is None:
+        print("Post-game analysis is already running")
+        return 1
+    print(f"Analysed {done} game(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
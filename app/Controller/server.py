@@ -0,0 +1,383 @@
+# app/controller/server.py
+# Asyncio multi-session game server.
+#
+# Clients connect over TCP (localhost by default) and speak JSON lines: one
+# request object per line, one response object per line. Each connection can
+# own any number of game sessions. AI moves are dispatched to a shared pool of
+# warm engine worker processes; sessions are served round-robin so one busy
+# client cannot starve the others, and queues are bounded (backpressure).
+#
+# Usage:
+#   python -m app.Controller.server --port 8765 --workers 4
+#
+# Requests ("id" is optional and echoed back):
+#   {"op": "new", "level": 2}                 -> {"session": "s1", "fen": ...}
+#   {"op": "new", "engine": "med:2", "fen": ...}
+#   {"op": "move", "session": "s1", "move": "e2e4"}   human move, then AI reply
+#   {"op": "ai", "session": "s1"}                     AI plays the side to move
+#   {"op": "state", "session": "s1"}
+#   {"op": "close", "session": "s1"}
+#   {"op": "metrics"}
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+from app.Model import engine_med
+from app.Model.engine_api import SearchLimits, check_spec, get_engine
+from app.Model.game import Game
+from app.Model.profiler import Histogram
+
+LEVEL_ENGINES = {1: "easy", 2: "med:3", 3: "hard"}
+
+# Transposition table cap per worker process (entries)
+WORKER_TABLE_LIMIT = 200_000
+
+
+# --- Worker process side ---
+
+# spec -> session whose game the worker's engine last searched
+_last_session = {}
+
+
+def _warm_worker(specs):
+    # Build every engine up front so the first request doesn't pay for imports/model loads
+    engine_med.set_table_limit(WORKER_TABLE_LIMIT)
+    for spec in specs:
+        get_engine(spec)
+
+
+def _search_job(spec, sid, start_fen, moves, movetime):
+    board = chess.Board(start_fen)
+    for uci in moves:
+        board.push_uci(uci)
+    limits = SearchLimits.movetime(movetime) if movetime else None
+    engine = get_engine(spec)
+    if _last_session.get(spec) != sid:
+        # The engine is shared by every session this worker serves; don't carry
+        # one game's transposition table into another's
+        engine.new_game()
+        _last_session[spec] = sid
+    start = time.perf_counter()
+    move = engine.search(board, limits)
+    return (move.uci() if move else None), time.perf_counter() - start
+
+
+# --- Server side ---
+
+class ServerError(Exception):
+    """Error reported back to the client as {"error": ...}"""
+
+
+class Session:
+    def __init__(self, sid, engine, fen=None):
+        self.sid = sid
+        self.engine = engine
+        self.game = Game()
+        if fen:
+            self.game.set_fen(fen)
+        self.start_fen = self.game.fen()
+        self.pending = 0  # queued + running AI jobs
+
+    def state(self):
+        return {
+            "session": self.sid,
+            "fen": self.game.fen(),
+            "turn": "white" if self.game.turn() else "black",
+            "over": self.game.is_over(),
+            "result": self.game.result() if self.game.is_over() else None,
+            "moves": [m.uci() for m in self.game.b.move_stack],
+        }
+
+
+class Job:
+    __slots__ = ("session", "future", "queued_at")
+
+    def __init__(self, session, future):
+        self.session = session
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class GameServer:
+    """
+    Args:
+        workers: engine worker processes
+        movetime: seconds per AI move
+        max_queue: total queued AI jobs before new ones are rejected
+        max_per_session: queued AI jobs allowed per session; more than one lets
+            jobs for the same position race, and all but the first are rejected
+        max_per_connection: requests processed concurrently per connection
+    """
+
+    def __init__(self, workers=None, movetime=2.0, max_queue=1024, max_per_session=1,
+                 max_per_connection=64):
+        self.workers = workers or os.cpu_count() or 2
+        self.movetime = movetime
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self.max_per_connection = max_per_connection
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        # Round-robin: one FIFO per session, plus the order in which sessions get a turn
+        self._queues = {}
+        self._ready = deque()
+        self._queued = 0
+        self._wakeup = None
+        self._pool = None
+        # Connection handler tasks, cancelled and awaited on close()
+        self._handlers = set()
+        self.metrics = {
+            "connections": 0, "requests": 0, "completed": 0, "rejected": 0,
+            "errors": 0, "in_flight": 0, "max_queue_depth": 0,
+        }
+        self.queue_wait = Histogram()
+        self.search_time = Histogram()
+
+    # --- Lifecycle ---
+    async def start(self, host="127.0.0.1", port=8765):
+        self._wakeup = asyncio.Event()
+        specs = sorted(set(LEVEL_ENGINES.values()))
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                         initargs=(specs,))
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server
+
+    async def close(self):
+        # Stop accepting, end every open connection, then the dispatchers
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Scheduling ---
+    def _enqueue(self, session):
+        if self._queued >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise ServerError("overloaded")
+        if session.pending >= self.max_per_session:
+            self.metrics["rejected"] += 1
+            raise ServerError("session busy")
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(session.sid)
+        if queue is None:
+            queue = self._queues[session.sid] = deque()
+        if not queue:
+            self._ready.append(session.sid)
+        queue.append(Job(session, future))
+        session.pending += 1
+        self._queued += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self._queued)
+        self._wakeup.set()
+        return future
+
+    def _next_job(self):
+        while self._ready:
+            sid = self._ready.popleft()
+            queue = self._queues.get(sid)
+            if not queue:
+                continue
+            job = queue.popleft()
+            if queue:
+                self._ready.append(sid)  # back of the line: fairness between sessions
+            else:
+                del self._queues[sid]
+            self._queued -= 1
+            return job
+        return None
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            session = job.session
+            self.queue_wait.add((time.perf_counter() - job.queued_at) * 1e6)
+            self.metrics["in_flight"] += 1
+            try:
+                moves = [m.uci() for m in session.game.b.move_stack]
+                uci, secs = await loop.run_in_executor(
+                    self._pool, _search_job, session.engine, session.sid, session.start_fen, moves,
+                    self.movetime)
+                self.search_time.add(secs * 1e6)
+                self.metrics["completed"] += 1
+                if not job.future.done():
+                    job.future.set_result(uci)
+            except Exception as e:
+                self.metrics["errors"] += 1
+                if not job.future.done():
+                    job.future.set_exception(ServerError(f"engine failure: {e}"))
+            finally:
+                self.metrics["in_flight"] -= 1
+                session.pending -= 1
+
+    # --- Protocol ---
+    async def _handle_client(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self.metrics["connections"] += 1
+        owned = set()
+        # Requests on one connection run concurrently (responses carry the request id);
+        # once max_per_connection are in flight we stop reading from the socket.
+        slots = asyncio.Semaphore(self.max_per_connection)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await slots.acquire()
+                task = asyncio.create_task(self._serve_line(line, owned, writer, write_lock, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown: end quietly instead of surfacing as a cancelled task
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for sid in owned:
+                self.sessions.pop(sid, None)
+            self.metrics["connections"] -= 1
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def _serve_line(self, line, owned, writer, write_lock, slots):
+        request = None
+        try:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ServerError("request must be a JSON object")
+                response = await self.handle(request, owned)
+            except ServerError as e:
+                response = {"error": str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": f"bad request: {e}"}
+            except Exception as e:
+                # Never leave a request unanswered
+                self.metrics["errors"] += 1
+                response = {"error": f"internal error: {type(e).__name__}: {e}"}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+            async with write_lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                # Respect the client's receive window instead of buffering without bound
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            slots.release()
+
+    def _session(self, request, owned):
+        sid = request.get("session")
+        if sid not in owned:
+            raise ServerError("unknown session")
+        return self.sessions[sid]
+
+    async def handle(self, request, owned):
+        self.metrics["requests"] += 1
+        op = request.get("op")
+        if op == "new":
+            engine = request.get("engine") or LEVEL_ENGINES.get(int(request.get("level", 2)))
+            if engine is None:
+                raise ServerError("unknown level")
+            try:
+                check_spec(engine)
+            except ValueError as e:
+                raise ServerError(str(e))
+            sid = f"s{next(self._ids)}"
+            session = Session(sid, engine, request.get("fen"))
+            self.sessions[sid] = session
+            owned.add(sid)
+            return session.state()
+        if op == "move":
+            session = self._session(request, owned)
+            if session.pending:
+                raise ServerError("session busy")
+            ok, err = session.game.push_uci(request["move"])
+            if not ok:
+                raise ServerError(err)
+            if session.game.is_over() or not request.get("reply", True):
+                return session.state()
+            return await self._ai_move(session)
+        if op == "ai":
+            session = self._session(request, owned)
+            if session.game.is_over():
+                return session.state()
+            return await self._ai_move(session)
+        if op == "state":
+            return self._session(request, owned).state()
+        if op == "close":
+            session = self._session(request, owned)
+            owned.discard(session.sid)
+            self.sessions.pop(session.sid, None)
+            return {"session": session.sid, "closed": True}
+        if op == "metrics":
+            return self.snapshot()
+        raise ServerError(f"unknown op {op!r}")
+
+    async def _ai_move(self, session):
+        uci = await self._enqueue(session)
+        if uci is None:
+            raise ServerError("engine returned no move")
+        ok, err = session.game.push_uci(uci)
+        if not ok:
+            raise ServerError(f"engine move {uci} rejected: {err}")
+        state = session.state()
+        state["ai_move"] = uci
+        return state
+
+    def snapshot(self):
+        return dict(self.metrics, sessions=len(self.sessions), queue_depth=self._queued,
+                    workers=self.workers, queue_wait=self.queue_wait.summary(),
+                    search_time=self.search_time.summary())
+
+
+async def serve(host, port, workers, movetime, max_queue):
+    server = GameServer(workers=workers, movetime=movetime, max_queue=max_queue)
+    srv = await server.start(host, port)
+    print(f"Game server listening on {host}:{port} with {server.workers} engine workers")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session chess game server (JSON lines over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="engine worker processes")
+    parser.add_argument("--movetime", type=float, default=2.0, help="seconds per AI move")
+    parser.add_argument("--max-queue", type=int, default=1024, help="queued AI jobs before rejecting")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.movetime, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
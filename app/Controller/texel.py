@@ -0,0 +1,393 @@
+# app/controller/texel.py
+# Offline Texel tuning of the medium engine's evaluation: piece values,
+# piece-square tables and the mobility weight.
+#
+# Labelled positions are turned into NumPy feature matrices in parallel
+# (FEN placements are one-hot encoded as whole arrays, not square by square;
+# only the legal-move count needs a chess.Board per position), then the
+# weights are fitted by minibatch gradient descent (Adam) on the logistic loss
+# of sigmoid(K * eval) against the game results. The fitted parameters are
+# written as JSON that engine_med.load_eval_params() reads at startup.
+#
+# Input: EPD with a `c9`, `c2` or `result` opcode, FEN lines followed by a result
+# ("1-0", "0-1", "1/2-1/2", "[1.0]", "[0.5]", "[0.0]"), or PGN games (every
+# position after the opening is labelled with the game result).
+#
+# Usage:
+#   python -m app.Controller.texel positions.epd --epochs 20
+#   python -m app.Controller.texel games.pgn --out data/eval_params.json --workers 8
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.pgn
+import numpy as np
+
+from app.Model import engine_med
+
+# Feature layout (all from White's point of view, side to move in the sign of mobility):
+#   [0:5]     material difference for pawn, knight, bishop, rook, queen
+#   [5:389]   piece-square occupancy, 6 piece types x 64 squares, +1 White / -1 Black (mirrored)
+#   [389]     legal-move count of the side to move, + for White, - for Black
+TUNED_PIECES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+N_MATERIAL = len(TUNED_PIECES)
+N_PST = 6 * 64
+N_FEATURES = N_MATERIAL + N_PST + 1
+MOBILITY = N_FEATURES - 1
+
+CHUNK_SIZE = 20_000
+SKIP_OPENING_PLIES = 8
+
+_RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5, "[1.0]": 1.0, "[0.5]": 0.5, "[0.0]": 0.0,
+            "[1]": 1.0, "[0]": 0.0}
+_RESULT_RE = re.compile(r'"?(1-0|0-1|1/2-1/2|\[1\.0\]|\[0\.5\]|\[0\.0\]|\[1\]|\[0\])"?\s*;?\s*$')
+_OPCODE_RE = re.compile(r"[A-Za-z][A-Za-z0-9_]*$")
+
+
+# --- Reading labelled positions ---
+
+def parse_labelled(line):
+    """
+    Parse one labelled position: EPD with a `c9`, `c2` or `result` opcode,
+    or a FEN followed by a result.
+
+    Returns:
+        (fen, result from White's point of view: 1, 0.5 or 0) or None
+    """
+    fields = line.split()
+    # EPD has exactly four position fields, then opcodes; a FEN has move counters there
+    if len(fields) > 4 and _OPCODE_RE.match(fields[4]):
+        try:
+            board, ops = chess.Board.from_epd(line)
+        except ValueError:
+            return None
+        for opcode in ("c9", "c2", "result"):
+            label = ops.get(opcode)
+            if isinstance(label, str) and label.strip() in _RESULTS:
+                return board.fen(), _RESULTS[label.strip()]
+        return None
+    m = _RESULT_RE.search(line)
+    if m is None:
+        return None
+    fen = line[:m.start()].strip().rstrip("|;,").strip()
+    if len(fen.split()) == 4:
+        fen += " 0 1"
+    return fen, _RESULTS[m.group(1)]
+
+
+def read_pgn(path, skip_plies=SKIP_OPENING_PLIES):
+    """Every position after `skip_plies` plies of each decided or drawn game, with the game result."""
+    out = []
+    with open(path, 'r', errors="replace") as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            result = _RESULTS.get(game.headers.get("Result"))
+            if result is None:
+                continue
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                board.push(move)
+                if ply + 1 >= skip_plies:
+                    out.append((board.fen(), result))
+    return out
+
+
+def read_positions(paths):
+    """
+    Labelled (fen, result) pairs from EPD/FEN text files and PGN files.
+
+    Returns:
+        (samples, number of non-empty lines that couldn't be parsed)
+    """
+    samples = []
+    skipped = 0
+    for path in paths:
+        if path.lower().endswith(".pgn"):
+            samples.extend(read_pgn(path))
+            continue
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parsed = parse_labelled(line)
+                if parsed is not None:
+                    samples.append(parsed)
+                else:
+                    skipped += 1
+    return samples, skipped
+
+
+# --- Feature extraction ---
+
+# FEN piece placement -> exactly 64 characters (digits expanded, no slashes)
+_EXPAND = str.maketrans({**{str(d): "1" * d for d in range(1, 9)}, "/": None})
+_LETTERS = np.frombuffer(b"PNBRQKpnbrqk", dtype=np.uint8)
+
+
+def features_from_placements(placements):
+    """
+    Vectorized material/PST features.
+
+    Args:
+        placements: list of expanded placements (64 characters, a8..h1 as in FEN)
+
+    Returns:
+        (n, N_FEATURES - 1) int8 array
+    """
+    n = len(placements)
+    chars = np.frombuffer("".join(placements).encode("ascii"), dtype=np.uint8).reshape(n, 8, 8)
+    # FEN lists rank 8 first; flip so index = square (a1 = 0)
+    squares = chars[:, ::-1, :].reshape(n, 1, 64)
+    onehot = (squares == _LETTERS.reshape(1, 12, 1)).reshape(n, 2, 6, 8, 8)
+    white = onehot[:, 0].astype(np.int8)
+    # Mirror Black's boards vertically so both colours share one table
+    black = onehot[:, 1, :, ::-1, :].astype(np.int8)
+    pst = (white - black).reshape(n, 6, 64)
+    material = pst.sum(axis=2, dtype=np.int8)[:, :N_MATERIAL]
+    return np.concatenate([material, pst.reshape(n, N_PST)], axis=1)
+
+
+def extract_chunk(samples, skip_checks=True, mobility=True):
+    """
+    Features for a list of (fen, result).
+
+    With `mobility` each position is also loaded into a chess.Board to count
+    legal moves; positions that are over (mate, stalemate, bare kings) are
+    then skipped because eval_board scores them specially, and so are
+    positions in check unless skip_checks is False. Without it only the
+    placement string is parsed (much faster) and mobility is left at 0.
+
+    Returns:
+        (x int8 (n, N_FEATURES - 1), mobility int16 (n,), y float32 (n,))
+    """
+    placements, moves, labels = [], [], []
+    for fen, result in samples:
+        expanded = fen.split(" ", 1)[0].translate(_EXPAND)
+        if len(expanded) != 64:
+            continue
+        count = 0
+        if mobility:
+            try:
+                board = chess.Board(fen)
+            except ValueError:
+                continue
+            if skip_checks and board.is_check():
+                continue
+            count = board.legal_moves.count()
+            if count == 0 or board.is_insufficient_material():
+                continue
+            if board.turn == chess.BLACK:
+                count = -count
+        placements.append(expanded)
+        moves.append(count)
+        labels.append(result)
+    if not placements:
+        return (np.zeros((0, N_FEATURES - 1), np.int8), np.zeros(0, np.int16), np.zeros(0, np.float32))
+    return (features_from_placements(placements), np.array(moves, dtype=np.int16),
+            np.array(labels, dtype=np.float32))
+
+
+def extract_features(samples, workers=None, skip_checks=True, mobility=True):
+    """Feature matrices for all samples, extracted in CHUNK_SIZE chunks across a process pool."""
+    chunks = [samples[i:i + CHUNK_SIZE] for i in range(0, len(samples), CHUNK_SIZE)]
+    if workers == 1 or len(chunks) <= 1:
+        parts = [extract_chunk(c, skip_checks, mobility) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(extract_chunk, chunks, [skip_checks] * len(chunks),
+                                  [mobility] * len(chunks)))
+    if not parts:
+        return extract_chunk([])
+    return (np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]))
+
+
+# --- Parameters <-> weight vector ---
+
+def current_weights():
+    """Weight vector of the evaluation engine_med is using now."""
+    w = np.zeros(N_FEATURES, dtype=np.float64)
+    for i, pt in enumerate(TUNED_PIECES):
+        w[i] = engine_med.VAL[pt]
+    if engine_med.PST:
+        for pt, table in engine_med.PST.items():
+            w[N_MATERIAL + (pt - 1) * 64:N_MATERIAL + pt * 64] = table
+    w[MOBILITY] = engine_med.MOBILITY_WEIGHT
+    return w
+
+
+def weights_to_params(w):
+    """JSON-ready eval parameters as read by engine_med.load_eval_params()."""
+    return {
+        "val": {chess.piece_name(pt): round(float(w[i]), 4) for i, pt in enumerate(TUNED_PIECES)},
+        "pst": {chess.piece_name(pt): [round(float(v), 4)
+                                       for v in w[N_MATERIAL + (pt - 1) * 64:N_MATERIAL + pt * 64]]
+                for pt in chess.PIECE_TYPES},
+        "mobility": round(float(w[MOBILITY]), 5),
+    }
+
+
+# --- Optimisation ---
+
+def evaluate(x, mob, w, batch=1 << 16):
+    """Linear eval (pawns, White's point of view) for every row, in float32 batches."""
+    w32 = w.astype(np.float32)
+    out = np.empty(len(x), dtype=np.float32)
+    for i in range(0, len(x), batch):
+        out[i:i + batch] = x[i:i + batch].astype(np.float32) @ w32[:MOBILITY] + mob[i:i + batch] * w32[MOBILITY]
+    return out
+
+
+def log_loss(scores, y, k):
+    p = 1.0 / (1.0 + np.exp(-k * scores.astype(np.float64)))
+    p = np.clip(p, 1e-7, 1 - 1e-7)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def fit_k(scores, y, lo=0.05, hi=5.0, iters=40):
+    """Sigmoid scale K minimising the log loss of the current eval (golden-section search)."""
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = lo, hi
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = log_loss(scores, y, c), log_loss(scores, y, d)
+    for _ in range(iters):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = log_loss(scores, y, c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = log_loss(scores, y, d)
+    return (a + b) / 2
+
+
+def tune(x, mob, y, w0, k, epochs=10, batch_size=4096, lr=0.002, l2=1e-4, seed=0, on_epoch=None):
+    """
+    Minibatch Adam on the logistic loss of sigmoid(k * eval) against y.
+    PST weights get an L2 penalty; they overlap with material, and the penalty
+    keeps the piece values carrying the average.
+
+    Args:
+        on_epoch: optional callback(epoch, loss, positions_per_s)
+
+    Returns:
+        fitted weight vector (float64)
+    """
+    rng = np.random.default_rng(seed)
+    w = w0.astype(np.float32).copy()
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    penalty = np.zeros_like(w)
+    penalty[N_MATERIAL:MOBILITY] = l2
+    mob = mob.astype(np.float32)
+    step = 0
+    n = len(y)
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        order = rng.permutation(n)
+        for i in range(0, n, batch_size):
+            idx = order[i:i + batch_size]
+            xb = np.empty((len(idx), N_FEATURES), dtype=np.float32)
+            xb[:, :MOBILITY] = x[idx]
+            xb[:, MOBILITY] = mob[idx]
+            p = 1.0 / (1.0 + np.exp(-k * (xb @ w)))
+            grad = k * (xb.T @ (p - y[idx])) / len(idx) + penalty * w
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            w -= lr * m_hat / (np.sqrt(v_hat) + eps)
+        elapsed = time.perf_counter() - start
+        if on_epoch is not None:
+            on_epoch(epoch, log_loss(evaluate(x, mob, w), y, k), n / elapsed if elapsed > 0 else 0.0)
+    return w.astype(np.float64)
+
+
+def save_params(path, params):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Texel-tune the medium engine's evaluation")
+    parser.add_argument("files", nargs="+", help="labelled EPD/FEN files or PGN games")
+    parser.add_argument("--out", default=engine_med.EVAL_PARAMS_FILE, help="parameter file to write")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--lr", type=float, default=0.002, help="Adam learning rate")
+    parser.add_argument("--l2", type=float, default=1e-4, help="L2 penalty on piece-square weights")
+    parser.add_argument("--k", type=float, default=None, help="sigmoid scale (default: fitted to the current eval)")
+    parser.add_argument("--validation", type=float, default=0.1, help="fraction of positions held out")
+    parser.add_argument("--workers", type=int, default=None, help="feature extraction processes")
+    parser.add_argument("--include-checks", action="store_true", help="keep positions in check")
+    parser.add_argument("--no-mobility", action="store_true",
+                        help="skip legal-move counting (much faster); the mobility weight is kept as is")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    samples, unparsed = read_positions(args.files)
+    if unparsed:
+        print(f"Skipped {unparsed} lines without a parsable position and result")
+    if not samples:
+        parser.error("no labelled positions found")
+    read_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    x, mob, y = extract_features(samples, args.workers, not args.include_checks, not args.no_mobility)
+    extract_secs = time.perf_counter() - start
+    print(f"Read {len(samples)} positions in {read_secs:.1f}s; extracted {len(y)} feature rows in "
+          f"{extract_secs:.1f}s ({len(y) / max(extract_secs, 1e-9) * 60 / 1e6:.2f}M positions/min)")
+    if len(y) < len(samples):
+        print(f"Dropped {len(samples) - len(y)} positions (invalid FEN, in check or game over)")
+    if len(y) < 2:
+        parser.error("not enough usable positions")
+
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(y))
+    n_valid = int(len(y) * args.validation)
+    valid, train = order[:n_valid], order[n_valid:]
+
+    w0 = current_weights()
+    k = args.k or fit_k(evaluate(x[train], mob[train], w0), y[train])
+    print(f"K = {k:.4f}; initial loss {log_loss(evaluate(x[train], mob[train], w0), y[train], k):.5f}")
+
+    def on_epoch(epoch, loss, rate):
+        print(f"epoch {epoch:3d}  train loss {loss:.5f}  {rate * 60 / 1e6:.2f}M positions/min")
+        sys.stdout.flush()
+
+    w = tune(x[train], mob[train], y[train], w0, k, args.epochs, args.batch_size, args.lr, args.l2,
+             args.seed, on_epoch)
+    params = weights_to_params(w)
+    params["k"] = round(k, 5)
+    params["positions"] = int(len(train))
+    if n_valid:
+        before = log_loss(evaluate(x[valid], mob[valid], w0), y[valid], k)
+        after = log_loss(evaluate(x[valid], mob[valid], w), y[valid], k)
+        params["validation_loss"] = round(after, 6)
+        print(f"validation loss {before:.5f} -> {after:.5f}")
+    save_params(args.out, params)
+    print(f"Piece values: " + ", ".join(f"{name} {v:.2f}" for name, v in params["val"].items())
+          + f"; mobility {params['mobility']:.4f}")
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
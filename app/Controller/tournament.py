@@ -0,0 +1,356 @@
+# app/controller/tournament.py
+# Headless AI-vs-AI tournament runner: plays engine configurations against each
+# other across a process pool, reports Elo with error bars and supports SPRT.
+#
+# Usage:
+#   python -m app.Controller.tournament easy med:2 med:3 --games 40 --concurrency 4
+#   python -m app.Controller.tournament med:3 med:2 --sprt --elo0 0 --elo1 50
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import chess
+from app.Model.engine_api import SearchLimits, check_spec, get_engine
+
+# Short, balanced opening lines (UCI). Each is played twice with colors swapped.
+DEFAULT_OPENINGS = [
+    "e2e4 e7e5 g1f3 b8c6",
+    "e2e4 c7c5 g1f3 d7d6",
+    "e2e4 e7e6 d2d4 d7d5",
+    "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6",
+    "d2d4 g8f6 c2c4 g7g6",
+    "d2d4 g8f6 c2c4 e7e6",
+    "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6",
+    "e2e4 e7e5 f1c4 g8f6",
+    "d2d4 d7d5 g1f3 g8f6",
+    "e2e4 d7d5 e4d5 d8d5",
+]
+
+# Share of the per-move limit handed to the engine; the rest covers overhead
+MOVETIME_SAFETY = 0.9
+
+
+def load_openings(path):
+    """
+    Read an opening suite: one opening per line, either a FEN or a list of
+    UCI moves from the start position. Blank lines and '#' comments are skipped.
+    """
+    openings = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                openings.append(line)
+    return openings
+
+
+def opening_board(opening):
+    if "/" in opening:
+        fields = opening.split()
+        # A full FEN has move counters after the four position fields; anything
+        # else is EPD, possibly with opcodes (bm, id, ...)
+        if len(fields) == 6 and fields[4].isdigit() and fields[5].isdigit():
+            return chess.Board(opening)
+        board, _ = chess.Board.from_epd(opening)
+        return board
+    board = chess.Board()
+    for uci in opening.split():
+        board.push_uci(uci)
+    return board
+
+
+def play_game(task):
+    """
+    Play one game in a worker process.
+
+    Args:
+        task: dict with white, black, opening, movetime, max_plies, seed
+              (movetime is passed to the engine as a deadline; overrunning it forfeits)
+
+    Returns:
+        dict describing the result from White's point of view
+    """
+    random.seed(task["seed"])
+    for spec in (task["white"], task["black"]):
+        get_engine(spec).new_game()
+    board = opening_board(task["opening"])
+    specs = {chess.WHITE: task["white"], chess.BLACK: task["black"]}
+    movetime = task["movetime"]
+    reason = None
+    result = None
+    think = {chess.WHITE: 0.0, chess.BLACK: 0.0}
+
+    while not board.is_game_over(claim_draw=True):
+        if board.ply() >= task["max_plies"]:
+            result, reason = "1/2-1/2", "max-plies"
+            break
+        side = board.turn
+        engine = get_engine(specs[side])
+        limits = SearchLimits.movetime(movetime * MOVETIME_SAFETY) if movetime else None
+        start = time.perf_counter()
+        move = engine.search(board.copy(), limits)
+        elapsed = time.perf_counter() - start
+        think[side] += elapsed
+        if movetime and elapsed > movetime:
+            result = "0-1" if side == chess.WHITE else "1-0"
+            reason = "time-forfeit"
+            break
+        if move is None or move not in board.legal_moves:
+            result = "0-1" if side == chess.WHITE else "1-0"
+            reason = "illegal-move"
+            break
+        board.push(move)
+
+    if result is None:
+        outcome = board.outcome(claim_draw=True)
+        result = outcome.result()
+        reason = outcome.termination.name.lower()
+
+    return {
+        "white": task["white"],
+        "black": task["black"],
+        "opening": task["opening"],
+        "result": result,
+        "reason": reason,
+        "plies": board.ply(),
+        "think": {"white": think[chess.WHITE], "black": think[chess.BLACK]},
+    }
+
+
+# --- Statistics ---
+
+def elo_from_score(p):
+    p = min(max(p, 1e-6), 1 - 1e-6)
+    return -400.0 * math.log10(1.0 / p - 1.0)
+
+
+def score_from_elo(elo):
+    return 1.0 / (1.0 + 10 ** (-elo / 400.0))
+
+
+class PairStats:
+    """Win/draw/loss counts for engine `a` against engine `b`."""
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def add(self, game):
+        if game["result"] == "1/2-1/2":
+            self.draws += 1
+            return
+        white_won = game["result"] == "1-0"
+        a_white = game["white"] == self.a
+        if white_won == a_white:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    def score(self):
+        n = self.games
+        return (self.wins + 0.5 * self.draws) / n if n else 0.5
+
+    def variance(self):
+        """Per-game variance of the score (trinomial model)."""
+        n = self.games
+        if not n:
+            return 0.0
+        p = self.score()
+        return (self.wins * (1 - p) ** 2 + self.draws * (0.5 - p) ** 2 + self.losses * p ** 2) / n
+
+    def elo(self, z=1.96):
+        """
+        Returns:
+            (elo, error) where error is the half-width of the `z` confidence interval
+        """
+        n = self.games
+        p = self.score()
+        elo = elo_from_score(p)
+        if n < 2:
+            return elo, float("inf")
+        se = math.sqrt(self.variance() / n)
+        lo = elo_from_score(p - z * se)
+        hi = elo_from_score(p + z * se)
+        return elo, (hi - lo) / 2.0
+
+    def llr(self, elo0, elo1):
+        """
+        Generalised SPRT log-likelihood ratio for H1: elo=elo1 vs H0: elo=elo0
+        (normal approximation to the trinomial, logistic Elo).
+        """
+        n = self.games
+        var = self.variance()
+        if n < 2 or var <= 0:
+            return 0.0
+        s0 = score_from_elo(elo0)
+        s1 = score_from_elo(elo1)
+        return n * (s1 - s0) * (2 * self.score() - s0 - s1) / (2 * var)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# --- Scheduling ---
+
+def build_tasks(engines, openings, games_per_pair, movetime, max_plies, seed):
+    tasks = []
+    pairs = [(engines[i], engines[j]) for i in range(len(engines)) for j in range(i + 1, len(engines))]
+    idx = 0
+    for n in range(0, games_per_pair, 2):
+        opening = openings[(n // 2) % len(openings)]
+        for a, b in pairs:
+            # Same opening with colors reversed keeps the pairing fair
+            for white, black in ((a, b), (b, a)):
+                tasks.append({
+                    "white": white, "black": black, "opening": opening,
+                    "movetime": movetime, "max_plies": max_plies, "seed": seed + idx,
+                })
+                idx += 1
+    return tasks
+
+
+def run_tournament(engines, openings=None, games_per_pair=20, concurrency=None,
+                   movetime=0.0, max_plies=300, seed=0, sprt=None, on_game=None):
+    """
+    Run a round-robin between `engines` (spec strings).
+
+    Args:
+        sprt: optional dict(elo0, elo1, alpha, beta); applies to engines[0] vs engines[1]
+        on_game: optional callback(game, stats) called as each game finishes
+
+    Returns:
+        dict with per-pair stats, the list of games and the SPRT decision (if any)
+    """
+    if len(set(engines)) != len(engines):
+        # Results are keyed by spec, so two identical specs can't be told apart
+        raise ValueError("engine specs must be distinct")
+    openings = openings or DEFAULT_OPENINGS
+    tasks = build_tasks(engines, openings, games_per_pair, movetime, max_plies, seed)
+    stats = {}
+    for i in range(len(engines)):
+        for j in range(i + 1, len(engines)):
+            stats[(engines[i], engines[j])] = PairStats(engines[i], engines[j])
+
+    games = []
+    decision = None
+    bounds = sprt_bounds(sprt["alpha"], sprt["beta"]) if sprt else None
+    sprt_pair = stats.get((engines[0], engines[1])) if sprt else None
+
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        pending = {pool.submit(play_game, t) for t in tasks}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                game = fut.result()
+                games.append(game)
+                key = (game["white"], game["black"])
+                pair = stats.get(key) or stats[(key[1], key[0])]
+                pair.add(game)
+                if on_game:
+                    on_game(game, stats)
+            if sprt_pair is not None and decision is None:
+                llr = sprt_pair.llr(sprt["elo0"], sprt["elo1"])
+                if llr <= bounds[0]:
+                    decision = "H0"
+                elif llr >= bounds[1]:
+                    decision = "H1"
+                if decision:
+                    for fut in pending:
+                        fut.cancel()
+                    # Running games still finish; only the queue is dropped
+                    pending = {f for f in pending if not f.cancelled()}
+
+    result = {"pairs": [], "games": games, "sprt": None}
+    for (a, b), pair in stats.items():
+        elo, err = pair.elo()
+        result["pairs"].append({
+            "a": a, "b": b, "games": pair.games, "wins": pair.wins,
+            "draws": pair.draws, "losses": pair.losses,
+            "score": pair.score(), "elo": elo, "error": err,
+        })
+    if sprt_pair is not None:
+        result["sprt"] = dict(sprt, llr=sprt_pair.llr(sprt["elo0"], sprt["elo1"]),
+                              bounds=list(bounds), decision=decision)
+    return result
+
+
+def print_report(result):
+    print()
+    print(f"{'Engine A':<14} {'Engine B':<14} {'Games':>6} {'W-D-L':>12} {'Score':>7} {'Elo':>16}")
+    print("-" * 74)
+    for p in result["pairs"]:
+        wdl = f"{p['wins']}-{p['draws']}-{p['losses']}"
+        elo = f"{p['elo']:+.1f} +/- {p['error']:.1f}"
+        print(f"{p['a']:<14} {p['b']:<14} {p['games']:>6} {wdl:>12} {p['score']:>7.3f} {elo:>16}")
+    s = result["sprt"]
+    if s:
+        verdict = {"H1": "accept (H1)", "H0": "reject (H0)"}.get(s["decision"], "inconclusive")
+        print(f"\nSPRT elo0={s['elo0']} elo1={s['elo1']} LLR={s['llr']:.2f} "
+              f"bounds=[{s['bounds'][0]:.2f}, {s['bounds'][1]:.2f}] -> {verdict}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless AI-vs-AI tournament")
+    parser.add_argument("engines", nargs="+", help="engine specs: easy, med[:depth], hard[:model]")
+    parser.add_argument("--games", type=int, default=20, help="games per pairing (rounded up to even)")
+    parser.add_argument("--concurrency", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--openings", help="opening suite file (FEN/EPD or UCI move lines)")
+    parser.add_argument("--movetime", type=float, default=0.0, help="per-move limit in seconds; exceeding it forfeits")
+    parser.add_argument("--max-plies", type=int, default=300, help="adjudicate a draw after this many plies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sprt", action="store_true", help="SPRT early stopping for engine 1 vs engine 2")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--json", help="write the full result to this file")
+    args = parser.parse_args(argv)
+
+    if len(args.engines) < 2:
+        parser.error("need at least two engines")
+    for spec in args.engines:
+        try:
+            check_spec(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    if len(set(args.engines)) != len(args.engines):
+        parser.error("engine specs must be distinct")
+
+    openings = load_openings(args.openings) if args.openings else None
+    sprt = None
+    if args.sprt:
+        sprt = {"elo0": args.elo0, "elo1": args.elo1, "alpha": args.alpha, "beta": args.beta}
+
+    def on_game(game, stats):
+        done = sum(p.games for p in stats.values())
+        print(f"[{done}] {game['white']} vs {game['black']}: {game['result']} ({game['reason']}, {game['plies']} plies)")
+        sys.stdout.flush()
+
+    start = time.time()
+    result = run_tournament(args.engines, openings, args.games + args.games % 2, args.concurrency,
+                            args.movetime, args.max_plies, args.seed, sprt, on_game)
+    result["elapsed"] = time.time() - start
+    print_report(result)
+    print(f"\nElapsed: {result['elapsed']:.1f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+# app/controller/uci.py
+# UCI protocol front-end: lets GUIs, match managers and analysis scripts drive
+# the learning book, the medium engine and the hard engine over stdin/stdout.
+#
+# Usage:
+#   python -m app.Controller.uci
+
+import contextlib
+import sys
+import threading
+import time
+
+import chess
+from app.Model import engine_easy, engine_med, engine_hard, memstats, tablebase
+from app.Model.analysis_cache import AnalysisCache
+from app.Model.engine_api import SearchLimits, TimeManager
+from app.Model.learning import LearningMemory
+
+ENGINE_NAME = "AI-Chess-Game"
+ENGINE_AUTHOR = "AI-Chess-Game team"
+
+# Rough in-memory cost of one transposition-table entry (hash key + tuple)
+TT_ENTRY_BYTES = 150
+MAX_DEPTH = 64
+# Seconds per move for a bare "go" (no clock, depth, nodes or movetime)
+DEFAULT_MOVETIME = 2.0
+
+
+class UciEngine:
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.board = chess.Board()
+        self.options = {
+            "Hash": 64,
+            "Threads": 1,
+            "Level": 2,
+            "OwnBook": True,
+            "Ponder": False,
+            "MultiPV": 1,
+            "SyzygyPath": "",
+            "SyzygyProbeLimit": 7,
+            "AnalysisCache": "",
+        }
+        self.memory = None
+        self.hard = None
+        self._out_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._ponderhit = threading.Event()
+        self._limits = None
+        self._ponder_budget = None
+        self.time_manager = TimeManager()
+        engine_med.set_table_limit(self._hash_entries())
+
+    # --- I/O ---
+    def send(self, line):
+        with self._out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def loop(self, stream=None):
+        stream = stream or sys.stdin
+        for line in stream:
+            if not self.handle(line.strip()):
+                break
+        self.stop_search()
+
+    def handle(self, line):
+        """Process one command line. Returns False on 'quit'."""
+        if not line:
+            return True
+        cmd, _, rest = line.partition(" ")
+        if cmd == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 64 min 1 max 4096")
+            self.send("option name Threads type spin default 1 min 1 max 1")
+            self.send("option name Level type spin default 2 min 1 max 3")
+            self.send("option name OwnBook type check default true")
+            self.send("option name Ponder type check default false")
+            self.send("option name MultiPV type spin default 1 min 1 max 16")
+            self.send("option name SyzygyPath type string default <empty>")
+            self.send("option name SyzygyProbeLimit type spin default 7 min 0 max 7")
+            self.send("option name AnalysisCache type string default <empty>")
+            self.send("uciok")
+        elif cmd == "isready":
+            self.send("readyok")
+        elif cmd == "setoption":
+            self.set_option(rest)
+        elif cmd == "ucinewgame":
+            self.stop_search()
+            engine_med.clear_transposition_table()
+        elif cmd == "position":
+            self.stop_search()
+            self.set_position(rest)
+        elif cmd == "go":
+            self.stop_search()
+            self.go(rest)
+        elif cmd == "stop":
+            self.stop_search()
+        elif cmd == "ponderhit":
+            self.ponderhit()
+        elif cmd == "quit":
+            return False
+        elif cmd == "d":
+            self.send(str(self.board))
+            self.send(f"Fen: {self.board.fen()}")
+        elif cmd == "memstats":
+            self.memstats(rest.strip())
+        return True
+
+    # --- Commands ---
+    def memstats(self, path):
+        # Non-standard: memory report as info strings, optionally dumped to a JSON file
+        for line in memstats.format_report():
+            self.send(f"info string {line}")
+        if path:
+            try:
+                memstats.dump(path)
+                self.send(f"info string memstats written to {path}")
+            except OSError as e:
+                self.send(f"info string memstats: {e}")
+
+    def set_option(self, args):
+        # setoption name <id> [value <x>]
+        tokens = args.split()
+        if "name" not in tokens:
+            return
+        i = tokens.index("name")
+        if "value" in tokens:
+            j = tokens.index("value")
+            name = " ".join(tokens[i + 1:j])
+            value = " ".join(tokens[j + 1:])
+        else:
+            name = " ".join(tokens[i + 1:])
+            value = None
+        if name not in self.options:
+            self.send(f"info string unknown option {name}")
+            return
+        current = self.options[name]
+        if isinstance(current, bool):
+            self.options[name] = (value or "").lower() == "true"
+        elif isinstance(current, str):
+            self.options[name] = "" if value in (None, "<empty>") else value
+        else:
+            try:
+                self.options[name] = int(value)
+            except (TypeError, ValueError):
+                self.send(f"info string bad value for {name}")
+                return
+        if name == "Hash":
+            engine_med.set_table_limit(self._hash_entries())
+        elif name in ("SyzygyPath", "SyzygyProbeLimit"):
+            limit = self.options["SyzygyProbeLimit"]
+            tb = tablebase.configure(self.options["SyzygyPath"], limit) if limit > 0 else None
+            engine_med.set_tablebase(tb)
+            if tb is not None:
+                self.send(f"info string found {tb.files} tablebases, probing up to {tb.max_pieces} pieces")
+            elif self.options["SyzygyPath"] and limit > 0:
+                self.send(f"info string no Syzygy tables in {self.options['SyzygyPath']}")
+        elif name == "AnalysisCache":
+            path = self.options["AnalysisCache"]
+            try:
+                engine_med.set_analysis_cache(AnalysisCache(path) if path else None)
+            except OSError as e:
+                engine_med.set_analysis_cache(None)
+                self.send(f"info string cannot open analysis cache: {e}")
+        elif name == "Threads" and self.options["Threads"] != 1:
+            # engine_med is a single-threaded search; accept but clamp
+            self.options["Threads"] = 1
+            self.send("info string Threads clamped to 1")
+
+    def set_position(self, args):
+        tokens = args.split()
+        if not tokens:
+            return
+        if tokens[0] == "startpos":
+            board = chess.Board()
+            tokens = tokens[1:]
+        elif tokens[0] == "fen":
+            fen_parts = []
+            tokens = tokens[1:]
+            while tokens and tokens[0] != "moves":
+                fen_parts.append(tokens.pop(0))
+            try:
+                board = chess.Board(" ".join(fen_parts))
+            except ValueError as e:
+                self.send(f"info string invalid fen: {e}")
+                return
+        else:
+            return
+        if tokens and tokens[0] == "moves":
+            for uci in tokens[1:]:
+                try:
+                    board.push_uci(uci)
+                except ValueError as e:
+                    # Keep the last valid position rather than half of this one
+                    self.send(f"info string invalid move {uci}: {e}")
+                    return
+        self.board = board
+
+    def go(self, args):
+        tokens = args.split()
+        params = {}
+        flags = set()
+        i = 0
+        while i < len(tokens):
+            key = tokens[i]
+            if key in ("infinite", "ponder"):
+                flags.add(key)
+                i += 1
+            elif key == "searchmoves":
+                # searchmoves is not supported; skip the move list
+                i += 1
+                while i < len(tokens) and len(tokens[i]) >= 4 and tokens[i][0] in "abcdefgh":
+                    i += 1
+            elif i + 1 < len(tokens):
+                try:
+                    params[key] = int(tokens[i + 1])
+                except ValueError:
+                    pass
+                i += 2
+            else:
+                i += 1
+
+        self._stop.clear()
+        self._ponderhit.clear()
+        board = self.board.copy()
+        limits = self._make_limits(board, params, infinite="infinite" in flags)
+        if "ponder" in flags:
+            # Search without a clock until ponderhit starts the real budget
+            self._ponder_budget = (limits.soft_deadline, limits.hard_deadline, time.perf_counter())
+            limits.soft_deadline = limits.hard_deadline = None
+        self._limits = limits
+        wait_for_stop = "infinite" in flags or "ponder" in flags
+        self._thread = threading.Thread(target=self._search, args=(board, limits, wait_for_stop),
+                                        name="uci-search", daemon=True)
+        self._thread.start()
+
+    def ponderhit(self):
+        limits = self._limits
+        if limits is not None and self._ponder_budget is not None:
+            soft, hard, issued = self._ponder_budget
+            now = time.perf_counter()
+            # The budget starts counting now, not when "go ponder" arrived
+            if soft is not None:
+                limits.soft_deadline = soft - issued + now
+            if hard is not None:
+                limits.hard_deadline = hard - issued + now
+        self._ponder_budget = None
+        self._ponderhit.set()
+
+    def stop_search(self):
+        if self._thread is not None:
+            self._stop.set()
+            if self._limits is not None:
+                self._limits.token.cancel()
+            self._thread.join()
+            self._thread = None
+            self._limits = None
+
+    # --- Search ---
+    def _hash_entries(self):
+        return max(1, self.options["Hash"] * 1024 * 1024 // TT_ENTRY_BYTES)
+
+    def _make_limits(self, board, params, infinite=False):
+        """Turn go parameters (milliseconds) into SearchLimits."""
+        depth = params.get("depth", MAX_DEPTH)
+        nodes = params.get("nodes")
+        if "movetime" in params:
+            return SearchLimits.movetime(params["movetime"] / 1000.0, depth=depth, nodes=nodes)
+        if not infinite and not any(k in params for k in ("depth", "nodes", "wtime", "btime")):
+            # A bare "go" would otherwise search until "stop" but never announce it
+            return SearchLimits.movetime(DEFAULT_MOVETIME, depth=depth)
+        seconds = lambda key: params[key] / 1000.0 if key in params else None
+        return self.time_manager.limits_for(
+            board, wtime=seconds("wtime"), btime=seconds("btime"),
+            winc=seconds("winc") or 0.0, binc=seconds("binc") or 0.0,
+            moves_to_go=params.get("movestogo"), depth=depth, nodes=nodes)
+
+    def _search(self, board, limits, wait_for_stop):
+        move = None
+        try:
+            move = self._book_move(board)
+            if move is None and self.options["Level"] == 1:
+                move = engine_easy.pick(board)
+            if move is None and self.options["Level"] == 3:
+                move = self._hard_engine().pick(board, limits=limits)
+            if move is None:
+                move = self._iterative_deepening(board, limits)
+        except Exception as e:
+            self.send(f"info string search error: {e}")
+        if move is None:
+            moves = list(board.legal_moves)
+            move = moves[0] if moves else None
+        if wait_for_stop:
+            # UCI: in infinite/ponder mode bestmove is only sent after stop/ponderhit
+            while not self._stop.is_set() and not self._ponderhit.is_set():
+                self._stop.wait(0.01)
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def _book_move(self, board):
+        if not self.options["OwnBook"]:
+            return None
+        if self.memory is None:
+            self.memory = LearningMemory()
+            memstats.watch(self.memory)
+        move = self.memory.get_best_move(board)
+        if move is not None:
+            self.send(f"info string book move {move.uci()}")
+        return move
+
+    def _hard_engine(self):
+        if self.hard is None:
+            self.hard = engine_hard.HardEngine()
+            memstats.watch(self.hard)
+        return self.hard
+
+    def _iterative_deepening(self, board, limits):
+        if self.options["MultiPV"] > 1:
+            return self._multipv(board, limits)
+
+        def report(depth, move, score, nodes):
+            elapsed = max(limits.elapsed(), 1e-6)
+            pv = " ".join(m.uci() for m in engine_med.principal_variation(board, move, depth))
+            self.send(f"info depth {depth} score {uci_score(score)} nodes {nodes} "
+                      f"nps {int(nodes / elapsed)} time {int(elapsed * 1000)} pv {pv}")
+
+        move, _, _ = engine_med.iterative_deepening(board, limits, limits.depth or MAX_DEPTH, report)
+        return move
+
+    def _multipv(self, board, limits):
+        def report(depth, lines, nodes):
+            elapsed = max(limits.elapsed(), 1e-6)
+            for i, line in enumerate(lines, 1):
+                pv = " ".join(m.uci() for m in line.pv)
+                self.send(f"info depth {depth} multipv {i} score {uci_score(line.score)} "
+                          f"nodes {nodes} nps {int(nodes / elapsed)} time {int(elapsed * 1000)} pv {pv}")
+
+        lines = engine_med.analyse(board, limits.depth or MAX_DEPTH, self.options["MultiPV"], limits, report)
+        return lines[0].move if lines else None
+
+
+def uci_score(score):
+    # Engine score (pawns, side to move) as "cp <centipawns>" or "mate <moves>"
+    mate = engine_med.mate_in(score)
+    if mate is not None:
+        return f"mate {mate}"
+    return f"cp {int(round(score * 100))}"
+
+
+def main(stream=None):
+    # Only the protocol goes to stdout; stray prints from the models (learning
+    # memory, model loading, search fallbacks) would read as malformed output
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        UciEngine(out).loop(stream)
+
+
+if __name__ == "__main__":
+    main()
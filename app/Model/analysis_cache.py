@@ -0,0 +1,186 @@
+# app/model/analysis_cache.py
+# Persistent analysis cache: a memory-mapped, set-associative hash table of
+# search results (depth, bound, score, best move) keyed by the polyglot
+# Zobrist hash, so searches warm-start across runs. Separate from
+# LearningMemory, which only counts wins.
+#
+# File layout: a 20-byte header followed by `buckets * ways` fixed 20-byte
+# records. The header carries a tag identifying the evaluation the scores
+# were computed with; set_tag() with a different tag empties the table.
+# A record stores key ^ data, so a record torn by two processes
+# writing at once fails verification and reads as a miss. Each record also has
+# a use stamp; a full bucket evicts its least recently used entry.
+
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from typing import Optional
+
+import chess
+
+DEFAULT_PATH = "data/analysis_cache.bin"
+DEFAULT_ENTRIES = 1 << 18  # ~5 MB on disk
+DEFAULT_WAYS = 4
+
+# Score bounds, as in any alpha-beta transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+_MAGIC = b"CHAC"
+# 2: mate scores are distance-aware and stored relative to the node
+# 3: evaluation tag in the header
+_VERSION = 3
+_HEADER = struct.Struct("<4sHHIII")  # magic, version, ways, buckets, tag, stamp
+_RECORD = struct.Struct("<QfHBBI")  # key ^ data, score, move, depth, bound, stamp
+_DATA = struct.Struct("<fHBB")      # the 8 bytes covered by the key check
+
+CacheEntry = namedtuple("CacheEntry", "depth bound score move")
+
+
+def encode_move(move: Optional[chess.Move]) -> int:
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code: int) -> Optional[chess.Move]:
+    if not code:
+        return None
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+
+class AnalysisCache:
+    """
+    Args:
+        path: cache file (created, or recreated if its geometry differs)
+        entries: total number of records
+        ways: records per bucket
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, entries: int = DEFAULT_ENTRIES, ways: int = DEFAULT_WAYS):
+        self.path = path
+        self.ways = ways
+        self.buckets = max(1, entries // ways)
+        self.size = _HEADER.size + self.buckets * ways * _RECORD.size
+        self._lock = threading.Lock()
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.tag = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        header = self._file.read(_HEADER.size)
+        fresh = len(header) < _HEADER.size or os.path.getsize(path) != self.size
+        if not fresh:
+            magic, version, ways_, buckets, self.tag, self._stamp = _HEADER.unpack(header)
+            fresh = (magic, version, ways_, buckets) != (_MAGIC, _VERSION, ways, self.buckets)
+        if fresh:
+            self._file.truncate(0)
+            self._file.truncate(self.size)
+            self._stamp = 0
+        self._mm = mmap.mmap(self._file.fileno(), self.size)
+        if fresh:
+            self._write_header()
+
+    def _write_header(self):
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, self.ways, self.buckets, self.tag, self._stamp)
+
+    def set_tag(self, tag: int):
+        """
+        Declare which evaluation the scores belong to (e.g. a hash of the eval
+        parameters); if it differs from the file's tag, every record is dropped.
+        """
+        tag &= 0xFFFFFFFF
+        with self._lock:
+            if tag == self.tag:
+                return
+            self._mm[_HEADER.size:] = bytes(self.size - _HEADER.size)
+            self.tag = tag
+            self._stamp = 0
+            self._write_header()
+
+    def _slots(self, key):
+        base = _HEADER.size + (key % self.buckets) * self.ways * _RECORD.size
+        return range(base, base + self.ways * _RECORD.size, _RECORD.size)
+
+    def _next_stamp(self):
+        self._stamp = (self._stamp + 1) & 0xFFFFFFFF
+        return self._stamp
+
+    def probe(self, key: int) -> Optional[CacheEntry]:
+        """Look up a position hash; refreshes the entry's LRU stamp on a hit."""
+        with self._lock:
+            self.probes += 1
+            for offset in self._slots(key):
+                xkey, score, move, depth, bound, _ = _RECORD.unpack_from(self._mm, offset)
+                if not xkey:
+                    continue
+                data = int.from_bytes(_DATA.pack(score, move, depth, bound), "little")
+                if xkey ^ data != key:
+                    continue
+                self.hits += 1
+                struct.pack_into("<I", self._mm, offset + _RECORD.size - 4, self._next_stamp())
+                return CacheEntry(depth, bound, score, decode_move(move))
+            return None
+
+    def store(self, key: int, depth: int, bound: int, score: float, move: Optional[chess.Move]):
+        """
+        Save a search result. An existing entry for the same position is only
+        replaced by an equal or deeper search; otherwise the bucket's empty or
+        least recently used record is taken.
+        """
+        depth = max(0, min(depth, 255))
+        code = encode_move(move)
+        data = int.from_bytes(_DATA.pack(score, code, depth, bound), "little")
+        with self._lock:
+            empty = lru = lru_stamp = None
+            for offset in self._slots(key):
+                xkey, s, m, d, b, stamp = _RECORD.unpack_from(self._mm, offset)
+                if not xkey:
+                    if empty is None:
+                        empty = offset
+                    continue
+                if xkey ^ int.from_bytes(_DATA.pack(s, m, d, b), "little") == key:
+                    if d > depth:
+                        return
+                    target = offset
+                    break
+                if lru_stamp is None or stamp < lru_stamp:
+                    lru, lru_stamp = offset, stamp
+            else:
+                if empty is not None:
+                    target = empty
+                else:
+                    target = lru
+                    self.evictions += 1
+            _RECORD.pack_into(self._mm, target, key ^ data, score, code, depth, bound, self._next_stamp())
+            self.stores += 1
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "entries": self.buckets * self.ways,
+            "tag": self.tag,
+            "bytes": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def flush(self):
+        with self._lock:
+            self._write_header()
+            self._mm.flush()
+
+    def close(self):
+        if self._mm.closed:
+            return
+        self.flush()
+        self._mm.close()
+        self._file.close()
@@ -0,0 +1,266 @@
+# app/model/engine_api.py
+# Common engine interface: search limits (depth, nodes, soft/hard deadlines),
+# cooperative cancellation and a simple time manager.
+#
+# Engines poll SearchLimits.expired() while searching (engine_med every 64
+# nodes, HardEngine once per child), so a cancelled search gives its CPU
+# back within milliseconds.
+#
+# Searches report progress by putting plain dicts on SearchLimits.info (any
+# object with put(), e.g. queue.SimpleQueue) so a UI thread can poll it:
+#   {"type": "info", "depth", "score", "pv", "nodes", "nps", "time"}
+# Only the fields known at that point are present; node-only updates are
+# throttled to one per PROGRESS_INTERVAL seconds.
+
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Optional
+
+import chess
+
+from . import engine_easy, engine_med, engine_hard
+
+# Minimum seconds between node-count progress events
+PROGRESS_INTERVAL = 0.25
+
+
+class CancelToken:
+    """Thread-safe flag shared between whoever starts a search and the search itself."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, waking early on cancel. Returns cancelled."""
+        return self._event.wait(timeout)
+
+
+class SearchLimits:
+    """
+    Limits for one search. Deadlines are absolute time.perf_counter() values.
+
+    Args:
+        depth: maximum depth (None = engine default)
+        nodes: node budget (None = unlimited)
+        soft_deadline: don't start another iteration after this point
+        hard_deadline: abort the running iteration at this point
+        token: CancelToken; cancelling it aborts the search
+        info: thread-safe queue receiving progress events (None = no reporting)
+    """
+
+    def __init__(self, depth: Optional[int] = None, nodes: Optional[int] = None,
+                 soft_deadline: Optional[float] = None, hard_deadline: Optional[float] = None,
+                 token: Optional[CancelToken] = None, info=None):
+        self.depth = depth
+        self.nodes = nodes
+        self.soft_deadline = soft_deadline
+        self.hard_deadline = hard_deadline
+        self.token = token or CancelToken()
+        self.info = info
+        self.start = time.perf_counter()
+        self._next_progress = 0.0
+
+    @classmethod
+    def movetime(cls, seconds: float, **kwargs) -> "SearchLimits":
+        """Fixed time per move: stop deepening at half the budget, abort at the full budget."""
+        now = time.perf_counter()
+        return cls(soft_deadline=now + seconds * 0.5, hard_deadline=now + seconds, **kwargs)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def expired(self, nodes: int = 0) -> bool:
+        """True when the search must stop immediately (cancelled, hard deadline, node budget)."""
+        if self.token.cancelled:
+            return True
+        if self.hard_deadline is not None and time.perf_counter() >= self.hard_deadline:
+            return True
+        if self.nodes is not None and nodes >= self.nodes:
+            return True
+        return False
+
+    def publish(self, **fields):
+        """Put a progress event on the info queue (no-op without one); adds time and nps."""
+        if self.info is None:
+            return
+        elapsed = self.elapsed()
+        event = {"type": "info", "time": elapsed}
+        event.update(fields)
+        if "nodes" in fields:
+            event["nps"] = int(fields["nodes"] / max(elapsed, 1e-6))
+        self.info.put(event)
+
+    def progress(self, nodes: int):
+        """Throttled node-count update, safe to call from the search's inner loop."""
+        if self.info is None:
+            return
+        now = time.perf_counter()
+        if now < self._next_progress:
+            return
+        self._next_progress = now + PROGRESS_INTERVAL
+        self.publish(nodes=nodes)
+
+    def soft_expired(self) -> bool:
+        """True when there is no point starting another iteration."""
+        if self.soft_deadline is not None and time.perf_counter() >= self.soft_deadline:
+            return True
+        return self.token.cancelled
+
+
+class TimeManager:
+    """
+    Splits the remaining clock into a per-move budget.
+
+    Args:
+        overhead: seconds reserved per move for communication/GUI latency
+        default_moves_to_go: assumed moves left when the clock has no move count
+    """
+
+    def __init__(self, overhead: float = 0.05, default_moves_to_go: int = 30):
+        self.overhead = overhead
+        self.default_moves_to_go = default_moves_to_go
+
+    def allocate(self, remaining: float, increment: float = 0.0, moves_to_go: Optional[int] = None):
+        """
+        Returns:
+            (soft, hard) budgets in seconds
+        """
+        mtg = moves_to_go if moves_to_go else self.default_moves_to_go
+        usable = max(remaining - self.overhead, 0.01)
+        soft = usable / max(mtg, 1) + increment * 0.75
+        # Hard limit lets a promising iteration finish but never risks the clock
+        hard = min(soft * 3.0, usable * 0.3 if mtg > 1 else usable * 0.9)
+        soft = min(soft, hard)
+        return max(soft, 0.005), max(hard, 0.01)
+
+    def limits_for(self, board: chess.Board, wtime: Optional[float] = None, btime: Optional[float] = None,
+                   winc: float = 0.0, binc: float = 0.0, moves_to_go: Optional[int] = None,
+                   **kwargs) -> SearchLimits:
+        """Build SearchLimits for the side to move from clock times in seconds."""
+        remaining = wtime if board.turn == chess.WHITE else btime
+        if remaining is None:
+            return SearchLimits(**kwargs)
+        inc = winc if board.turn == chess.WHITE else binc
+        soft, hard = self.allocate(remaining, inc, moves_to_go)
+        now = time.perf_counter()
+        return SearchLimits(soft_deadline=now + soft, hard_deadline=now + hard, **kwargs)
+
+
+class Engine(ABC):
+    """
+    Common interface: search(board, limits) -> chess.Move or None, and
+    analyse(board, multipv, limits) -> list of engine_med.PVLine, best first.
+    Subclasses must implement search().
+    """
+
+    name = "engine"
+
+    def new_game(self):
+        """Forget per-game state such as the transposition table."""
+
+    @abstractmethod
+    def search(self, board: chess.Board, limits: Optional[SearchLimits] = None) -> Optional[chess.Move]:
+        """Best move for `board` within `limits`, or None if there are no legal moves."""
+
+    def analyse(self, board: chess.Board, multipv: int = 3, limits: Optional[SearchLimits] = None):
+        # Engines without multi-PV support report their single move, unscored
+        move = self.search(board, limits)
+        return [engine_med.PVLine(move, None, [move], 0)] if move else []
+
+
+class EasyEngine(Engine):
+    name = "easy"
+
+    def search(self, board, limits=None):
+        return engine_easy.pick(board)
+
+
+class MediumEngine(Engine):
+    # Each instance owns its search state, so instances can search in parallel threads
+    def __init__(self, depth: int = 3):
+        self.depth = depth
+        self.name = f"med:{depth}"
+        self.context = engine_med.SearchContext()
+
+    def new_game(self):
+        self.context.clear()
+
+    def search(self, board, limits=None):
+        return self.context.best_move(board, depth=self.depth, limits=limits)
+
+    def analyse(self, board, multipv=3, limits=None):
+        return self.context.analyse(board, depth=self.depth, multipv=multipv, limits=limits)
+
+
+class HardEngine(Engine):
+    # batching: share forward passes between concurrent searches in this process
+    # (see inference.py). Only worth it when several games run in one process;
+    # the tournament and server run one game per worker, where it would only
+    # add the batching delay, so it is off by default.
+    def __init__(self, model_path: Optional[str] = None, batching: bool = False):
+        if model_path:
+            self.engine = engine_hard.HardEngine(model_path, batching=batching)
+        else:
+            self.engine = engine_hard.HardEngine(batching=batching)
+        self.name = f"hard:{model_path}" if model_path else "hard"
+
+    def search(self, board, limits=None):
+        return self.engine.pick(board, limits=limits)
+
+    def analyse(self, board, multipv=3, limits=None):
+        return self.engine.analyse(board, multipv, limits)
+
+
+# Engines built by get_engine, one per spec per process
+_engine_cache = {}
+
+
+def check_spec(spec) -> None:
+    """Raise ValueError unless `spec` is a valid engine spec (without building the engine)."""
+    if not isinstance(spec, str):
+        raise ValueError(f"engine spec must be a string, not {type(spec).__name__}")
+    name, _, arg = spec.partition(":")
+    name = name.lower()
+    if name in ("med", "medium"):
+        if arg and not (arg.isdigit() and 1 <= int(arg) <= engine_med.MAX_PLY):
+            raise ValueError(f"bad depth in engine spec: {spec}")
+    elif name == "hard":
+        if arg and not os.path.exists(arg):
+            raise ValueError(f"model file not found: {arg}")
+    elif name != "easy":
+        raise ValueError(f"unknown engine spec: {spec}")
+
+
+def make_engine(spec: str) -> Engine:
+    """
+    Build an engine from a spec string.
+
+    Args:
+        spec: "easy", "med[:depth]" or "hard[:model_path]"
+    """
+    name, _, arg = spec.partition(":")
+    name = name.lower()
+    if name == "easy":
+        return EasyEngine()
+    if name in ("med", "medium"):
+        return MediumEngine(int(arg) if arg else 3)
+    if name == "hard":
+        return HardEngine(arg or None)
+    raise ValueError(f"unknown engine spec: {spec}")
+
+
+def get_engine(spec: str) -> Engine:
+    """Like make_engine, but reuses one instance per spec in this process (e.g. pool workers)."""
+    engine = _engine_cache.get(spec)
+    if engine is None:
+        engine = _engine_cache[spec] = make_engine(spec)
+    return engine
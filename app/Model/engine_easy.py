@@ -1,10 +1,12 @@
 # app/model/engine_easy.py
 # Easy engine: random move with preference for captures (Level 1)
-# Strategy: 70% random, 30% best capture by material value
+# Strategy: 70% random, 30% best capture by static exchange evaluation
 
 import random
 import chess
 
+from .see import see
+
 # Piece values for material evaluation
 vals = {
     chess.PAWN: 1,
@@ -27,24 +29,24 @@ def pick(board):
         
     Strategy:
         - 70% of the time: choose random legal move
-        - 30% of the time: choose best capture (highest material gain)
-        - If no captures available, choose random move
+        - 30% of the time: choose best capture (highest SEE gain)
+        - If no capture wins or trades evenly, choose random move
     """
     moves = list(board.legal_moves)
     if not moves:
         return None
 
-    # Collect capture moves with material value
+    # Collect capture moves that don't lose material after the exchange;
+    # victim value breaks ties between equal exchanges
     captures = []
     for move in moves:
         if board.is_capture(move):
-            target = board.piece_at(move.to_square)
-            if target is None:
+            score = see(board, move)
+            if score >= 0:
+                target = board.piece_at(move.to_square)
                 # En passant capture, value as pawn
-                score = vals[chess.PAWN]
-            else:
-                score = vals.get(target.piece_type, 0)
-            captures.append((score, move))
+                victim = vals.get(target.piece_type, 0) if target else vals[chess.PAWN]
+                captures.append(((score, victim), move))
 
     # 30% chance to choose best capture if available
     if captures and random.random() < 0.3:
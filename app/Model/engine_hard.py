@@ -3,6 +3,7 @@
 # otherwise falls back to medium engine.
 
 import os
+import time
 import chess
 import numpy as np
 
@@ -13,7 +14,7 @@ try:
 except Exception:
     TF_OK = False
 
-from . import engine_med
+from . import engine_med, inference, profiler
 
 # small board -> tensor converter (same convention used for training later)
 _piece_map = {
@@ -21,6 +22,11 @@ _piece_map = {
     'p':6,'n':7,'b':8,'r':9,'q':10,'k':11
 }
 
+# Longest wait for a batched forward pass before evaluating directly instead
+BATCH_TIMEOUT = 0.5
+# How often a wait for a batch checks the search limits (seconds)
+BATCH_POLL = 0.01
+
 def board_to_tensor(b: chess.Board):
     # shape (8,8,12)
     arr = np.zeros((8,8,12), dtype=np.float32)
@@ -36,8 +42,15 @@ def board_to_tensor(b: chess.Board):
     return out
 
 class HardEngine:
-    def __init__(self, model_path="models/policy_eval.h5"):
+    def __init__(self, model_path="models/policy_eval.h5", batching=False):
+        """
+        Args:
+            model_path: Keras model file
+            batching: route evaluations through the process-wide BatchingEvaluator
+                      so concurrent picks from many games share forward passes
+        """
         self.model = None
+        self.evaluator = None
         if TF_OK and os.path.exists(model_path):
             try:
                 self.model = tf.keras.models.load_model(model_path)
@@ -50,34 +63,99 @@ class HardEngine:
                 print("HardEngine: tensorflow not available, falling back")
             else:
                 print("HardEngine: no model file found, falling back")
+        if batching and self.model is not None:
+            self.evaluator = inference.shared_evaluator(self.model)
 
-    def pick(self, board: chess.Board):
-        # If model available: evaluate each child board and pick best for current side
-        if self.model is not None:
-            best = None
-            best_v = -1e9
-            is_white = board.turn == chess.WHITE
-            for m in board.legal_moves:
-                board.push(m)
-                x = board_to_tensor(board)
+    def pick(self, board: chess.Board, limits=None):
+        """
+        Pick a move; `limits` (engine_api.SearchLimits) is checked while the
+        children are prepared and passed on to the medium-engine fallback.
+        """
+        with profiler.span("hard.pick", model=self.model is not None):
+            return self._pick(board, limits)
+
+    def score_moves(self, board: chess.Board, limits=None):
+        """
+        Evaluate every legal move with one model invocation.
+
+        Returns:
+            list of (move, value) from the side to move's point of view, in
+            legal-move order; None if there is no model, the model failed or
+            `limits` expired before evaluation.
+        """
+        if self.model is None:
+            return None
+        moves = list(board.legal_moves)
+        if not moves:
+            return []
+        tensors = []
+        for m in moves:
+            if limits is not None and limits.expired():
+                return None
+            board.push(m)
+            tensors.append(board_to_tensor(board))
+            board.pop()
+        try:
+            with profiler.span("hard.predict", batch=len(moves)):
+                pred = self._predict(np.concatenate(tensors, axis=0), limits)
+        except Exception:
+            return None
+        # assume model outputs single scalar eval (higher = better for White)
+        # if model outputs vector, take the mean
+        pred = np.asarray(pred).reshape(len(moves), -1)
+        values = pred[:, 0] if pred.shape[-1] == 1 else pred.mean(axis=1)
+        # if playing black, invert value
+        if board.turn != chess.WHITE:
+            values = -values
+        return [(m, float(v)) for m, v in zip(moves, values)]
+
+    def analyse(self, board: chess.Board, multipv: int = 3, limits=None):
+        """
+        Top `multipv` moves as engine_med.PVLine (depth 1, one-move PV) from
+        the same single batched evaluation pick() uses; without a model the
+        medium engine's multi-PV search answers instead.
+        """
+        scored = self.score_moves(board, limits)
+        if scored:
+            scored.sort(key=lambda mv: mv[1], reverse=True)
+            return [engine_med.PVLine(m, v, [m], 1) for m, v in scored[:multipv]]
+        return engine_med.analyse(board, depth=3, multipv=multipv, limits=limits)
+
+    def _predict(self, x, limits=None):
+        if self.evaluator is not None:
+            future = self.evaluator.submit(x)
+            give_up = time.perf_counter() + BATCH_TIMEOUT
+            while True:
                 try:
-                    pred = self.model.predict(x, verbose=0)
-                except Exception:
-                    pred = None
-                board.pop()
-                if pred is None:
-                    return engine_med.best_move(board, depth=3)
-                # assume model outputs single scalar eval (higher = better for White)
-                # if model outputs vector, take first scalar
-                v = float(pred[0][0]) if pred.shape[-1] == 1 else float(pred[0].mean())
-                # if playing black, invert value
-                if not is_white:
-                    v = -v
-                if v > best_v:
-                    best_v = v
-                    best = m
-            if best is None:
-                return engine_med.best_move(board, depth=3)
-            return best
+                    return future.result(timeout=BATCH_POLL)
+                except TimeoutError:
+                    pass
+                # A stop or the move deadline ends the wait; the batch result is dropped
+                if limits is not None and limits.expired():
+                    raise TimeoutError("search stopped while waiting for a batch")
+                if time.perf_counter() >= give_up:
+                    # Stalled batch: don't let it hold this move hostage
+                    profiler.count("hard.batch_timeouts")
+                    break
+        return self.model.predict(x, verbose=0)
+
+    def _pick(self, board: chess.Board, limits):
+        # Tablebase positions are played perfectly regardless of the model
+        hit = engine_med.tablebase_move(board)
+        if hit is not None:
+            return hit[0]
+        # If model available: evaluate all children in one batch and pick best for current side
+        if self.model is not None:
+            scored = self.score_moves(board, limits)
+            if scored:
+                # max() keeps the first of equal values, like the old strict '>' scan
+                move, value = max(scored, key=lambda mv: mv[1])
+                if limits is not None:
+                    limits.publish(depth=1, score=value, pv=[move.uci()], nodes=len(scored))
+                return move
+            if limits is not None and limits.expired():
+                # Out of time or cancelled: any legal move
+                return next(iter(board.legal_moves), None)
+            return engine_med.best_move(board, depth=3, limits=limits)
         # fallback
-        return engine_med.best_move(board, depth=3)
+        return engine_med.best_move(board, depth=3, limits=limits)
@@ -1,11 +1,26 @@
 # app/model/engine_med.py
 # Medium engine: Minimax with alpha-beta pruning (Level 2)
 # Features: transposition table, move ordering, iterative deepening option
+#
+# Search state (transposition table, learned-move cache, statistics, abort
+# hook) lives in a SearchContext. The module-level functions use one shared
+# default context; code that searches from several threads at once gives each
+# search its own SearchContext.
 
 import chess
+import chess.polyglot
+import json
 import math
 import random
-from typing import Optional, Dict, Tuple
+import threading
+import weakref
+import zlib
+from collections import namedtuple
+from typing import Callable, Optional, Dict, List, Tuple
+
+from . import mate_search, profiler, see, tablebase
+from .analysis_cache import EXACT, LOWER, UPPER
+from .zobrist import HashStack
 
 # Piece values for material evaluation
 VAL = {
@@ -17,161 +32,832 @@ VAL = {
     chess.KING: 0
 }
 
-# Transposition table: maps FEN -> (depth, score)
-_transposition_table: Dict[str, Tuple[int, float]] = {}
-_table_hits = 0
+# Tunable evaluation parameters (fitted by app/Controller/texel.py). The
+# defaults are the hand-set values; load_eval_params() replaces them.
+EVAL_PARAMS_FILE = "data/eval_params.json"
+MOBILITY_WEIGHT = 0.01
+# Piece type -> 64 bonuses in pawns, indexed by square from White's side
+# (Black pieces use the mirrored square); None = no piece-square terms
+PST: Optional[Dict[int, List[float]]] = None
 
-def clear_transposition_table():
-    """Clear the transposition table (useful for new games)"""
-    global _transposition_table, _table_hits
-    _transposition_table.clear()
-    _table_hits = 0
+# Transposition table cap for new contexts (entries), None = unbounded
+_table_limit: Optional[int] = None
+
+# Mate scores carry the distance: mate in p plies scores MATE_SCORE - p, so
+# faster wins (and slower losses) score higher. Anything beyond MATE_BOUND is
+# a mate score; tablebase wins (TB_WIN) stay below it.
+MATE_SCORE = 1000.0
+MAX_PLY = 64
+MATE_BOUND = MATE_SCORE - MAX_PLY
+
+# Forcing-looking positions first get a checks-only mate search of up to
+# MATE_PROBE_MOVES moves within MATE_PROBE_NODES nodes (see mate_search.py)
+MATE_PROBE_MOVES = 3
+MATE_PROBE_NODES = 2_000
+# A checks-only mate in n is only trusted once a full-width solve within this
+# budget shows there is no mate in n - 1 (a quiet first move could be faster)
+MATE_VERIFY_NODES = 20_000
+
+# One analysed root move: score from the side to move's point of view, pv as moves
+PVLine = namedtuple("PVLine", "move score pv depth")
+
+# The resources below are process-wide and safe to share between contexts
+
+# Optional Syzygy tablebase (None = no probing); see tablebase.py
+_tablebase: Optional["tablebase.Tablebase"] = tablebase.from_env()
+
+# Tablebase wins score below mate (±1000) so a mate found by search is still preferred
+TB_WIN = 900
+TB_SCORES = {2: TB_WIN, 1: 0.0, 0: 0.0, -1: 0.0, -2: -TB_WIN}
+
+# Optional persistent analysis cache (see analysis_cache.py), consulted at the
+# root and at interior nodes with at least CACHE_MIN_DEPTH plies left, where
+# hashing the position is cheap compared with the subtree below it
+_analysis_cache = None
+CACHE_MIN_DEPTH = 2
 
-def eval_board(b: chess.Board) -> float:
+# Optional learned-move prior (e.g. LearningMemory): anything with
+# move_counts(board) -> {move_uci: count} or None. Learned moves are searched
+# first in the PRIOR_PLIES plies nearest the root; each context caches the
+# lookups per position key so iterative deepening doesn't repeat them
+_move_prior = None
+_prior_version = 0  # bumped by set_move_prior so contexts drop stale lookups
+PRIOR_PLIES = 4
+PRIOR_CACHE_LIMIT = 50_000
+
+# Default for SearchContext(table_limit=...): use the module-wide cap
+_UNSET = object()
+
+# Every live context, for memory accounting (see memstats.py)
+_contexts = weakref.WeakSet()
+
+class SearchAborted(Exception):
+    """Raised inside negamax when the abort hook asks the search to stop"""
+
+def set_table_limit(entries: Optional[int]):
+    """
+    Cap the transposition table size of the default context and of contexts
+    created afterwards without their own limit; a full table is cleared
+    """
+    global _table_limit
+    _table_limit = entries
+    _default.table_limit = entries
+
+def set_tablebase(tb):
+    """Install a tablebase.Tablebase (or None to disable probing); the previous one is closed"""
+    global _tablebase
+    if _tablebase is not None and _tablebase is not tb:
+        _tablebase.close()
+    _tablebase = tb
+
+def set_analysis_cache(cache):
+    """Install an analysis_cache.AnalysisCache (or None); the previous one is closed"""
+    global _analysis_cache
+    if _analysis_cache is not None and _analysis_cache is not cache:
+        _analysis_cache.close()
+    _analysis_cache = cache
+    if cache is not None:
+        # Scores computed under other eval parameters are dropped
+        cache.set_tag(eval_params_tag())
+
+def get_analysis_cache():
+    return _analysis_cache
+
+def set_move_prior(prior):
+    """
+    Install a learned-move prior such as LearningMemory (or None to disable).
+    Call again after the prior learns new moves to drop cached lookups.
+    """
+    global _move_prior, _prior_version
+    _move_prior = prior
+    _prior_version += 1
+
+def get_move_prior():
+    return _move_prior
+
+def _hash_move_first(moves, hash_move):
+    # moves: order_moves() output; the cached best move is searched first
+    for i, (m, _) in enumerate(moves):
+        if m == hash_move:
+            moves.insert(0, moves.pop(i))
+            break
+
+def mate_in(score: Optional[float]) -> Optional[int]:
+    """Moves to mate for a mate score (negative when the side to move gets mated), else None"""
+    if score is None or abs(score) <= MATE_BOUND:
+        return None
+    moves = (int(round(MATE_SCORE - abs(score))) + 1) // 2
+    return moves if score > 0 else -moves
+
+def _to_table(score: float, ply: int) -> float:
+    # Mate scores are stored relative to the node so they stay valid at any ply
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+def _from_table(score: float, ply: int) -> float:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+def mate_probe(board: chess.Board, limits=None) -> Optional[Tuple[chess.Move, float, "mate_search.MateResult"]]:
+    """
+    Quick mate search for forcing-looking positions. The mate returned is the
+    shortest one: a checks-only hit longer than mate in 1 is checked by a
+    full-width solve for a shorter mate.
+    
+    Returns:
+        (move, mate score, MateResult) or None (also when that check runs out
+        of budget, so the caller's full search decides)
+    """
+    if not mate_search.looks_forcing(board):
+        return None
+    result = mate_search.find_mate(board, MATE_PROBE_MOVES, MATE_PROBE_NODES, limits, checks_only=True)
+    if result is None:
+        return None
+    if result.moves > 1:
+        solver = mate_search.MateSolver(MATE_VERIFY_NODES, limits)
+        shorter = solver.solve(board, result.moves - 1)
+        if shorter is not None:
+            result = shorter._replace(nodes=result.nodes + shorter.nodes)
+        elif solver.aborted:
+            profiler.count("mate_probe.unverified")
+            return None
+        else:
+            result = result._replace(nodes=result.nodes + solver.nodes)
+    profiler.count("mate_probe.hits")
+    return result.move, MATE_SCORE - (2 * result.moves - 1), result
+
+def get_tablebase():
+    return _tablebase
+
+def tablebase_move(board: chess.Board) -> Optional[Tuple[chess.Move, float]]:
+    """
+    Exact root move from the tablebase (DTZ-optimal).
+    
+    Returns:
+        (move, score from the side to move's point of view), or None when the
+        position isn't covered
+    """
+    if _tablebase is None or not _tablebase.can_probe(board):
+        return None
+    hit = _tablebase.root_move(board)
+    if hit is None:
+        return None
+    move, wdl = hit
+    return move, TB_SCORES[wdl]
+
+def order_moves(b: chess.Board, moves) -> List[Tuple[chess.Move, Optional[int]]]:
+    """
+    Order moves for search: winning/equal captures by SEE (then victim value),
+    then quiet moves, then captures that lose material.
+    
+    Returns:
+        list of (move, SEE value or None for non-captures)
+    """
+    scored = []
+    for m in moves:
+        if b.is_capture(m):
+            exchange = see.see(b, m)
+            victim = b.piece_type_at(m.to_square)
+            key = (2 if exchange >= 0 else 0, exchange, VAL[victim] if victim else VAL[chess.PAWN])
+        else:
+            exchange = None
+            key = (1, 0, 0)
+        scored.append((key, m, exchange))
+    # Stable sort keeps generation order among equal keys
+    scored.sort(key=lambda t: t[0], reverse=True)
+    return [(m, exchange) for _, m, exchange in scored]
+
+def load_eval_params(path: str = EVAL_PARAMS_FILE) -> bool:
+    """
+    Load piece values, piece-square tables and the mobility weight written by
+    the Texel tuner. Missing keys keep their current values.
+    
+    Returns:
+        True if the file was loaded
+    """
+    global MOBILITY_WEIGHT, PST
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        print(f"Error loading eval params: {e}")
+        return False
+    names = {chess.piece_name(pt): pt for pt in chess.PIECE_TYPES}
+    for name, value in data.get("val", {}).items():
+        VAL[names[name]] = float(value)
+    if "pst" in data:
+        PST = {names[name]: [float(v) for v in table] for name, table in data["pst"].items()} or None
+    MOBILITY_WEIGHT = float(data.get("mobility", MOBILITY_WEIGHT))
+    if _analysis_cache is not None:
+        _analysis_cache.set_tag(eval_params_tag())
+    return True
+
+def eval_params_tag() -> int:
+    """32-bit hash of the current eval parameters (keys the persistent analysis cache)"""
+    params = {
+        "val": [VAL[pt] for pt in chess.PIECE_TYPES],
+        "pst": None if PST is None else [PST.get(pt) for pt in chess.PIECE_TYPES],
+        "mobility": MOBILITY_WEIGHT,
+    }
+    return zlib.crc32(json.dumps(params).encode("ascii"))
+
+def _insufficient_material(b: chess.Board) -> bool:
+    # Any pawn, rook or queen is enough to play on; only then ask python-chess
+    if b.pawns | b.rooks | b.queens:
+        return False
+    return b.is_insufficient_material()
+
+def eval_board(b: chess.Board, mobility: Optional[int] = None) -> float:
     """
     Evaluation function: material + mobility + piece-square bonuses
     
     Args:
         b: chess.Board instance
+        mobility: number of legal moves if the caller already knows it
         
     Returns:
         Evaluation score (positive = good for White, negative = good for Black)
     """
+    if mobility is None:
+        mobility = b.legal_moves.count()
+    
+    # Game over check: mate/stalemate only when there are no moves
+    if mobility == 0:
+        if b.is_check():
+            return -MATE_SCORE if b.turn == chess.WHITE else MATE_SCORE
+        return 0.0  # Stalemate
+    if _insufficient_material(b) or b.halfmove_clock >= 150:
+        return 0.0  # Draw
+    
     score = 0.0
     
-    # Material evaluation
+    # Material and piece-square evaluation
+    pst = PST
     for square, piece in b.piece_map().items():
         piece_value = VAL.get(piece.piece_type, 0)
         if piece.color == chess.WHITE:
+            if pst is not None and piece.piece_type in pst:
+                piece_value += pst[piece.piece_type][square]
             score += piece_value
         else:
+            if pst is not None and piece.piece_type in pst:
+                piece_value += pst[piece.piece_type][chess.square_mirror(square)]
             score -= piece_value
     
     # Mobility bonus (number of legal moves)
-    try:
-        mobility = len(list(b.legal_moves))
-        if b.turn == chess.WHITE:
-            score += 0.01 * mobility
-        else:
-            score -= 0.01 * mobility
-    except Exception:
-        pass
-    
-    # Game over check
-    if b.is_checkmate():
-        if b.turn == chess.WHITE:
-            return -1000.0  # Black wins
-        else:
-            return 1000.0   # White wins
-    elif b.is_stalemate() or b.is_insufficient_material() or b.is_seventyfive_moves() or b.is_fivefold_repetition():
-        return 0.0  # Draw
+    if b.turn == chess.WHITE:
+        score += MOBILITY_WEIGHT * mobility
+    else:
+        score -= MOBILITY_WEIGHT * mobility
     
     return score
 
-def negamax(b: chess.Board, depth: int, alpha: float, beta: float, color: int) -> float:
+load_eval_params()
+
+class SearchContext:
     """
-    Negamax algorithm with alpha-beta pruning and transposition table
+    Everything one search mutates: transposition table, learned-move cache,
+    node and table-hit statistics, the abort hook polled by negamax and the
+    hash stack of the current line.
+    
+    A context runs one search at a time (callers from other threads wait for
+    it), while separate contexts share no mutable state, so searches in
+    different contexts run in parallel threads.
     
     Args:
-        b: chess.Board instance
-        depth: remaining search depth
-        alpha: alpha value for pruning
-        beta: beta value for pruning
-        color: 1 if maximizing for White, -1 if maximizing for Black
+        table_limit: max transposition table entries, None = unbounded
+                     (default: the limit given to set_table_limit)
+    """
+    
+    def __init__(self, table_limit=_UNSET):
+        # Transposition table: maps Zobrist key -> (depth, score, best move or None,
+        # bound); bound is EXACT, LOWER (fail high) or UPPER (fail low)
+        self.table: Dict[int, Tuple[int, float, Optional[chess.Move], int]] = {}
+        self.table_limit: Optional[int] = _table_limit if table_limit is _UNSET else table_limit
+        self.table_hits = 0
+        # Search statistics and external abort hook (polled every 64 nodes)
+        self.nodes = 0
+        self.abort_check: Optional[Callable[[], bool]] = None
+        # Keys of the game and the current search line (set up per root search)
+        self.hashes: Optional[HashStack] = None
+        # Learned moves per position key, valid for one version of the prior
+        self.prior_cache: Dict[int, Optional[List[chess.Move]]] = {}
+        self._prior_version = _prior_version
+        self._lock = threading.RLock()
+        _contexts.add(self)
+    
+    def clear(self):
+        """Clear the transposition table (useful for new games)"""
+        with self._lock:
+            self.table.clear()
+            self.prior_cache.clear()
+            self.table_hits = 0
+    
+    def _store(self, key: int, depth: int, score: float, move: Optional[chess.Move] = None, bound: int = EXACT):
+        if self.table_limit is not None and len(self.table) >= self.table_limit:
+            self.table.clear()
+        self.table[key] = (depth, score, move, bound)
+    
+    def _start(self, board: chess.Board):
+        # Game positions that can still repeat, then keys along the search line
+        self.hashes = HashStack(board)
+        if self._prior_version != _prior_version:
+            self.prior_cache.clear()
+            self._prior_version = _prior_version
+    
+    def principal_variation(self, board: chess.Board, first: chess.Move, max_len: int) -> List[chess.Move]:
+        """
+        Expected line starting with `first`, following best moves stored in the
+        transposition table. Stops at a missing/illegal entry or a repeated position.
+        """
+        pv = [first]
+        b = board.copy(stack=False)
+        b.push(first)
+        key = chess.polyglot.zobrist_hash(b)
+        seen = {key}
+        with self._lock:
+            while len(pv) < max_len:
+                entry = self.table.get(key)
+                move = entry[2] if entry else None
+                if move is None or not b.is_legal(move):
+                    break
+                pv.append(move)
+                b.push(move)
+                key = chess.polyglot.zobrist_hash(b)
+                if key in seen:
+                    break
+                seen.add(key)
+        return pv
+    
+    def _learned_moves(self, b: chess.Board, key: int) -> Optional[List[chess.Move]]:
+        # Learned moves of this position, most played first (None if unknown)
+        cache = self.prior_cache
+        if key in cache:
+            return cache[key]
+        counts = _move_prior.move_counts(b)
+        learned = None
+        if counts:
+            learned = []
+            for uci in sorted(counts, key=counts.get, reverse=True):
+                # memory.json can be edited by hand; skip entries that aren't moves here
+                try:
+                    move = chess.Move.from_uci(uci)
+                except ValueError:
+                    continue
+                if b.is_legal(move):
+                    learned.append(move)
+            learned = learned or None
+        if len(cache) >= PRIOR_CACHE_LIMIT:
+            cache.clear()
+        cache[key] = learned
+        return learned
+    
+    def _learned_first(self, b: chess.Board, key: int, moves):
+        """
+        Move learned moves (order_moves() output) to the front, most played first.
         
-    Returns:
-        Best evaluation score from current position
-    """
-    global _transposition_table, _table_hits
-    
-    # Check transposition table
-    fen = b.fen()
-    if fen in _transposition_table:
-        stored_depth, stored_score = _transposition_table[fen]
-        if stored_depth >= depth:
-            _table_hits += 1
-            return stored_score
-    
-    # Terminal node
-    if depth == 0 or b.is_game_over():
-        eval_score = eval_board(b)
-        result = color * eval_score
-        _transposition_table[fen] = (0, result)
-        return result
-    
-    # Generate and order moves (captures first)
-    moves = list(b.legal_moves)
-    moves.sort(key=lambda m: (
-        0 if not b.is_capture(m) else 1,  # Captures first
-        -VAL.get(b.piece_at(m.to_square).piece_type, 0) if b.is_capture(m) and b.piece_at(m.to_square) else 0
-    ), reverse=True)
-    
-    max_value = -math.inf
-    for move in moves:
-        b.push(move)
-        try:
-            value = -negamax(b, depth - 1, -beta, -alpha, -color)
-        finally:
-            b.pop()
-        
-        if value > max_value:
-            max_value = value
-        
-        if max_value > alpha:
-            alpha = max_value
-        
-        # Alpha-beta cutoff
-        if alpha >= beta:
-            break
+        Only ordering changes, so every move is still searched and a learned move
+        that loses material is refuted as usual. Learned captures are marked as
+        non-losing so the frontier SEE pruning doesn't skip them.
+        """
+        learned = self._learned_moves(b, key)
+        if not learned:
+            return
+        front = []
+        for move in learned:
+            for i, (m, _) in enumerate(moves):
+                if m == move:
+                    moves.pop(i)
+                    front.append((m, None))
+                    break
+        if front:
+            profiler.count("prior.hits")
+            moves[:0] = front
     
-    # Store in transposition table
-    _transposition_table[fen] = (depth, max_value)
-    return max_value
+    def negamax(self, b: chess.Board, depth: int, alpha: float, beta: float, color: int) -> float:
+        """
+        Negamax algorithm with alpha-beta pruning and transposition table
+        
+        Args:
+            b: chess.Board instance
+            depth: remaining search depth
+            alpha: alpha value for pruning
+            beta: beta value for pruning
+            color: 1 if maximizing for White, -1 if maximizing for Black
+            
+        Returns:
+            Best evaluation score from current position
+            
+        Moves are made through the HashStack set up by the root search, which
+        keeps the position key and the repetition history in step with the board.
+        """
+        self.nodes += 1
+        if self.abort_check is not None and (self.nodes & 63) == 0 and self.abort_check():
+            raise SearchAborted()
+        hashes = self.hashes
+        
+        # Search-local draws: any repetition since the last irreversible move, the
+        # 50-move rule and bare minor pieces; none of these generate moves
+        if (b.halfmove_clock >= 100 or hashes.is_repetition(b.halfmove_clock)
+                or _insufficient_material(b)):
+            return 0.0
+        
+        key = hashes.key
+        ply = hashes.ply
+        # Check transposition table: exact scores, or bounds that already cut
+        entry = self.table.get(key)
+        hash_move = None
+        if entry is not None:
+            if entry[0] >= depth:
+                score = _from_table(entry[1], ply)
+                bound = entry[3]
+                if (bound == EXACT or (bound == LOWER and score >= beta)
+                        or (bound == UPPER and score <= alpha)):
+                    self.table_hits += 1
+                    return score
+            hash_move = entry[2]
+        
+        # Leaf: one move count serves both mate/stalemate detection and mobility
+        if depth == 0:
+            mobility = b.legal_moves.count()
+            if mobility == 0 and b.is_check():
+                result = -(MATE_SCORE - ply)
+            else:
+                result = color * eval_board(b, mobility)
+            self._store(key, 0, _to_table(result, ply))
+            return result
+        
+        # Interior node inside the tablebase: the WDL result is exact, stop searching
+        if _tablebase is not None and _tablebase.can_probe(b):
+            wdl = _tablebase.probe_wdl(b)
+            if wdl is not None:
+                result = TB_SCORES[wdl]
+                self._store(key, depth, result)
+                return result
+        
+        # Persistent cache: exact or bound-cutting entries end the search here;
+        # otherwise the cached best move is tried first
+        cache = _analysis_cache if depth >= CACHE_MIN_DEPTH else None
+        if cache is not None:
+            entry = cache.probe(key)
+            if entry is not None:
+                score = _from_table(entry.score, ply)
+                if entry.depth >= depth and (entry.bound == EXACT
+                                             or (entry.bound == LOWER and score >= beta)
+                                             or (entry.bound == UPPER and score <= alpha)):
+                    return score
+                hash_move = hash_move or entry.move
+        alpha_orig = alpha
+        
+        # Generate and order moves (good captures, quiet moves, losing captures)
+        moves = order_moves(b, b.legal_moves)
+        if not moves:
+            result = -(MATE_SCORE - ply) if b.is_check() else 0.0
+            self._store(key, depth, _to_table(result, ply))
+            return result
+        if _move_prior is not None and hashes.ply < PRIOR_PLIES:
+            self._learned_first(b, key, moves)
+        if hash_move is not None:
+            _hash_move_first(moves, hash_move)
+        
+        max_value = -math.inf
+        best = None
+        for move, exchange in moves:
+            # At the frontier a capture that loses material by SEE only looks good to
+            # the static eval of the leaf, so skip it (they are ordered last)
+            if (depth == 1 and exchange is not None and exchange < 0
+                    and max_value > -math.inf and not b.is_check()):
+                break
+            hashes.push(b, move)
+            try:
+                value = -self.negamax(b, depth - 1, -beta, -alpha, -color)
+            finally:
+                hashes.pop(b)
+            
+            if value > max_value:
+                max_value = value
+                best = move
+            
+            if max_value > alpha:
+                alpha = max_value
+            
+            # Alpha-beta cutoff
+            if alpha >= beta:
+                break
+        
+        # Store in transposition table, flagged with the kind of bound it is
+        stored = _to_table(max_value, ply)
+        bound = UPPER if max_value <= alpha_orig else (LOWER if max_value >= beta else EXACT)
+        self._store(key, depth, stored, best, bound)
+        if cache is not None:
+            cache.store(key, depth, bound, stored, best)
+        return max_value
+    
+    def best_move(self, board: chess.Board, depth: int = 3, limits=None) -> Optional[chess.Move]:
+        """See the module-level best_move()."""
+        if limits is None:
+            hit = tablebase_move(board) or mate_probe(board)
+            if hit is not None:
+                return hit[0]
+            move, _ = self.search_root(board, depth)
+            return move
+        move, _, _ = self.iterative_deepening(board, limits, limits.depth or depth)
+        return move
+    
+    def _limits_check(self, limits, start_nodes: int) -> Callable[[], bool]:
+        # Abort hook for negamax: reports progress and polls the limits
+        def check():
+            nodes = self.nodes - start_nodes
+            limits.progress(nodes)
+            return limits.expired(nodes)
+        return check
+    
+    def iterative_deepening(self, board: chess.Board, limits, max_depth: int,
+                            on_iteration: Optional[Callable] = None) -> Tuple[Optional[chess.Move], float, int]:
+        """See the module-level iterative_deepening()."""
+        hit = tablebase_move(board)
+        if hit is not None:
+            move, score = hit
+            limits.publish(depth=1, score=score, nodes=0, pv=[move.uci()], source="tablebase")
+            if on_iteration is not None:
+                on_iteration(1, move, score, 0)
+            return move, score, 1
+        hit = mate_probe(board, limits)
+        if hit is not None:
+            move, score, result = hit
+            depth = 2 * result.moves - 1
+            limits.publish(depth=depth, score=score, nodes=result.nodes,
+                           pv=[m.uci() for m in result.pv], source="mate")
+            if on_iteration is not None:
+                on_iteration(depth, move, score, result.nodes)
+            return move, score, depth
+        with self._lock:
+            best, best_score, reached = None, 0.0, 0
+            start_nodes = self.nodes
+            check = self._limits_check(limits, start_nodes)
+            try:
+                for depth in range(1, max_depth + 1):
+                    self.abort_check = check if depth > 1 else None
+                    try:
+                        move, score = self.search_root(board, depth)
+                    except SearchAborted:
+                        break
+                    if move is None:
+                        break
+                    best, best_score, reached = move, score, depth
+                    nodes = self.nodes - start_nodes
+                    limits.publish(depth=depth, score=score, nodes=nodes,
+                                   pv=[m.uci() for m in self.principal_variation(board, move, depth)])
+                    if on_iteration is not None:
+                        on_iteration(depth, move, score, nodes)
+                    if abs(score) > MATE_BOUND:
+                        break  # forced mate found; deeper iterations can't find a shorter one
+                    if limits.soft_expired() or limits.expired(self.nodes - start_nodes):
+                        break
+            finally:
+                self.abort_check = None
+            return best, best_score, reached
+    
+    def search_root(self, board: chess.Board, depth: int = 3) -> Tuple[Optional[chess.Move], float]:
+        """See the module-level search_root()."""
+        moves = list(board.legal_moves)
+        if not moves:
+            return None, 0.0
+        
+        with self._lock:
+            best_move_found = None
+            best_value = -math.inf
+            self._start(board)
+            key = self.hashes.key
+            
+            # A deep enough exact result from an earlier run answers immediately
+            ordered = order_moves(board, moves)
+            if _move_prior is not None:
+                self._learned_first(board, key, ordered)
+            cache = _analysis_cache
+            if cache is not None:
+                entry = cache.probe(key)
+                if entry is not None and entry.move in moves:
+                    if entry.bound == EXACT and entry.depth >= depth:
+                        profiler.count("analysis_cache.root_hits")
+                        return entry.move, entry.score
+                    _hash_move_first(ordered, entry.move)
+            
+            # Order moves: good captures by SEE first, losing captures last
+            moves = [m for m, _ in ordered]
+            
+            # Search each move
+            for move, value in self._search_root_moves(board, moves, depth):
+                if value > best_value:
+                    best_value = value
+                    best_move_found = move
+                elif value == best_value and random.random() < 0.1:
+                     best_move_found = move
+            
+            if cache is not None and best_move_found is not None and best_value > -math.inf:
+                # Every root move got a full window, so the root score is exact
+                cache.store(key, depth, EXACT, best_value, best_move_found)
+        
+        if best_move_found is None:
+            # Fallback to random legal move if something went wrong
+            print("Warning: Minimax returned None, falling back to random")
+            return random.choice(moves), best_value
+        
+        return best_move_found, best_value
+    
+    def _search_root_moves(self, board: chess.Board, moves, depth: int) -> List[Tuple[chess.Move, float]]:
+        """
+        Full-window search of each root move in the given order (the hash stack
+        must already be set up for `board`).
+        
+        Returns:
+            [(move, exact score from the side to move's point of view)]
+        """
+        root_color = 1 if board.turn == chess.WHITE else -1
+        hashes = self.hashes
+        scored = []
+        start_nodes = self.nodes
+        for move in moves:
+            hashes.push(board, move)
+            try:
+                with profiler.span("negamax", move=move, depth=depth - 1):
+                    value = -self.negamax(board, depth - 1, -math.inf, math.inf, -root_color)
+            except SearchAborted:
+                hashes.pop(board)
+                profiler.count("negamax.nodes", self.nodes - start_nodes)
+                raise
+            except Exception as e:
+                print(f"Error in negamax: {e}")
+                value = -math.inf
+            hashes.pop(board)
+            scored.append((move, value))
+        profiler.count("negamax.nodes", self.nodes - start_nodes)
+        return scored
+    
+    def score_moves(self, board: chess.Board, moves, depth: int) -> List[Tuple[chess.Move, float]]:
+        """
+        Exact score of each of `moves` at `depth`, the same full-window root
+        search best_move runs; after a search of `board` it reuses that table.
+        
+        Returns:
+            [(move, score from the side to move's point of view)]
+        """
+        with self._lock:
+            self._start(board)
+            return self._search_root_moves(board, moves, depth)
+    
+    def analyse(self, board: chess.Board, depth: int = 3, multipv: int = 3, limits=None,
+                on_iteration: Optional[Callable] = None) -> List[PVLine]:
+        """See the module-level analyse()."""
+        moves = list(board.legal_moves)
+        if not moves:
+            return []
+        if limits is None:
+            depths = [depth]
+        else:
+            depths = range(1, (limits.depth or depth) + 1)
+        
+        with self._lock:
+            self._start(board)
+            ordered = order_moves(board, moves)
+            if _move_prior is not None:
+                self._learned_first(board, self.hashes.key, ordered)
+            moves = [m for m, _ in ordered]
+            
+            lines = []
+            start_nodes = self.nodes
+            check = self._limits_check(limits, start_nodes) if limits is not None else None
+            try:
+                for d in depths:
+                    self.abort_check = check if d > 1 else None
+                    self._start(board)
+                    try:
+                        scored = self._search_root_moves(board, moves, d)
+                    except SearchAborted:
+                        break
+                    # Stable sort: equal scores keep the search order
+                    scored.sort(key=lambda mv: mv[1], reverse=True)
+                    # Next iteration searches the best moves first
+                    moves = [m for m, _ in scored]
+                    lines = [PVLine(m, score, self.principal_variation(board, m, d), d)
+                             for m, score in scored[:multipv]]
+                    nodes = self.nodes - start_nodes
+                    if limits is not None:
+                        limits.publish(depth=d, score=lines[0].score, nodes=nodes,
+                                       pv=[m.uci() for m in lines[0].pv])
+                        if limits.soft_expired() or limits.expired(nodes):
+                            break
+                    if on_iteration is not None:
+                        on_iteration(d, lines, nodes)
+            finally:
+                self.abort_check = None
+            return lines
 
-def best_move(board: chess.Board, depth: int = 3) -> Optional[chess.Move]:
+# Shared context behind the module-level functions; searches started from
+# several threads take turns on it
+_default = SearchContext()
+
+def default_context() -> SearchContext:
+    return _default
+
+def contexts() -> List[SearchContext]:
+    """All live search contexts (the default one and any created by engines or threads)"""
+    return list(_contexts)
+
+def clear_transposition_table():
+    """Clear the default context's transposition table (useful for new games)"""
+    _default.clear()
+
+def reset_node_count():
+    _default.nodes = 0
+
+def node_count() -> int:
+    return _default.nodes
+
+def principal_variation(board: chess.Board, first: chess.Move, max_len: int) -> List[chess.Move]:
+    """Expected line starting with `first`, from the default context's transposition table."""
+    return _default.principal_variation(board, first, max_len)
+
+def best_move(board: chess.Board, depth: int = 3, limits=None) -> Optional[chess.Move]:
     """
     Level 2 Medium Engine: Minimax with alpha-beta pruning
     
     Args:
         board: chess.Board instance
         depth: search depth (default 3, can be 4 for stronger play)
+        limits: optional engine_api.SearchLimits; when given the search deepens
+                iteratively up to limits.depth (or `depth`) and stops on
+                cancellation, deadline or node budget
         
     Returns:
         Best move according to minimax search, or None if no legal moves
     """
-    moves = list(board.legal_moves)
-    if not moves:
-        return None
+    return _default.best_move(board, depth, limits)
+
+def iterative_deepening(board: chess.Board, limits, max_depth: int,
+                        on_iteration: Optional[Callable] = None) -> Tuple[Optional[chess.Move], float, int]:
+    """
+    Search depth 1, 2, ... max_depth until `limits` says stop.
+    
+    Args:
+        board: chess.Board instance
+        limits: engine_api.SearchLimits (deadlines, node budget, cancel token)
+        max_depth: deepest iteration to run
+        on_iteration: optional callback(depth, move, score, nodes) after each completed depth
+        
+    Progress is also published through limits.publish(): one event per
+    completed depth (depth, score, pv, nodes, nps) and throttled node-count
+    updates while an iteration runs.
+        
+    Returns:
+        (move, score, depth) from the deepest completed iteration.
+        Depth 1 always completes, so a move is returned whenever one exists.
+        Tablebase positions return the DTZ-optimal move immediately, and a
+        short forced mate found by mate_probe() is returned before searching.
+    """
+    return _default.iterative_deepening(board, limits, max_depth, on_iteration)
+
+def search_root(board: chess.Board, depth: int = 3) -> Tuple[Optional[chess.Move], float]:
+    """
+    Root search behind best_move that also reports the score.
     
-    best_move_found = None
-    best_value = -math.inf
-    root_color = 1 if board.turn == chess.WHITE else -1
-    
-    # Order moves: captures first
-    moves.sort(key=lambda m: (
-        0 if not board.is_capture(m) else 1,
-        -VAL.get(board.piece_at(m.to_square).piece_type, 0) if board.is_capture(m) and board.piece_at(m.to_square) else 0
-    ), reverse=True)
-    
-    # Search each move
-    for move in moves:
-        board.push(move)
-        try:
-            value = -negamax(board, depth - 1, -math.inf, math.inf, -root_color)
-        except Exception as e:
-            print(f"Error in negamax: {e}")
-            value = -math.inf
-        board.pop()
-        
-        if value > best_value:
-            best_value = value
-            best_move_found = move
-        elif value == best_value and random.random() < 0.1:
-             best_move_found = move
-
-    if best_move_found is None:
-        # Fallback to random legal move if something went wrong
-        print("Warning: Minimax returned None, falling back to random")
-        return random.choice(moves)
-
-    return best_move_found
+    Args:
+        board: chess.Board instance
+        depth: search depth
+        
+    Returns:
+        (best move, score from the side to move's point of view);
+        (None, 0.0) if there are no legal moves.
+        Raises SearchAborted if the abort hook fires mid-search.
+    """
+    return _default.search_root(board, depth)
+
+def analyse(board: chess.Board, depth: int = 3, multipv: int = 3, limits=None,
+            on_iteration: Optional[Callable] = None) -> List[PVLine]:
+    """
+    Multi-PV search: the `multipv` best root moves with score, PV and depth.
+    
+    The root already searches every move with a full window, so all root
+    scores are exact and come out of one search sharing one transposition
+    table; asking for more lines only costs the PV walks.
+    
+    Args:
+        board: chess.Board instance
+        depth: search depth (the maximum depth when `limits` is given)
+        multipv: number of lines to return
+        limits: optional engine_api.SearchLimits; when given the search
+                deepens iteratively and returns the deepest completed lines
+        on_iteration: optional callback(depth, lines, nodes) after each completed depth
+        
+    Returns:
+        list of PVLine, best first; empty if there are no legal moves
+    """
+    return _default.analyse(board, depth, multipv, limits, on_iteration)
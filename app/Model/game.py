@@ -3,26 +3,101 @@
 
 import chess
 
+PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+
+class PositionState:
+    """
+    Derived state for one position, computed once per ply by Game.state().
+
+    legal_moves: list of legal moves
+    legal_set: same moves as a set for O(1) legality checks
+    by_from: from-square -> list of legal moves starting there
+    captures: set of legal moves that capture (including en passant)
+    in_check: side to move is in check
+    material: (white, black) material totals
+    is_over / result: game-over status
+    """
+    __slots__ = ("legal_moves", "legal_set", "by_from", "captures", "in_check",
+                 "material", "is_over", "result")
+
+    def __init__(self, b: chess.Board):
+        self.legal_moves = list(b.legal_moves)
+        self.legal_set = set(self.legal_moves)
+        self.by_from = {}
+        self.captures = set()
+        for m in self.legal_moves:
+            self.by_from.setdefault(m.from_square, []).append(m)
+            if b.is_capture(m):
+                self.captures.add(m)
+        self.in_check = b.is_check()
+        white = black = 0
+        for p in b.piece_map().values():
+            if p.color == chess.WHITE:
+                white += PIECE_VALUES[p.piece_type]
+            else:
+                black += PIECE_VALUES[p.piece_type]
+        self.material = (white, black)
+        # Same rules as b.is_game_over(), reusing the move list instead of regenerating it
+        self.is_over = (not self.legal_moves or b.is_insufficient_material()
+                        or b.is_seventyfive_moves() or b.is_fivefold_repetition())
+        self.result = b.result() if self.is_over else "*"
+
 class Game:
     def __init__(self):
         self.b = chess.Board()
+        self._state = None
+        self._state_ply = -1
+
+    def _invalidate(self):
+        self._state = None
+
+    def state(self) -> PositionState:
+        """Cached derived state for the current position (recomputed after push/pop/reset)."""
+        ply = len(self.b.move_stack)
+        if self._state is None or self._state_ply != ply:
+            self._state = PositionState(self.b)
+            self._state_ply = ply
+        return self._state
 
     def reset(self):
         self.b.reset()
+        self._invalidate()
+
+    def set_fen(self, fen):
+        self.b.set_fen(fen)
+        self._invalidate()
 
     def fen(self):
         return self.b.fen()
 
     def legal_moves(self):
-        return list(self.b.legal_moves)
+        return list(self.state().legal_moves)
+
+    def legal_moves_from(self, square):
+        return self.state().by_from.get(square, [])
+
+    def is_legal(self, move):
+        return move in self.state().legal_set
+
+    def is_capture(self, move):
+        # Only meaningful for legal moves of the current position
+        return move in self.state().captures
+
+    def in_check(self):
+        return self.state().in_check
+
+    def material(self):
+        # (white, black) material totals
+        return self.state().material
 
     def push_uci(self, uci):
         try:
             m = chess.Move.from_uci(uci)
         except Exception:
             return False, "bad-uci"
-        if m in self.b.legal_moves:
+        if self.is_legal(m):
             self.b.push(m)
+            self._invalidate()
             return True, None
         return False, "illegal"
 
@@ -32,23 +107,27 @@ class Game:
         except Exception as e:
             return False, str(e)
         self.b.push(m)
+        self._invalidate()
         return True, None
 
     def push_move(self, move):
         # move: chess.Move
-        if move in self.b.legal_moves:
+        if self.is_legal(move):
             self.b.push(move)
+            self._invalidate()
             return True
         return False
 
     def pop(self):
-        return self.b.pop()
+        move = self.b.pop()
+        self._invalidate()
+        return move
 
     def is_over(self):
-        return self.b.is_game_over()
+        return self.state().is_over
 
     def result(self):
-        return self.b.result()
+        return self.state().result
 
     def turn(self):
         # True for White to move, False for Black
@@ -1,12 +1,19 @@
 import json
 import os
+import threading
+import uuid
 from datetime import datetime
+from app.Model import profiler
+from app.Model.persistence import write_json_atomic
 
 HISTORY_FILE = "data/history.json"
 
 class HistoryManager:
-    def __init__(self):
+    def __init__(self, writer=None):
+        # writer: optional PersistenceWorker; when given, saves happen in the background
+        self.writer = writer
         self.history = []
+        self._lock = threading.Lock()
         self.load()
 
     def load(self):
@@ -20,16 +27,15 @@ class HistoryManager:
         else:
             self.history = []
 
-    def save_game(self, result, level, winner_color=None):
+    def save_game(self, result, level, winner_color=None, moves=None, start_fen=None):
         """
         Save a completed game to history.
         result: str (e.g. "1-0", "0-1", "1/2-1/2")
         level: int (1, 2, 3)
         winner_color: chess.WHITE, chess.BLACK, or None
+        moves: list of UCI strings (kept so finished games can be re-analysed)
+        start_fen: starting position if it isn't the standard one
         """
-        # Ensure data directory exists
-        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-        
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         level_str = "Easy"
@@ -37,19 +43,36 @@ class HistoryManager:
         if level == 3: level_str = "Hard"
         
         entry = {
+            "id": uuid.uuid4().hex,
             "timestamp": timestamp,
             "result": result,
             "level": level_str,
             "winner": "White" if winner_color == True else ("Black" if winner_color == False else "Draw")
         }
+        if moves is not None:
+            entry["moves"] = list(moves)
+        if start_fen is not None:
+            entry["start_fen"] = start_fen
         
-        self.history.insert(0, entry) # Add to beginning
-        
-        try:
-            with open(HISTORY_FILE, 'w') as f:
-                json.dump(self.history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving history: {e}")
+        with self._lock:
+            self.history.insert(0, entry) # Add to beginning
+        self.save()
+
+    def save(self):
+        if self.writer is not None:
+            self.writer.submit(HISTORY_FILE, self._write)
+        else:
+            self._write()
+
+    def _write(self):
+        # Serialize under the lock so a concurrent save_game can't mutate mid-dump
+        with profiler.span("history.write", entries=len(self.history)):
+            with self._lock:
+                data = json.dumps(self.history, indent=2)
+            try:
+                write_json_atomic(HISTORY_FILE, data)
+            except Exception as e:
+                print(f"Error saving history: {e}")
 
     def get_history(self):
         return self.history
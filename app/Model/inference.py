@@ -0,0 +1,167 @@
+# app/model/inference.py
+# Cross-game batching inference service for the hard engine.
+#
+# Many concurrent HardEngine.pick calls (GUI, UCI pondering, threaded
+# tournaments, server sessions) each need a handful of position evaluations.
+# Instead of one small model call per request, requests are queued and a
+# single worker thread runs one forward pass per dynamic batch: it waits for
+# the first request, then keeps collecting until the batch is full or the
+# oldest request has waited max_latency seconds.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from .profiler import Histogram
+
+
+class _Request:
+    __slots__ = ("x", "future", "queued_at")
+
+    def __init__(self, x):
+        self.x = x
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class BatchingEvaluator:
+    """
+    Args:
+        model_fn: callable(np.ndarray of shape (N, ...)) -> array with N rows
+        max_batch: maximum rows per forward pass
+        max_latency: seconds the oldest request may wait for the batch to fill
+    """
+
+    def __init__(self, model_fn, max_batch=256, max_latency=0.005):
+        self.model_fn = model_fn
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self._closed = False
+        # Request that didn't fit in the previous batch; it starts the next one
+        self._carry = None
+        self.batch_sizes = Histogram(unit="rows")
+        self.queue_latency = Histogram()
+        self.run_latency = Histogram()
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+        self._thread.start()
+
+    def submit(self, x) -> Future:
+        """
+        Queue a batch of positions (first axis = positions).
+
+        Returns:
+            Future resolving to the model output rows for `x`
+        """
+        if self._closed:
+            raise RuntimeError("BatchingEvaluator is closed")
+        req = _Request(np.asarray(x))
+        self._queue.put(req)
+        return req.future
+
+    def evaluate(self, x, timeout=None):
+        """Blocking submit(): returns the model output rows for `x`."""
+        return self.submit(x).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "batch_size": self.batch_sizes.summary(),
+            "queue_latency": self.queue_latency.summary(),
+            "run_latency": self.run_latency.summary(),
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first.x)
+        deadline = first.queued_at + self.max_latency
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if req is None:
+                self._closed = True
+                break
+            if rows + len(req.x) > self.max_batch:
+                self._carry = req
+                break
+            batch.append(req)
+            rows += len(req.x)
+        return batch, rows
+
+    def _forward(self, x):
+        # A single request larger than max_batch still runs in max_batch slices
+        if len(x) <= self.max_batch:
+            return np.asarray(self.model_fn(x))
+        return np.concatenate([np.asarray(self.model_fn(x[i:i + self.max_batch]))
+                               for i in range(0, len(x), self.max_batch)], axis=0)
+
+    def _run(self):
+        while True:
+            if self._carry is not None:
+                first, self._carry = self._carry, None
+            else:
+                first = self._queue.get()
+            if first is None:
+                break
+            batch, rows = self._collect(first)
+            start = time.perf_counter()
+            for req in batch:
+                self.queue_latency.add((start - req.queued_at) * 1e6)
+            try:
+                x = batch[0].x if len(batch) == 1 else np.concatenate([r.x for r in batch], axis=0)
+                out = self._forward(x)
+                offset = 0
+                for req in batch:
+                    n = len(req.x)
+                    req.future.set_result(out[offset:offset + n])
+                    offset += n
+            except Exception as e:
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(e)
+            self.run_latency.add((time.perf_counter() - start) * 1e6)
+            self.batch_sizes.add(rows)
+            self.batches += 1
+            if self._closed and self._carry is None:
+                break
+        # Fail anything still queued after close()
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None:
+                req.future.set_exception(RuntimeError("BatchingEvaluator is closed"))
+
+
+def keras_model_fn(model):
+    """Adapt a Keras model to the model_fn signature expected by BatchingEvaluator."""
+    return lambda x: model.predict(x, verbose=0)
+
+
+# One shared evaluator per loaded model in this process
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_evaluator(model, **kwargs) -> BatchingEvaluator:
+    """Return the process-wide BatchingEvaluator for `model`, creating it on first use."""
+    with _shared_lock:
+        ev = _shared.get(id(model))
+        if ev is None:
+            ev = _shared[id(model)] = BatchingEvaluator(keras_model_fn(model), **kwargs)
+        return ev
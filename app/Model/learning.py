@@ -1,12 +1,18 @@
 import json
 import os
+import threading
 import chess
+from app.Model import profiler
+from app.Model.persistence import write_json_atomic
 
 DATA_FILE = "data/memory.json"
 
 class LearningMemory:
-    def __init__(self):
+    def __init__(self, writer=None):
+        # writer: optional PersistenceWorker; when given, saves happen in the background
+        self.writer = writer
         self.memory = {}
+        self._lock = threading.Lock()
         self.load()
 
     def load(self):
@@ -21,13 +27,20 @@ class LearningMemory:
             self.memory = {}
 
     def save(self):
-        # Ensure data directory exists
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        try:
-            with open(DATA_FILE, 'w') as f:
-                json.dump(self.memory, f, indent=2)
-        except Exception as e:
-            print(f"Error saving memory: {e}")
+        if self.writer is not None:
+            self.writer.submit(DATA_FILE, self._write)
+        else:
+            self._write()
+
+    def _write(self):
+        # Serialize under the lock so learn_game can't mutate the dict mid-dump
+        with profiler.span("learning.write", positions=len(self.memory)):
+            with self._lock:
+                data = json.dumps(self.memory, indent=2)
+            try:
+                write_json_atomic(DATA_FILE, data)
+            except Exception as e:
+                print(f"Error saving memory: {e}")
 
     def learn_game(self, game_moves, winner_color):
         """
@@ -42,28 +55,57 @@ class LearningMemory:
         
         start_index = 0 if winner_color == chess.WHITE else 1
         
+        with profiler.span("learning.learn_game", moves=len(game_moves)):
+            with self._lock:
+                self._learn_moves(game_moves, start_index)
+        self.save()
+
+    def learn_moves(self, moves):
+        """
+        Learn specific moves, e.g. the engine-verified moves of a game.
+        moves: List of (fen, move_uci) tuples
+        """
+        with profiler.span("learning.learn_moves", moves=len(moves)):
+            with self._lock:
+                for fen, move_uci in moves:
+                    self._count(fen, move_uci)
+        self.save()
+
+    def _learn_moves(self, game_moves, start_index):
         for i in range(start_index, len(game_moves), 2):
             fen, move_uci = game_moves[i]
-            
-            # Simplify FEN to just piece placement and turn to avoid over-specificity
-            # (e.g. ignore halfmove clock, maybe castling rights if we want to be strict)
-            # For now, let's use the full FEN but maybe strip the move counters
-            key = fen.split(' ')[0] + ' ' + fen.split(' ')[1] 
-            
-            if key not in self.memory:
-                self.memory[key] = {}
-            
-            if move_uci not in self.memory[key]:
-                self.memory[key][move_uci] = 0
-            
-            self.memory[key][move_uci] += 1
-            
-        self.save()
+            self._count(fen, move_uci)
+
+    def _count(self, fen, move_uci):
+        # Simplify FEN to just piece placement and turn to avoid over-specificity
+        # (e.g. ignore halfmove clock, maybe castling rights if we want to be strict)
+        # For now, let's use the full FEN but maybe strip the move counters
+        key = fen.split(' ')[0] + ' ' + fen.split(' ')[1] 
+        
+        if key not in self.memory:
+            self.memory[key] = {}
+        
+        if move_uci not in self.memory[key]:
+            self.memory[key][move_uci] = 0
+        
+        self.memory[key][move_uci] += 1
 
     def get_best_move(self, board):
         """
         Return a learned move for the current board state if it exists.
         """
+        with profiler.span("learning.lookup"):
+            return self._lookup(board)
+
+    def move_counts(self, board):
+        """
+        Learned moves for the current board state as {move_uci: count}.
+        Cheap enough for the search: no FEN round trip, no logging.
+        """
+        key = board.board_fen() + (' w' if board.turn == chess.WHITE else ' b')
+        return self.memory.get(key)
+
+    def _lookup(self, board):
         fen = board.fen()
         key = fen.split(' ')[0] + ' ' + fen.split(' ')[1]
         
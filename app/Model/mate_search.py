@@ -0,0 +1,218 @@
+# app/model/mate_search.py
+# Mate-in-N solver: a depth-first AND/OR search that only asks "can the side
+# to move force mate within n moves?". Attacker moves are tried checks first
+# (then captures), defender moves all have to be refuted, and the last
+# attacking move must give check, so proving or refuting a short mate costs
+# far fewer nodes than a full-width alpha-beta search of the same depth.
+#
+# Results are memoised per (position key, moves left) and n grows from 1, so
+# the first mate found is the shortest one.
+#
+# Usage:
+#   result = find_mate(board, max_moves=3)
+#   if result: print(result.move, result.moves, result.pv)
+
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+import chess
+
+from .zobrist import HashStack
+
+# Mate for the side to move: first move, mate in `moves` moves, full line, nodes searched
+MateResult = namedtuple("MateResult", "move moves pv nodes")
+
+DEFAULT_MAX_MOVES = 3
+
+# Poll limits every this many nodes
+CHECK_INTERVAL = 256
+
+
+class _Aborted(Exception):
+    pass
+
+
+def _attacker_moves(b: chess.Board, last: bool, checks_only: bool) -> List[chess.Move]:
+    """Checks first, then captures, then the rest; only checks for the mating move."""
+    checks, captures, quiet = [], [], []
+    for m in b.legal_moves:
+        if b.gives_check(m):
+            checks.append(m)
+        elif last or checks_only:
+            continue
+        elif b.is_capture(m) or m.promotion:
+            captures.append(m)
+        else:
+            quiet.append(m)
+    return checks + captures + quiet
+
+
+class MateSolver:
+    """
+    Args:
+        nodes: node budget per solve (None = unlimited)
+        limits: optional engine_api.SearchLimits (deadline / cancellation)
+        checks_only: only consider checking attacker moves (much faster,
+                     misses mates that start with a quiet move)
+    """
+
+    def __init__(self, nodes: Optional[int] = None, limits=None, checks_only: bool = False):
+        self.node_limit = nodes
+        self.limits = limits
+        self.checks_only = checks_only
+        self.nodes = 0
+        # Set when the last solve() ran out of budget (its None then means "unknown")
+        self.aborted = False
+        # (key, moves left) -> mating move for attacker nodes (None = no mate),
+        # True/False for defender nodes
+        self._attack_table: Dict[Tuple[int, int], Optional[chess.Move]] = {}
+        self._defend_table: Dict[Tuple[int, int], bool] = {}
+        self._hashes: Optional[HashStack] = None
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                raise _Aborted()
+            if self.limits is not None and self.limits.expired(self.nodes):
+                raise _Aborted()
+
+    def _attack(self, b: chess.Board, n: int) -> Optional[chess.Move]:
+        """A move that mates within `n` moves, or None."""
+        self._tick()
+        key = (self._hashes.key, n)
+        if key in self._attack_table:
+            return self._attack_table[key]
+        found = None
+        for move in _attacker_moves(b, n == 1, self.checks_only):
+            self._hashes.push(b, move)
+            try:
+                mated = self._defend(b, n)
+            finally:
+                self._hashes.pop(b)
+            if mated:
+                found = move
+                break
+        self._attack_table[key] = found
+        return found
+
+    def _defend(self, b: chess.Board, n: int) -> bool:
+        """True if every defence loses to mate within the `n` moves the attacker started with."""
+        self._tick()
+        moves = list(b.legal_moves)
+        if not moves:
+            return b.is_check()
+        if n == 1:
+            return False
+        key = (self._hashes.key, n)
+        cached = self._defend_table.get(key)
+        if cached is not None:
+            return cached
+        # Replies that capture or give check are the likeliest refutations
+        moves.sort(key=lambda m: not (b.is_capture(m) or b.gives_check(m)))
+        result = True
+        for move in moves:
+            self._hashes.push(b, move)
+            try:
+                refuted = self._attack(b, n - 1) is None
+            finally:
+                self._hashes.pop(b)
+            if refuted:
+                result = False
+                break
+        self._defend_table[key] = result
+        return result
+
+    def _line(self, board: chess.Board, n: int, first: chess.Move) -> List[chess.Move]:
+        """Mating line: the defender holds out longest, the attacker mates fastest."""
+        b = board.copy()
+        hashes = HashStack(b)
+        saved, self._hashes = self._hashes, hashes
+        pv = [first]
+        try:
+            hashes.push(b, first)
+            while n > 1:
+                reply = None
+                for m in b.legal_moves:
+                    hashes.push(b, m)
+                    # A reply that still needs all n - 1 remaining moves
+                    longest = n == 2 or self._attack(b, n - 2) is None
+                    hashes.pop(b)
+                    if longest:
+                        reply = m
+                        break
+                if reply is None:
+                    break
+                hashes.push(b, reply)
+                pv.append(reply)
+                move = None
+                for k in range(1, n):
+                    move = self._attack(b, k)
+                    if move is not None:
+                        n = k
+                        break
+                if move is None:
+                    break
+                hashes.push(b, move)
+                pv.append(move)
+        except _Aborted:
+            pass
+        finally:
+            self._hashes = saved
+        return pv
+
+    def solve(self, board: chess.Board, max_moves: int = DEFAULT_MAX_MOVES) -> Optional[MateResult]:
+        """
+        Shortest forced mate for the side to move within `max_moves` moves.
+
+        Returns:
+            MateResult, or None if there is none (or the budget ran out first)
+        """
+        b = board.copy()
+        self._hashes = HashStack(b)
+        self.aborted = False
+        for n in range(1, max_moves + 1):
+            try:
+                move = self._attack(b, n)
+            except _Aborted:
+                self.aborted = True
+                return None
+            if move is not None:
+                return MateResult(move, n, self._line(b, n, move), self.nodes)
+        return None
+
+
+def find_mate(board: chess.Board, max_moves: int = DEFAULT_MAX_MOVES, nodes: Optional[int] = None,
+              limits=None, checks_only: bool = False) -> Optional[MateResult]:
+    """
+    Look for a forced mate by the side to move.
+
+    Args:
+        board: position to solve (not modified)
+        max_moves: longest mate to look for, in moves of the side to move
+        nodes: node budget (None = unlimited)
+        limits: optional engine_api.SearchLimits (deadline / cancellation)
+        checks_only: only try checking moves for the attacker
+
+    Returns:
+        MateResult(move, moves, pv, nodes) for the shortest mate found, or None
+    """
+    return MateSolver(nodes, limits, checks_only).solve(board, max_moves)
+
+
+def looks_forcing(board: chess.Board) -> bool:
+    """
+    Cheap test for positions worth a mate search: the side to move has a
+    checking move and the enemy king has at most two safe squares.
+    """
+    us = board.turn
+    king = board.king(not us)
+    if king is None:
+        return False
+    flights = 0
+    for sq in chess.SquareSet(chess.BB_KING_ATTACKS[king] & ~board.occupied_co[not us]):
+        if not board.is_attacked_by(us, sq):
+            flights += 1
+            if flights > 2:
+                return False
+    return any(board.gives_check(m) for m in board.legal_moves)
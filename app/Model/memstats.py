@@ -0,0 +1,421 @@
+# app/model/memstats.py
+# Opt-in memory accounting: per-subsystem sizes (transposition tables,
+# learned-move caches, learning memory, game history, analysis cache,
+# tablebase caches, model weights and queued inference tensors), process RSS,
+# and tracemalloc snapshot diffs between moves to attribute growth to source
+# lines.
+#
+# Sizes are deep sizes (sys.getsizeof over containers and their items);
+# containers with more than SAMPLE items are extrapolated from their first
+# SAMPLE items, so a report stays fast with millions of table entries.
+# Subsystems are only reported if their module has been imported.
+#
+# Disabled by default; report() and dump() work at any time, but checkpoint()
+# is a no-op and tracemalloc stays off until enabled. Enable with the
+# environment variable CHESS_MEMSTATS=<report.json> (written at exit; set
+# CHESS_MEMSTATS_TRACE=0 to skip tracemalloc) or programmatically with enable().
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from itertools import islice
+
+ENABLED = False
+
+# Items measured per container before extrapolating
+SAMPLE = 1000
+# Checkpoints kept (oldest dropped first) and source lines listed per diff
+MAX_CHECKPOINTS = 200
+TOP_LINES = 10
+
+_lock = threading.Lock()
+_watched = []
+_budgets = {}
+_over = set()
+_checkpoints = deque(maxlen=MAX_CHECKPOINTS)
+_last_snapshot = None
+_export_path = None
+
+
+# --- Sizing ---
+
+def sizeof(obj, sample=SAMPLE, _seen=None):
+    """
+    Approximate deep size of `obj` in bytes. Objects reachable twice are
+    counted once; arbitrary class instances count only their own header.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        items = obj
+    else:
+        return size
+    n = len(obj)
+    if not n:
+        return size
+    # Another thread may resize the container while we walk it
+    for _ in range(3):
+        try:
+            taken = list(islice(items, sample))
+            break
+        except RuntimeError:
+            continue
+    else:
+        return size
+    if isinstance(obj, dict):
+        inner = sum(sizeof(k, sample, seen) + sizeof(v, sample, seen) for k, v in taken)
+    else:
+        inner = sum(sizeof(v, sample, seen) for v in taken)
+    if len(taken) < n:
+        inner = inner * n // len(taken)
+    return size + inner
+
+
+def _array_bytes(arr):
+    """Bytes held by a NumPy array or a Keras/TF variable (from shape and dtype)."""
+    nbytes = getattr(arr, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    count = 1
+    for dim in arr.shape:
+        count *= int(dim or 0)
+    return count * getattr(arr.dtype, "size", 4)
+
+
+# --- Watched objects and subsystem providers ---
+
+def watch(obj):
+    """
+    Include a long-lived object in reports (LearningMemory, HistoryManager,
+    HardEngine). Only a weak reference is kept.
+    """
+    with _lock:
+        _watched[:] = [r for r in _watched if r() is not None]
+        if not any(r() is obj for r in _watched):
+            _watched.append(weakref.ref(obj))
+
+
+def _live(class_name):
+    with _lock:
+        objs = [r() for r in _watched]
+    return [o for o in objs if o is not None and type(o).__name__ == class_name]
+
+
+def _search():
+    em = sys.modules.get("app.Model.engine_med")
+    if em is None:
+        return None
+    per = []
+    for ctx in em.contexts():
+        per.append({
+            "default": ctx is em.default_context(),
+            "entries": len(ctx.table),
+            "limit": ctx.table_limit,
+            "bytes": sizeof(ctx.table),
+            "prior_cache_entries": len(ctx.prior_cache),
+            "prior_cache_bytes": sizeof(ctx.prior_cache),
+        })
+    return {
+        "contexts": len(per),
+        "entries": sum(c["entries"] for c in per),
+        "prior_cache_entries": sum(c["prior_cache_entries"] for c in per),
+        "bytes": sum(c["bytes"] + c["prior_cache_bytes"] for c in per),
+        "per_context": per,
+    }
+
+
+def _learning():
+    memories = _live("LearningMemory")
+    em = sys.modules.get("app.Model.engine_med")
+    prior = em.get_move_prior() if em is not None else None
+    if prior is not None and type(prior).__name__ == "LearningMemory" and all(m is not prior for m in memories):
+        memories.append(prior)
+    if not memories:
+        return None
+    positions = sum(len(m.memory) for m in memories)
+    return {
+        "instances": len(memories),
+        "positions": positions,
+        "moves": sum(len(moves) for m in memories for moves in list(m.memory.values())),
+        "bytes": sum(sizeof(m.memory) for m in memories),
+    }
+
+
+def _history():
+    managers = _live("HistoryManager")
+    if not managers:
+        return None
+    return {
+        "instances": len(managers),
+        "entries": sum(len(h.history) for h in managers),
+        "bytes": sum(sizeof(h.history) for h in managers),
+    }
+
+
+def _analysis_cache():
+    em = sys.modules.get("app.Model.engine_med")
+    cache = em.get_analysis_cache() if em is not None else None
+    if cache is None:
+        return None
+    stats = cache.stats()
+    # Memory-mapped file: counts towards RSS only for pages touched, not the heap
+    return {"entries": stats["entries"], "mapped_bytes": stats["bytes"], "bytes": 0}
+
+
+def _tablebase():
+    em = sys.modules.get("app.Model.engine_med")
+    tb = em.get_tablebase() if em is not None else None
+    if tb is None:
+        return None
+    return {
+        "files": tb.files,
+        "entries": len(tb._wdl) + len(tb._dtz),
+        "limit": tb.cache_size * 2,
+        "bytes": sizeof(tb._wdl) + sizeof(tb._dtz),
+    }
+
+
+def _models():
+    models = {}
+    for engine in _live("HardEngine"):
+        if engine.model is not None:
+            models[id(engine.model)] = engine.model
+    if not models:
+        return None
+    return {
+        "models": len(models),
+        "parameters": sum(int(m.count_params()) for m in models.values()),
+        "bytes": sum(_array_bytes(w) for m in models.values() for w in m.weights),
+    }
+
+
+def _inference():
+    inf = sys.modules.get("app.Model.inference")
+    if inf is None or not inf._shared:
+        return None
+    pending = nbytes = 0
+    for ev in list(inf._shared.values()):
+        with ev._queue.mutex:
+            requests = list(ev._queue.queue)
+        for r in requests:
+            if r is not None:
+                pending += 1
+                nbytes += _array_bytes(r.x)
+    return {"evaluators": len(inf._shared), "pending_tensors": pending, "bytes": nbytes}
+
+
+PROVIDERS = {
+    "search": _search,
+    "learning": _learning,
+    "history": _history,
+    "analysis_cache": _analysis_cache,
+    "tablebase": _tablebase,
+    "models": _models,
+    "inference": _inference,
+}
+
+
+def register(name, provider):
+    """Add a subsystem: provider() returns a dict with at least "bytes", or None to skip it."""
+    PROVIDERS[name] = provider
+
+
+def set_budget(name, max_bytes):
+    """Flag a subsystem in reports (and warn at checkpoints) once it exceeds max_bytes; None removes it."""
+    if max_bytes is None:
+        _budgets.pop(name, None)
+    else:
+        _budgets[name] = max_bytes
+
+
+def subsystems():
+    """Current size of every subsystem that is in use: name -> dict with "bytes"."""
+    out = {}
+    for name, provider in list(PROVIDERS.items()):
+        try:
+            stats = provider()
+        except Exception as e:
+            stats = {"error": str(e), "bytes": 0}
+        if stats is not None:
+            out[name] = stats
+    return out
+
+
+# --- Process and tracemalloc ---
+
+def process_memory():
+    """Current and peak resident set size in bytes (None where unavailable)."""
+    rss = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        if sys.platform != "darwin":
+            peak *= 1024
+    except ImportError:
+        pass
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+def checkpoint(label=""):
+    """
+    Record subsystem sizes and, while tracemalloc is tracing, the source lines
+    whose allocations grew most since the previous checkpoint. Call between
+    moves; does nothing unless enabled.
+    """
+    global _last_snapshot
+    if not ENABLED:
+        return
+    sizes = subsystems()
+    record = {
+        "label": str(label),
+        "time": time.time(),
+        "rss_bytes": process_memory()["rss_bytes"],
+        "subsystems": {name: s.get("bytes", 0) for name, s in sizes.items()},
+    }
+    if tracemalloc.is_tracing():
+        snapshot = _snapshot()
+        record["traced_bytes"] = tracemalloc.get_traced_memory()[0]
+        if _last_snapshot is not None:
+            diff = snapshot.compare_to(_last_snapshot, "lineno")
+            record["traced_delta_bytes"] = sum(d.size_diff for d in diff)
+            record["top"] = [{
+                "where": f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+                "size_diff": d.size_diff,
+                "count_diff": d.count_diff,
+            } for d in diff[:TOP_LINES] if d.size_diff]
+        _last_snapshot = snapshot
+    # Warn once per crossing, not at every move
+    for name, limit in _budgets.items():
+        if record["subsystems"].get(name, 0) > limit:
+            if name not in _over:
+                print(f"Memstats: {name} uses {record['subsystems'][name]} bytes (budget {limit})")
+            _over.add(name)
+        else:
+            _over.discard(name)
+    with _lock:
+        _checkpoints.append(record)
+
+
+def report():
+    """Full report: process RSS, subsystem sizes, budgets, tracemalloc totals and checkpoints."""
+    sizes = subsystems()
+    out = {
+        "time": time.time(),
+        "process": process_memory(),
+        "subsystems": sizes,
+        "accounted_bytes": sum(s.get("bytes", 0) for s in sizes.values()),
+        "over_budget": sorted(name for name, limit in _budgets.items()
+                              if sizes.get(name, {}).get("bytes", 0) > limit),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        out["tracemalloc"] = {"current_bytes": current, "peak_bytes": peak}
+    with _lock:
+        out["checkpoints"] = list(_checkpoints)
+    return out
+
+
+def format_report(rep=None):
+    """Human-readable lines for a report (the checkpoints are summarised by their count)."""
+    rep = rep or report()
+
+    def mb(n):
+        return "?" if n is None else f"{n / 1e6:.1f} MB"
+
+    lines = [f"rss {mb(rep['process']['rss_bytes'])} (peak {mb(rep['process']['peak_rss_bytes'])}), "
+             f"accounted {mb(rep['accounted_bytes'])}"]
+    for name, stats in rep["subsystems"].items():
+        counts = ", ".join(f"{k} {v}" for k, v in stats.items()
+                           if k != "bytes" and not isinstance(v, (list, dict)))
+        flag = " OVER BUDGET" if name in rep["over_budget"] else ""
+        lines.append(f"{name}: {mb(stats.get('bytes', 0))}" + (f" ({counts})" if counts else "") + flag)
+    if "tracemalloc" in rep:
+        t = rep["tracemalloc"]
+        lines.append(f"tracemalloc: {mb(t['current_bytes'])} (peak {mb(t['peak_bytes'])}), "
+                     f"{len(rep['checkpoints'])} checkpoints")
+    return lines
+
+
+def dump(path):
+    """Write report() as JSON."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report(), f, indent=2)
+
+
+# --- Switches ---
+
+def enable(export_path=None, trace=True, frames=1):
+    """
+    Turn checkpoints on; if export_path is given, the report is written at exit.
+
+    Args:
+        trace: also start tracemalloc (slows allocation-heavy code down, and a
+               checkpoint takes a snapshot, typically a fraction of a second)
+        frames: traceback depth tracemalloc records per allocation
+    """
+    global ENABLED, _export_path
+    ENABLED = True
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    if export_path:
+        _export_path = export_path
+
+
+def disable():
+    global ENABLED, _last_snapshot
+    ENABLED = False
+    _last_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    global _last_snapshot
+    with _lock:
+        _checkpoints.clear()
+    _over.clear()
+    _last_snapshot = None
+
+
+def _export_at_exit():
+    if not _export_path:
+        return
+    try:
+        dump(_export_path)
+        print(f"Memstats: report written to {_export_path}")
+    except Exception as e:
+        print(f"Memstats: failed to write report: {e}")
+
+
+atexit.register(_export_at_exit)
+
+if os.environ.get("CHESS_MEMSTATS"):
+    enable(os.environ["CHESS_MEMSTATS"], trace=os.environ.get("CHESS_MEMSTATS_TRACE", "1") != "0")
@@ -0,0 +1,127 @@
+# app/model/persistence.py
+# Background persistence: a single writer thread that coalesces bursts of
+# file writes so the GUI thread never blocks on JSON dumps.
+
+import atexit
+import json
+import os
+import threading
+import time
+
+
+def write_json_atomic(path, data):
+    """
+    Write `data` to `path` as JSON without ever leaving a half-written file.
+
+    The payload is written to a temporary file next to the target and then
+    moved over it with os.replace (atomic on the same filesystem).
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    # Serialise first, so data that can't be encoded doesn't leave a stray temp file
+    payload = data if isinstance(data, str) else json.dumps(data, indent=2)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+class PersistenceWorker:
+    """
+    Queue of pending writes keyed by target (usually the file path).
+
+    Submitting a job for a key that is already pending replaces the older
+    job, so a burst of saves to the same file results in a single flush.
+    The worker waits `delay` seconds after the first submit of a burst
+    before writing, which gives later submits the chance to coalesce.
+    """
+
+    def __init__(self, delay=0.25):
+        self.delay = delay
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopping = False
+        self.writes = 0
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, key, job):
+        """
+        Schedule `job()` to run on the worker thread.
+
+        Args:
+            key: identifies the target; only the latest job per key runs
+            job: callable performing the write
+        """
+        with self._lock:
+            if self._stopping:
+                # Late submit during shutdown: run inline so nothing is lost
+                run_inline = True
+            else:
+                run_inline = False
+                if key in self._pending:
+                    self.coalesced += 1
+                self._pending[key] = job
+                self._idle.clear()
+        if run_inline:
+            self._execute(job)
+            return
+        self._wakeup.set()
+
+    def discard(self, key):
+        """Drop the pending job for `key`, if it hasn't started. Returns True if one was dropped."""
+        with self._lock:
+            return self._pending.pop(key, None) is not None
+
+    def flush(self, timeout=None):
+        """Block until every pending write has reached disk."""
+        if threading.current_thread() is self._thread:
+            self._drain()
+            return True
+        self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Flush outstanding writes and stop the worker thread."""
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        # Anything that slipped in after the thread exited
+        self._drain()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            if not self._stopping and self.delay:
+                # Let the burst settle; submits during this window coalesce
+                time.sleep(self.delay)
+            self._wakeup.clear()
+            self._drain()
+            if self._stopping:
+                return
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
+                    return
+                key = next(iter(self._pending))
+                job = self._pending.pop(key)
+            self._execute(job)
+
+    def _execute(self, job):
+        try:
+            job()
+            self.writes += 1
+        except Exception as e:
+            print(f"Persistence error: {e}")
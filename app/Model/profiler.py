@@ -0,0 +1,250 @@
+# app/model/profiler.py
+# Opt-in instrumentation: spans, counters and per-stage latency histograms,
+# exported as Chrome trace (chrome://tracing, Perfetto) or a JSON summary.
+#
+# Disabled by default; when disabled span()/begin() return a shared no-op
+# object, so instrumented code pays one global lookup and a call.
+#
+# Enable with the environment variable CHESS_PROFILE=<trace.json> (exported at
+# exit, with a summary next to it) or programmatically with enable().
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+ENABLED = False
+
+# Cap on recorded trace events so long sessions stay bounded
+MAX_EVENTS = 1_000_000
+
+_lock = threading.Lock()
+_events = []
+_counters = defaultdict(float)
+_histograms = {}
+# Histograms kept by other components (always on), reported in summary()
+_external = {}
+_dropped = 0
+_t0 = time.perf_counter()
+_export_path = None
+
+
+class Histogram:
+    """
+    Log2-bucketed histogram with exact count/sum/min/max.
+    Values are latencies in microseconds unless another `unit` is given.
+    """
+
+    def __init__(self, unit="us"):
+        self.unit = unit
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, us):
+        self.count += 1
+        self.total += us
+        self.min = min(self.min, us)
+        self.max = max(self.max, us)
+        self.buckets[max(0, int(us).bit_length())] += 1
+
+    def percentile(self, q):
+        """Approximate percentile, interpolated linearly inside the log2 bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            n = self.buckets[b]
+            if seen + n >= target:
+                lo = max(float(2 ** (b - 1)) if b else 0.0, self.min)
+                hi = min(float(2 ** b), self.max)
+                return lo + (hi - lo) * (target - seen) / n
+            seen += n
+        return self.max
+
+    def summary(self):
+        u = self.unit
+        out = {"count": self.count}
+        if u == "us":
+            out["total_ms"] = self.total / 1000.0
+        else:
+            out["total"] = self.total
+        out.update({
+            f"mean_{u}": self.total / self.count if self.count else 0.0,
+            f"min_{u}": self.min if self.count else 0.0,
+            f"p50_{u}": self.percentile(0.50),
+            f"p90_{u}": self.percentile(0.90),
+            f"p99_{u}": self.percentile(0.99),
+            f"max_{u}": self.max,
+        })
+        return out
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = time.perf_counter()
+
+    def end(self):
+        _record(self.name, self.start, time.perf_counter(), self.args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Context manager timing a block: `with profiler.span("search", depth=3): ...`"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def begin(name, **args):
+    """Start a span that is ended later (possibly from another callback) with .end()"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def count(name, n=1):
+    """Add `n` to a counter; counters are also emitted as Chrome trace counter events."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += n
+        value = _counters[name]
+        _append({"name": name, "ph": "C", "ts": _us(time.perf_counter()),
+                 "pid": os.getpid(), "args": {"value": value}})
+
+
+def _us(t):
+    return (t - _t0) * 1e6
+
+
+def _append(event):
+    global _dropped
+    if len(_events) < MAX_EVENTS:
+        _events.append(event)
+    else:
+        _dropped += 1
+
+
+def _record(name, start, end, args):
+    dur = (end - start) * 1e6
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(dur)
+        event = {"name": name, "ph": "X", "ts": _us(start), "dur": dur,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        _append(event)
+
+
+def enable(export_path=None):
+    """Turn instrumentation on; if export_path is given, the trace is written at exit."""
+    global ENABLED, _export_path
+    ENABLED = True
+    if export_path:
+        _export_path = export_path
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    global _dropped
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _histograms.clear()
+        _dropped = 0
+
+
+def register_histogram(name, hist):
+    """Include a Histogram maintained elsewhere (e.g. GUI frame intervals) in summary()."""
+    with _lock:
+        _external[name] = hist
+
+
+def summary():
+    """Per-stage latency histograms and counter totals as a plain dict."""
+    with _lock:
+        return {
+            "spans": {name: h.summary() for name, h in sorted(_histograms.items())},
+            "histograms": {name: h.summary() for name, h in sorted(_external.items())},
+            "counters": dict(_counters),
+            "events": len(_events),
+            "dropped_events": _dropped,
+        }
+
+
+def export_chrome_trace(path):
+    """Write recorded events in Chrome trace-event format."""
+    with _lock:
+        data = {"traceEvents": list(_events), "displayTimeUnit": "ms"}
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def export_json(path):
+    """Write the summary (histograms + counters) as JSON."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(summary(), f, indent=2)
+
+
+def _export_at_exit():
+    if not _export_path:
+        return
+    try:
+        export_chrome_trace(_export_path)
+        root, _ = os.path.splitext(_export_path)
+        export_json(root + ".summary.json")
+        print(f"Profiler: trace written to {_export_path}")
+    except Exception as e:
+        print(f"Profiler: failed to export trace: {e}")
+
+
+atexit.register(_export_at_exit)
+
+if os.environ.get("CHESS_PROFILE"):
+    enable(os.environ["CHESS_PROFILE"])
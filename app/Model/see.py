@@ -0,0 +1,83 @@
+# app/model/see.py
+# Static Exchange Evaluation: the material outcome of the capture sequence a
+# move starts on its target square, assuming both sides always recapture with
+# their least valuable attacker and may stop when recapturing would lose.
+#
+# Attackers come from board.attackers_mask() with a shrinking occupancy mask,
+# so sliders hidden behind a piece that just captured (x-rays) join in.
+# Pins are ignored, as usual for SEE.
+
+import chess
+
+# Pawn units, like engine_med.VAL; the king only matters as a last attacker
+SEE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 100,
+}
+
+_ORDER = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+
+def _least_valuable(board, attackers, color):
+    """(square, piece type) of the cheapest piece of `color` in `attackers`, or None."""
+    for piece_type in _ORDER:
+        bb = attackers & board.pieces_mask(piece_type, color)
+        if bb:
+            return chess.lsb(bb), piece_type
+    return None
+
+
+def see(board: chess.Board, move: chess.Move) -> int:
+    """
+    Static exchange value of `move` for the side making it.
+
+    Args:
+        board: position before the move
+        move: pseudo-legal move (captures, quiet moves and promotions all work)
+
+    Returns:
+        expected material gain in pawn units (negative = the move loses material)
+    """
+    if board.is_castling(move):
+        return 0
+    to = move.to_square
+    occupied = board.occupied ^ chess.BB_SQUARES[move.from_square]
+    if board.is_en_passant(move):
+        victim = chess.PAWN
+        occupied ^= chess.BB_SQUARES[to - 8 if board.turn == chess.WHITE else to + 8]
+    else:
+        victim = board.piece_type_at(to)
+
+    gain = [SEE_VALUES[victim] if victim else 0]
+    on_square = SEE_VALUES[board.piece_type_at(move.from_square)]
+    if move.promotion:
+        gain[0] += SEE_VALUES[move.promotion] - SEE_VALUES[chess.PAWN]
+        on_square = SEE_VALUES[move.promotion]
+
+    color = not board.turn
+    while True:
+        found = _least_valuable(board, board.attackers_mask(color, to, occupied) & occupied, color)
+        if found is None:
+            break
+        square, piece_type = found
+        if piece_type == chess.KING and board.attackers_mask(not color, to, occupied) & occupied:
+            break  # the king can't recapture into a defended square
+        # Balance for `color` if the exchange stopped after this capture
+        gain.append(on_square - gain[-1])
+        on_square = SEE_VALUES[piece_type]
+        occupied ^= chess.BB_SQUARES[square]
+        color = not color
+
+    # Either side may decline to continue the exchange
+    for i in range(len(gain) - 1, 0, -1):
+        gain[i - 1] = -max(-gain[i - 1], gain[i])
+    return gain[0]
+
+
+def see_ge(board: chess.Board, move: chess.Move, threshold: int = 0) -> bool:
+    """True if the exchange started by `move` wins at least `threshold`."""
+    return see(board, move) >= threshold
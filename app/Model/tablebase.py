@@ -0,0 +1,180 @@
+# app/model/tablebase.py
+# Optional Syzygy endgame tablebase probing (via chess.syzygy).
+#
+# Tables are loaded from the directories in CHESS_SYZYGY_PATH (separated by
+# os.pathsep) or configured explicitly with configure(). Without tables every
+# probe returns None and the engines search as before.
+#
+# WDL values are from the side to move: 2 win, 1 cursed win (drawn by the
+# 50-move rule), 0 draw, -1 blessed loss, -2 loss.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import chess
+import chess.polyglot
+import chess.syzygy
+
+ENV_PATH = "CHESS_SYZYGY_PATH"
+ENV_PIECES = "CHESS_SYZYGY_PIECES"
+
+# Probe results kept per table type (positions, not bytes)
+DEFAULT_CACHE_SIZE = 200_000
+
+
+class Tablebase:
+    """
+    Args:
+        paths: directories containing .rtbw/.rtbz files
+        max_pieces: don't probe positions with more pieces (None = largest table found)
+        cache_size: probe results remembered per kind (wdl/dtz)
+    """
+
+    def __init__(self, paths, max_pieces: Optional[int] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        self._tb = chess.syzygy.Tablebase()
+        self.paths = []
+        self.files = 0
+        for path in paths:
+            if not os.path.isdir(path):
+                continue
+            self.files += self._tb.add_directory(path)
+            self.paths.append(path)
+        # Table names look like "KRPvKR"; the piece count is the letter count
+        largest = max((len(name) - 1 for name in self._tb.wdl), default=0)
+        self.max_pieces = min(max_pieces, largest) if max_pieces else largest
+        self.cache_size = cache_size
+        self._wdl = OrderedDict()
+        self._dtz = OrderedDict()
+        self._lock = threading.Lock()
+        self.probes = 0
+        self.cache_hits = 0
+        self.failures = 0
+        self.probe_time = 0.0
+
+    def available(self) -> bool:
+        return self.max_pieces > 0
+
+    def can_probe(self, board: chess.Board) -> bool:
+        """Cheap pre-check: few enough pieces and no castling rights."""
+        return (0 < chess.popcount(board.occupied) <= self.max_pieces
+                and not board.castling_rights)
+
+    def _probe(self, cache, fn, board):
+        if not self.can_probe(board):
+            return None
+        key = chess.polyglot.zobrist_hash(board)
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.cache_hits += 1
+                return cache[key]
+        start = time.perf_counter()
+        failed = False
+        try:
+            value = fn(board)
+        except (KeyError, ValueError):
+            # Missing table or a position the tables can't answer
+            value = None
+            failed = True
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.probes += 1
+            self.probe_time += elapsed
+            if failed:
+                self.failures += 1
+            cache[key] = value
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return value
+
+    def probe_wdl(self, board: chess.Board) -> Optional[int]:
+        """WDL of `board` for the side to move, or None if it can't be probed."""
+        return self._probe(self._wdl, self._tb.probe_wdl, board)
+
+    def probe_dtz(self, board: chess.Board) -> Optional[int]:
+        """Distance to zeroing (signed like WDL), or None if it can't be probed."""
+        return self._probe(self._dtz, self._tb.probe_dtz, board)
+
+    def root_move(self, board: chess.Board):
+        """
+        Perfect move for a tablebase position: win fastest, lose slowest.
+
+        Wins the 50-move rule turns into draws (the current halfmove clock plus
+        the DTZ after the move passes 100) rank as cursed wins, and losses it
+        saves as blessed losses.
+
+        Returns:
+            (move, wdl) with wdl from the side to move's point of view, or
+            None if any child position can't be probed
+        """
+        best, best_key, best_wdl = None, None, None
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    return move, 2
+                wdl = self.probe_wdl(board)
+                dtz = self.probe_dtz(board) if wdl is not None else None
+            finally:
+                board.pop()
+            if wdl is None or dtz is None:
+                return None
+            wdl = -wdl
+            if abs(wdl) == 2 and not zeroing and board.halfmove_clock + 1 + abs(dtz) > 100:
+                # The next zeroing move comes after the 50-move rule has drawn the game
+                wdl //= 2
+            # Winning: zero (capture/pawn move) now or soonest; losing: put it off longest
+            if wdl > 0:
+                key = (wdl, zeroing, -abs(dtz))
+            elif wdl < 0:
+                key = (wdl, not zeroing, abs(dtz))
+            else:
+                key = (0, False, 0)
+            if best_key is None or key > best_key:
+                best, best_key, best_wdl = move, key, wdl
+        return (best, best_wdl) if best is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "paths": self.paths,
+                "files": self.files,
+                "max_pieces": self.max_pieces,
+                "probes": self.probes,
+                "cache_hits": self.cache_hits,
+                "failures": self.failures,
+                "probe_time_ms": self.probe_time * 1000.0,
+                "cached": len(self._wdl) + len(self._dtz),
+            }
+
+    def close(self):
+        self._tb.close()
+
+
+def configure(path: Optional[str], max_pieces: Optional[int] = None) -> Optional[Tablebase]:
+    """
+    Build a Tablebase from an os.pathsep-separated directory list.
+
+    Returns:
+        Tablebase, or None if `path` is empty or holds no tables
+    """
+    if not path:
+        return None
+    tb = Tablebase([p for p in path.split(os.pathsep) if p], max_pieces)
+    if not tb.available():
+        tb.close()
+        return None
+    return tb
+
+
+def from_env() -> Optional[Tablebase]:
+    path = os.environ.get(ENV_PATH)
+    pieces = os.environ.get(ENV_PIECES)
+    tb = configure(path, int(pieces) if pieces else None)
+    if path and tb is None:
+        print(f"No Syzygy tables found in {path}")
+    return tb
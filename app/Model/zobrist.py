@@ -0,0 +1,109 @@
+# app/model/zobrist.py
+# Incremental polyglot Zobrist hashing for search, plus a hash stack for
+# repetition detection.
+#
+# Keys are identical to chess.polyglot.zobrist_hash(), so they can be shared
+# with the analysis cache, but piece keys are updated per move instead of
+# rescanning the board at every node.
+
+from typing import List
+
+import chess
+import chess.polyglot
+
+_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(_ARRAY)
+
+# PIECE_KEYS[color][piece_type][square]
+PIECE_KEYS = [[[0] * 64] + [[_ARRAY[64 * ((pt - 1) * 2 + color) + sq] for sq in chess.SQUARES]
+                            for pt in chess.PIECE_TYPES]
+              for color in (0, 1)]
+
+
+def _state_hash(board: chess.Board) -> int:
+    """Castling, en passant and turn part of the key."""
+    h = _HASHER.hash_castling(board) if board.castling_rights else 0
+    if board.ep_square is not None:
+        h ^= _HASHER.hash_ep_square(board)
+    if board.turn == chess.WHITE:
+        h ^= _ARRAY[780]
+    return h
+
+
+def move_delta(board: chess.Board, move: chess.Move) -> int:
+    """XOR change of the piece part of the key when `move` is played (call before pushing)."""
+    frm, to = move.from_square, move.to_square
+    color = board.turn
+    keys = PIECE_KEYS[color]
+    if board.is_castling(move):
+        rank = chess.square_rank(frm)
+        kingside = board.is_kingside_castling(move)
+        # Standard castling is encoded as the king's move (e1g1); Chess960 style as king-takes-rook
+        rook_from = to if board.rooks & board.occupied_co[color] & chess.BB_SQUARES[to] \
+            else chess.square(7 if kingside else 0, rank)
+        king_to = chess.square(6 if kingside else 2, rank)
+        rook_to = chess.square(5 if kingside else 3, rank)
+        return (keys[chess.KING][frm] ^ keys[chess.KING][king_to]
+                ^ keys[chess.ROOK][rook_from] ^ keys[chess.ROOK][rook_to])
+    piece_type = board.piece_type_at(frm)
+    delta = keys[piece_type][frm] ^ keys[move.promotion or piece_type][to]
+    if board.is_en_passant(move):
+        # The captured pawn sits one rank behind the target square
+        delta ^= PIECE_KEYS[not color][chess.PAWN][to ^ 8]
+    else:
+        captured = board.piece_type_at(to)
+        if captured:
+            delta ^= PIECE_KEYS[not color][captured][to]
+    return delta
+
+
+class HashStack:
+    """
+    Position keys along the current search line, starting with the game
+    positions since the last capture or pawn move. push()/pop() replace
+    board.push()/board.pop() inside the search.
+    """
+
+    def __init__(self, board: chess.Board):
+        # Earlier positions that can still repeat (bounded by the halfmove clock)
+        history = []
+        b = board.copy()
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            b.pop()
+            history.append(chess.polyglot.zobrist_hash(b))
+        history.reverse()
+        pieces = _HASHER.hash_board(board)
+        self._pieces: List[int] = [pieces]
+        self.keys: List[int] = history + [pieces ^ _state_hash(board)]
+        self._root = len(self.keys)
+
+    @property
+    def key(self) -> int:
+        return self.keys[-1]
+
+    @property
+    def ply(self) -> int:
+        """Moves pushed since the stack was created (distance from the search root)."""
+        return len(self.keys) - self._root
+
+    def push(self, board: chess.Board, move: chess.Move):
+        pieces = self._pieces[-1] ^ move_delta(board, move)
+        board.push(move)
+        self._pieces.append(pieces)
+        self.keys.append(pieces ^ _state_hash(board))
+
+    def pop(self, board: chess.Board) -> chess.Move:
+        self._pieces.pop()
+        self.keys.pop()
+        return board.pop()
+
+    def is_repetition(self, halfmove_clock: int) -> bool:
+        """True if the current position already occurred since the last irreversible move."""
+        keys = self.keys
+        n = len(keys)
+        key = keys[-1]
+        # Same side to move every second ply; a cycle needs at least four plies
+        for i in range(n - 5, max(n - 2 - halfmove_clock, -1), -2):
+            if keys[i] == key:
+                return True
+        return False
@@ -0,0 +1,153 @@
+# app/View/board_renderer.py
+# Retained-mode board renderer for the Tk canvas.
+#
+# All square, highlight and piece items are created once. Each render()
+# computes what every square should look like and only calls itemconfig on
+# squares whose fill, marker or piece actually changed. Frame times are
+# recorded so slow (e.g. remote desktop) sessions can be diagnosed.
+
+import time
+
+import chess
+
+from app.Model import profiler
+from app.Model.profiler import Histogram
+
+PIECE_FONT = ("Arial", 40)
+
+# Hidden items are left in place and toggled with state=
+_HIDDEN = "hidden"
+_NORMAL = "normal"
+
+
+class BoardRenderer:
+    def __init__(self, canvas, square_size, colors, pieces, render_time=None, frame_interval=None):
+        """
+        Args:
+            canvas: tk.Canvas to draw on
+            square_size: pixels per square
+            colors: dict with light, dark, last_light, last_dark, check, selected, move, capture
+            pieces: piece symbol -> unicode glyph
+            render_time, frame_interval: Histograms to record into, so statistics
+                can outlive the renderer (a new one is made per game)
+        """
+        self.canvas = canvas
+        self.size = square_size
+        self.colors = colors
+        self.pieces = pieces
+        self.render_time = render_time if render_time is not None else Histogram()
+        self.frame_interval = frame_interval if frame_interval is not None else Histogram()
+        self._squares = {}
+        self._dots = {}
+        self._rings = {}
+        self._shadows = {}
+        self._glyphs = {}
+        # Last drawn state per square: (fill, marker, piece symbol)
+        self._drawn = {}
+        self._build()
+
+    def _xy(self, sq):
+        c, r = chess.square_file(sq), 7 - chess.square_rank(sq)
+        return c * self.size, r * self.size
+
+    def center(self, sq):
+        x, y = self._xy(sq)
+        return x + self.size // 2, y + self.size // 2
+
+    def _build(self):
+        cv = self.canvas
+        s = self.size
+        for sq in chess.SQUARES:
+            x1, y1 = self._xy(sq)
+            self._squares[sq] = cv.create_rectangle(x1, y1, x1 + s, y1 + s, fill="", outline="", tags=("square",))
+        # Highlight layer above squares, below pieces
+        for sq in chess.SQUARES:
+            x1, y1 = self._xy(sq)
+            cx, cy = x1 + s / 2, y1 + s / 2
+            self._dots[sq] = cv.create_oval(cx - 10, cy - 10, cx + 10, cy + 10, fill=self.colors["move"],
+                                            outline="", state=_HIDDEN, tags=("marker",))
+            self._rings[sq] = cv.create_rectangle(x1 + 5, y1 + 5, x1 + s - 5, y1 + s - 5,
+                                                  outline=self.colors["capture"], width=4,
+                                                  state=_HIDDEN, tags=("marker",))
+        for sq in chess.SQUARES:
+            x, y = self.center(sq)
+            self._shadows[sq] = cv.create_text(x + 1, y + 1, text="", font=PIECE_FONT, fill="gray", tags=("piece",))
+            self._glyphs[sq] = cv.create_text(x, y, text="", font=PIECE_FONT, fill="white", tags=("piece",))
+
+    def _square_fill(self, sq, board, state, last, selected):
+        light = (chess.square_file(sq) + 7 - chess.square_rank(sq)) % 2 == 0
+        color = self.colors["light"] if light else self.colors["dark"]
+        if last is not None and sq in (last.from_square, last.to_square):
+            color = self.colors["last_light"] if light else self.colors["last_dark"]
+        if state.in_check and sq == board.king(board.turn):
+            color = self.colors["check"]
+        if selected == sq:
+            color = self.colors["selected"]
+        return color
+
+    def render(self, game, selected=None, exclude_square=None):
+        """
+        Bring the canvas in line with `game`, touching only changed squares.
+
+        Args:
+            game: Game instance (uses its cached PositionState)
+            selected: selected square (shows its legal moves) or None
+            exclude_square: square whose piece is hidden (being animated)
+
+        Returns:
+            number of squares that were updated
+        """
+        start = time.perf_counter()
+        span = profiler.begin("gui.render")
+        board = game.b
+        state = game.state()
+        last = board.peek() if board.move_stack else None
+
+        markers = {}
+        if selected is not None and board.piece_at(selected):
+            for move in state.by_from.get(selected, []):
+                markers[move.to_square] = "capture" if move in state.captures else "move"
+
+        cv = self.canvas
+        changed = 0
+        for sq in chess.SQUARES:
+            fill = self._square_fill(sq, board, state, last, selected)
+            marker = markers.get(sq)
+            piece = board.piece_at(sq) if sq != exclude_square else None
+            symbol = piece.symbol() if piece else None
+            old = self._drawn.get(sq)
+            if old == (fill, marker, symbol):
+                continue
+            changed += 1
+            old_fill, old_marker, old_symbol = old if old else (None, None, None)
+            if fill != old_fill:
+                cv.itemconfigure(self._squares[sq], fill=fill)
+            if marker != old_marker:
+                cv.itemconfigure(self._dots[sq], state=_NORMAL if marker == "move" else _HIDDEN)
+                cv.itemconfigure(self._rings[sq], state=_NORMAL if marker == "capture" else _HIDDEN)
+            if symbol != old_symbol:
+                if symbol:
+                    glyph = self.pieces[symbol]
+                    color = "white" if piece.color == chess.WHITE else "black"
+                    cv.itemconfigure(self._shadows[sq], text=glyph)
+                    cv.itemconfigure(self._glyphs[sq], text=glyph, fill=color)
+                else:
+                    cv.itemconfigure(self._shadows[sq], text="")
+                    cv.itemconfigure(self._glyphs[sq], text="")
+            self._drawn[sq] = (fill, marker, symbol)
+        span.end()
+        self.render_time.add((time.perf_counter() - start) * 1e6)
+        return changed
+
+    def invalidate(self):
+        """Force the next render() to refresh every square."""
+        self._drawn.clear()
+
+    def create_floating_piece(self, symbol, sq):
+        """Create the temporary items used to animate a piece; returns (shadow, glyph)."""
+        x, y = self.center(sq)
+        glyph = self.pieces[symbol]
+        color = "white" if symbol.isupper() else "black"
+        shadow = self.canvas.create_text(x + 1, y + 1, text=glyph, font=PIECE_FONT, fill="gray")
+        item = self.canvas.create_text(x, y, text=glyph, font=PIECE_FONT, fill=color)
+        return shadow, item
@@ -2,9 +2,15 @@
 import tkinter as tk
 from tkinter import messagebox
 import chess
+import queue
 import threading
 import time
+from app.Model import memstats, profiler
+from app.Model.engine_med import mate_in
+from app.Model.engine_api import SearchLimits
 from app.Model.history import HistoryManager
+from app.Model.profiler import Histogram
+from app.View.board_renderer import BoardRenderer
 
 # --- Theme & Constants ---
 SQUARE_SIZE = 80
@@ -25,8 +31,18 @@ COLOR_HIGHLIGHT_CAPTURE = "#FF6347"
 COLOR_HIGHLIGHT_SELECTED = "#FFD700"
 COLOR_HIGHLIGHT_CHECK = "#8B0000"
 COLOR_LAST_MOVE = "#FFFFE0"
+COLOR_LAST_MOVE_LIGHT = "#F0F0D0"
+COLOR_LAST_MOVE_DARK = "#606040"
 
-PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+# Move animation length and target frame spacing
+ANIMATION_MS = 150
+FRAME_MS = 15
+
+# Hard cap on AI think time; the search returns its best move so far when it hits
+AI_TIME_LIMIT = 10.0
+
+# How often the Tk thread drains search progress events
+SEARCH_POLL_MS = 100
 
 UNICODE_PIECES = {
     'P': '♙', 'N': '♘', 'B': '♗', 'R': '♖', 'Q': '♕', 'K': '♔',
@@ -34,11 +50,19 @@ UNICODE_PIECES = {
 }
 
 class InteractiveGui:
-    def __init__(self, game, ai_func, on_game_end_callback=None):
+    def __init__(self, game, ai_func, on_game_end_callback=None, writer=None, on_close_callback=None):
         self.game = game
         self.ai_func = ai_func
         self.on_game_end_callback = on_game_end_callback
-        self.history_manager = HistoryManager()
+        self.on_close_callback = on_close_callback
+        self.writer = writer
+        self.history_manager = HistoryManager(writer=writer)
+        memstats.watch(self.history_manager)
+        # Board render and animation frame timings for the whole session
+        self.render_time = Histogram()
+        self.frame_interval = Histogram()
+        profiler.register_histogram("gui.render", self.render_time)
+        profiler.register_histogram("gui.frame_interval", self.frame_interval)
         
         self.root = tk.Tk()
         self.root.title("Chess AI - Master Edition")
@@ -53,6 +77,9 @@ class InteractiveGui:
         self.ai_thinking = False
         self.level = 2
         self.animating = False
+        self.search_limits = None  # SearchLimits of the running AI search
+        self.search_id = 0         # bumped per search so stale results are dropped
+        self.search_info = {}      # latest merged progress fields of the running search
 
         # UI Containers
         self.container = tk.Frame(self.root, bg=COLOR_BG)
@@ -66,6 +93,7 @@ class InteractiveGui:
 
     # --- Main Menu ---
     def show_main_menu(self):
+        self.cancel_search()
         self.clear_container()
         
         frame = tk.Frame(self.container, bg=COLOR_BG)
@@ -130,6 +158,7 @@ class InteractiveGui:
 
     # --- Game View ---
     def start_game(self, level):
+        self.cancel_search()
         self.level = level
         self.game.reset()
         self.game_over = False
@@ -143,6 +172,12 @@ class InteractiveGui:
         self.canvas = tk.Canvas(self.container, width=BOARD_SIZE, height=BOARD_SIZE, bg=COLOR_BG, highlightthickness=0)
         self.canvas.pack(side=tk.LEFT)
         self.canvas.bind("<Button-1>", self.on_click)
+        self.renderer = BoardRenderer(self.canvas, SQUARE_SIZE, {
+            "light": COLOR_LIGHT, "dark": COLOR_DARK,
+            "last_light": COLOR_LAST_MOVE_LIGHT, "last_dark": COLOR_LAST_MOVE_DARK,
+            "check": COLOR_HIGHLIGHT_CHECK, "selected": COLOR_HIGHLIGHT_SELECTED,
+            "move": COLOR_HIGHLIGHT_MOVES, "capture": COLOR_HIGHLIGHT_CAPTURE,
+        }, UNICODE_PIECES, render_time=self.render_time, frame_interval=self.frame_interval)
 
         self.panel = tk.Frame(self.container, width=PANEL_WIDTH, bg=COLOR_BG)
         self.panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
@@ -161,6 +196,10 @@ class InteractiveGui:
         self.lbl_status = tk.Label(self.panel, text="White to move", font=("Helvetica", 14), bg=COLOR_BG, fg="#AAAAAA", wraplength=PANEL_WIDTH-20)
         self.lbl_status.pack(pady=20)
 
+        self.lbl_search = tk.Label(self.panel, text="", font=("Courier", 10), bg=COLOR_BG, fg="#AAAAAA",
+                                   justify=tk.LEFT, anchor="w", wraplength=PANEL_WIDTH-20)
+        self.lbl_search.pack(fill=tk.X, padx=10)
+
         self.pause_menu = tk.Frame(self.container, bg=COLOR_BG, bd=2, relief=tk.RAISED)
         self.game_over_window = tk.Frame(self.container, bg=COLOR_BG, bd=2, relief=tk.RAISED)
         
@@ -168,99 +207,52 @@ class InteractiveGui:
         self.update_score()
 
     def draw_board(self, exclude_square=None):
-        self.canvas.delete("all")
-        board = self.game.b
-        
-        # Squares
-        for r in range(8):
-            for c in range(8):
-                color = COLOR_LIGHT if (r + c) % 2 == 0 else COLOR_DARK
-                x1, y1 = c * SQUARE_SIZE, r * SQUARE_SIZE
-                x2, y2 = x1 + SQUARE_SIZE, y1 + SQUARE_SIZE
-                
-                if board.move_stack:
-                    last = board.peek()
-                    if chess.square(c, 7-r) in [last.from_square, last.to_square]:
-                         color = "#F0F0D0" if (r+c)%2 == 0 else "#606040"
-
-                piece = board.piece_at(chess.square(c, 7-r))
-                if piece and piece.piece_type == chess.KING and piece.color == board.turn and board.is_check():
-                    color = COLOR_HIGHLIGHT_CHECK
-
-                if self.selected_square == chess.square(c, 7-r):
-                    color = COLOR_HIGHLIGHT_SELECTED
-
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-
-        # Legal Moves
-        if self.selected_square is not None:
-            piece = board.piece_at(self.selected_square)
-            if piece:
-                for move in board.legal_moves:
-                    if move.from_square == self.selected_square:
-                        tc, tr = chess.square_file(move.to_square), 7 - chess.square_rank(move.to_square)
-                        tx1, ty1 = tc * SQUARE_SIZE, tr * SQUARE_SIZE
-                        tx2, ty2 = tx1 + SQUARE_SIZE, ty1 + SQUARE_SIZE
-                        
-                        if board.is_capture(move) or board.is_en_passant(move):
-                            self.canvas.create_rectangle(tx1+5, ty1+5, tx2-5, ty2-5, outline=COLOR_HIGHLIGHT_CAPTURE, width=4)
-                        else:
-                            cx, cy = (tx1+tx2)/2, (ty1+ty2)/2
-                            self.canvas.create_oval(cx-10, cy-10, cx+10, cy+10, fill=COLOR_HIGHLIGHT_MOVES, outline="")
-
-        # Pieces
-        for sq, piece in board.piece_map().items():
-            if exclude_square == sq: continue # Skip drawing piece being animated
-            
-            c, r = chess.square_file(sq), 7 - chess.square_rank(sq)
-            x, y = c * SQUARE_SIZE + SQUARE_SIZE // 2, r * SQUARE_SIZE + SQUARE_SIZE // 2
-            
-            txt = UNICODE_PIECES[piece.symbol()]
-            color = "white" if piece.color == chess.WHITE else "black"
-            self.canvas.create_text(x+1, y+1, text=txt, font=("Arial", 40), fill="gray")
-            self.canvas.create_text(x, y, text=txt, font=("Arial", 40), fill=color)
+        # Retained-mode: only squares whose fill, marker or piece changed are touched
+        self.renderer.render(self.game, self.selected_square, exclude_square)
 
     def animate_move(self, move, callback):
         self.animating = True
+        span = profiler.begin("gui.animate", move=move)
         board = self.game.b
         piece = board.piece_at(move.from_square)
         if not piece: # Should not happen
+            self.animating = False
             callback()
             return
 
-        start_c, start_r = chess.square_file(move.from_square), 7 - chess.square_rank(move.from_square)
-        end_c, end_r = chess.square_file(move.to_square), 7 - chess.square_rank(move.to_square)
-        
-        start_x = start_c * SQUARE_SIZE + SQUARE_SIZE // 2
-        start_y = start_r * SQUARE_SIZE + SQUARE_SIZE // 2
-        end_x = end_c * SQUARE_SIZE + SQUARE_SIZE // 2
-        end_y = end_r * SQUARE_SIZE + SQUARE_SIZE // 2
+        start_x, start_y = self.renderer.center(move.from_square)
+        end_x, end_y = self.renderer.center(move.to_square)
         
-        # Draw board without the moving piece
+        # Hide the moving piece on its origin square (a one-square update)
         self.draw_board(exclude_square=move.from_square)
         
         # Create animated piece
-        txt = UNICODE_PIECES[piece.symbol()]
-        color = "white" if piece.color == chess.WHITE else "black"
-        shadow_item = self.canvas.create_text(start_x+1, start_y+1, text=txt, font=("Arial", 40), fill="gray")
-        piece_item = self.canvas.create_text(start_x, start_y, text=txt, font=("Arial", 40), fill=color)
+        shadow_item, piece_item = self.renderer.create_floating_piece(piece.symbol(), move.from_square)
         
-        steps = 10
-        dx = (end_x - start_x) / steps
-        dy = (end_y - start_y) / steps
+        # Position follows wall-clock time, so slow frames skip ahead instead of
+        # stretching the animation
+        t0 = time.perf_counter()
+        last = [t0]
         
-        def step(i):
-            if i < steps:
-                self.canvas.move(shadow_item, dx, dy)
-                self.canvas.move(piece_item, dx, dy)
-                self.root.after(15, lambda: step(i+1))
+        def step():
+            now = time.perf_counter()
+            self.renderer.frame_interval.add((now - last[0]) * 1e6)
+            last[0] = now
+            f = min((now - t0) * 1000.0 / ANIMATION_MS, 1.0)
+            x = start_x + (end_x - start_x) * f
+            y = start_y + (end_y - start_y) * f
+            self.canvas.coords(shadow_item, x + 1, y + 1)
+            self.canvas.coords(piece_item, x, y)
+            if f < 1.0:
+                self.root.after(FRAME_MS, step)
             else:
                 self.canvas.delete(shadow_item)
                 self.canvas.delete(piece_item)
                 self.animating = False
+                span.end()
                 callback()
 
-        step(0)
+        step()
 
     def make_move(self, move):
         # Animate first, then push move
@@ -277,20 +269,100 @@ class InteractiveGui:
             self.ai_thinking = True
             self.lbl_status.config(text="AI is thinking...", fg="#4FC3F7")
             self.root.update()
-            threading.Thread(target=self.run_ai, daemon=True).start()
-
-    def run_ai(self):
+            self.start_ai_search()
+
+    def start_ai_search(self):
+        self.cancel_search()
+        self.search_id += 1
+        # The worker thread only ever talks to Tk through this queue
+        events = queue.SimpleQueue()
+        # Before the limits exist, so sizing and snapshots aren't charged to the AI's thinking time
+        memstats.checkpoint(f"ply {self.game.b.ply()}")
+        self.search_limits = SearchLimits(info=events)
+        self.search_info = {}
+        self.lbl_search.config(text="")
+        search_id = self.search_id
+        self.root.after(SEARCH_POLL_MS, lambda: self.poll_search(search_id, events))
+        threading.Thread(target=self.run_ai, args=(search_id, self.search_limits), daemon=True).start()
+
+    def cancel_search(self):
+        # Abandoned searches stop at their next limits check and their move is ignored
+        if self.search_limits is not None:
+            self.search_limits.token.cancel()
+            self.search_limits = None
+        self.search_id += 1
+
+    def run_ai(self, search_id, limits):
+        token = limits.token
         try:
-            time.sleep(0.5)
-            while self.paused: time.sleep(0.1)
-            move = self.ai_func(self.level, self.game.copy_board())
-            self.root.after(0, lambda: self.start_ai_animation(move))
+            with profiler.span("gui.ai_delay"):
+                if token.wait(0.5): return
+                while self.paused:
+                    if token.wait(0.1): return
+            # The think budget starts once the delay/pause is over
+            limits.start = time.perf_counter()
+            limits.hard_deadline = limits.start + AI_TIME_LIMIT
+            with profiler.span("gui.ai_think", level=self.level):
+                move = self.ai_func(self.level, self.game.copy_board(), limits)
+            if token.cancelled: return
+            limits.info.put({"type": "done", "move": move})
         except Exception as e:
             print(f"AI Error: {e}")
-            self.ai_thinking = False
-            self.lbl_status.config(text="AI Error", fg="red")
-
-    def start_ai_animation(self, move):
+            limits.info.put({"type": "error", "error": str(e)})
+
+    def poll_search(self, search_id, events):
+        # Tk thread: drain everything the search posted and redraw the panel once
+        if search_id != self.search_id: return  # abandoned search
+        updated = False
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event["type"]
+            if kind == "info":
+                self.search_info.update(event)
+                updated = True
+            elif kind == "done":
+                self.show_search_info()
+                self.start_ai_animation(event["move"], search_id)
+                return
+            elif kind == "error":
+                self.ai_thinking = False
+                self.lbl_status.config(text="AI Error", fg="red")
+                return
+        if updated:
+            self.show_search_info()
+        self.root.after(SEARCH_POLL_MS, lambda: self.poll_search(search_id, events))
+
+    def show_search_info(self):
+        info = self.search_info
+        lines = []
+        if "depth" in info:
+            # Engines score from the side to move; show it from White's side
+            score = info["score"] if self.game.turn() else -info["score"]
+            mate = mate_in(score)
+            if mate is not None:
+                lines.append(f"Depth {info['depth']}  Mate {'+' if mate > 0 else '-'}{abs(mate)}")
+            else:
+                lines.append(f"Depth {info['depth']}  Eval {score:+.2f}")
+        if "nodes" in info:
+            lines.append(f"Nodes {info['nodes']:,}  {info.get('nps', 0) / 1000:.1f} kN/s")
+        if info.get("pv"):
+            try:
+                pv = self.game.b.variation_san([chess.Move.from_uci(u) for u in info["pv"]])
+            except ValueError:
+                pv = " ".join(info["pv"])
+            lines.append(f"PV: {pv}")
+        if info.get("source") == "memory":
+            lines.append("Move from learned memory")
+        elif info.get("source") == "mate":
+            lines.append("Forced mate found by mate search")
+        self.lbl_search.config(text="\n".join(lines))
+
+    def start_ai_animation(self, move, search_id):
+        if search_id != self.search_id: return  # stale result from an abandoned search
+        self.search_limits = None
         if self.game_over: return
         if move:
             self.animate_move(move, lambda: self.finalize_ai_move(move))
@@ -308,18 +380,26 @@ class InteractiveGui:
 
     def check_game_over(self):
         if self.game.is_over():
-            self.game_over = True
-            result = self.game.result()
-            self.show_game_over_window(result)
-            
-            # Save History
-            winner_color = None
-            if result == "1-0": winner_color = True
-            elif result == "0-1": winner_color = False
-            self.history_manager.save_game(result, self.level, winner_color)
-            
-            if self.on_game_end_callback:
-                self.on_game_end_callback(self.game)
+            with profiler.span("gui.game_over"):
+                self._handle_game_over()
+
+    def _handle_game_over(self):
+        self.game_over = True
+        result = self.game.result()
+        self.show_game_over_window(result)
+        
+        # Save History
+        winner_color = None
+        if result == "1-0": winner_color = True
+        elif result == "0-1": winner_color = False
+        board = self.game.b
+        start = board.root()
+        start_fen = start.fen() if start.fen() != chess.STARTING_FEN else None
+        self.history_manager.save_game(result, self.level, winner_color,
+                                       moves=[m.uci() for m in board.move_stack], start_fen=start_fen)
+        
+        if self.on_game_end_callback:
+            self.on_game_end_callback(self.game)
 
     def show_game_over_window(self, result):
         self.game_over_window.place(relx=0.5, rely=0.5, anchor=tk.CENTER, width=400, height=300)
@@ -337,8 +417,7 @@ class InteractiveGui:
                   bg=COLOR_BTN, fg=COLOR_TEXT, font=("Helvetica", 14), width=15).pack(pady=30)
 
     def update_score(self):
-        w_mat = sum(PIECE_VALUES.get(p.piece_type, 0) for p in self.game.b.piece_map().values() if p.color == chess.WHITE)
-        b_mat = sum(PIECE_VALUES.get(p.piece_type, 0) for p in self.game.b.piece_map().values() if p.color == chess.BLACK)
+        w_mat, b_mat = self.game.material()
         diff = w_mat - b_mat
         txt = f"Score: +{diff}" if diff > 0 else (f"Score: {diff}" if diff < 0 else "Score: 0")
         self.lbl_score.config(text=txt)
@@ -383,7 +462,7 @@ class InteractiveGui:
                        (self.game.b.turn == chess.BLACK and chess.square_rank(sq) == 0):
                         move = chess.Move(self.selected_square, sq, promotion=chess.QUEEN)
 
-                if move in self.game.b.legal_moves:
+                if self.game.is_legal(move):
                     self.make_move(move)
                     return
 
@@ -396,4 +475,17 @@ class InteractiveGui:
                 self.draw_board()
 
     def start(self):
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
+
+    def on_close(self):
+        if self.on_close_callback:
+            self.on_close_callback()
+        # Make sure queued history/learning writes reach disk before exiting
+        if self.writer is not None:
+            self.writer.flush(timeout=5.0)
+        frames = self.frame_interval.summary()
+        if frames["count"]:
+            print(f"Animation frames: {frames['count']}, interval p50 {frames['p50_us'] / 1000:.1f} ms, "
+                  f"p99 {frames['p99_us'] / 1000:.1f} ms, max {frames['max_us'] / 1000:.1f} ms")
+        self.root.destroy()
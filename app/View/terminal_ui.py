@@ -3,6 +3,8 @@
 
 import sys
 
+from app.Model.engine_med import mate_in
+
 def show_board(game):
     # game: Game instance
     print()
@@ -32,3 +34,31 @@ def choose_level():
         if v in ("1","2","3"):
             return int(v)
         print("enter 1, 2, or 3")
+
+# --- Batch analysis output ---
+
+def format_score(score):
+    # score: pawns from the side to move's point of view (None if the engine reports none)
+    if score is None:
+        return "-"
+    mate = mate_in(score)
+    if mate is not None:
+        return f"#{mate}" if mate > 0 else f"-#{-mate}"
+    return f"{score:+.2f}"
+
+def show_analysis_header():
+    print(f"{'#':>4} {'Id':<18} {'Move':<8} {'Score':>7} {'Depth':>5} {'Nodes':>9} {'Time':>7}  {'Result':<6} PV")
+    print("-" * 90)
+
+def show_analysis_result(r):
+    mark = {True: "ok", False: "FAIL", None: ""}[r["solved"]]
+    depth = r["depth"] if r["depth"] is not None else "-"
+    print(f"{r['index'] + 1:>4} {r['id'][:18]:<18} {r['san'] or '-':<8} {format_score(r['score']):>7} "
+          f"{depth:>5} {r['nodes']:>9} {r['time']:>6.2f}s  {mark:<6} {r['pv']}")
+
+def show_analysis_summary(s):
+    print()
+    print(f"Positions: {s['positions']}  nodes: {s['nodes']}  nps: {s['nps']}  "
+          f"wall: {s['elapsed']:.1f}s ({s['positions_per_s']:.2f} pos/s)")
+    if s["scored"]:
+        print(f"Solved: {s['solved']}/{s['scored']} ({s['solve_rate']:.1%})")
@@ -0,0 +1,373 @@
+"""
+Benchmark suite for move generation, search, SEE, learned-move ordering,
+inference, eval tuning and persistence.
+
+Results are written as JSON and can be compared against a stored baseline:
+
+    python benchmark.py                              # run everything, print JSON
+    python benchmark.py --suite perft --suite search # selected suites only
+    python benchmark.py --out bench.json --save-baseline data/bench_baseline.json
+    python benchmark.py --baseline data/bench_baseline.json --tolerance 0.10
+    python benchmark.py --suite persistence --sizes 1000 100000 10000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import chess
+import numpy as np
+
+from app.Model import engine_med, engine_hard, rep, see
+from app.Model import learning, history
+from app.Controller import texel
+
+# Standard perft positions with known node counts (chessprogramming wiki)
+PERFT_POSITIONS = {
+    "startpos": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", {1: 48, 2: 2039, 3: 97862}),
+    "pos3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", {1: 14, 2: 191, 3: 2812, 4: 43238}),
+    "pos4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", {1: 6, 2: 264, 3: 9467}),
+}
+
+# Middlegame/endgame positions for fixed-depth search timing
+SEARCH_POSITIONS = {
+    "startpos": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "italian": "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "middlegame": "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "endgame": "8/5pk1/6p1/8/3R4/6P1/5PK1/3r4 w - - 0 40",
+}
+
+
+def perft(board, depth):
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def timed(fn, repeat):
+    """Run fn `repeat` times; return (median seconds, last result)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def metric(value, unit, higher_is_better=True, **extra):
+    out = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+    out.update(extra)
+    return out
+
+
+# --- Suites ---
+
+def bench_perft(args):
+    results = {}
+    for name, (fen, expected) in PERFT_POSITIONS.items():
+        depth = min(args.perft_depth, max(expected))
+        board = chess.Board(fen)
+        secs, nodes = timed(lambda: perft(board, depth), args.repeat)
+        if nodes != expected[depth]:
+            raise AssertionError(f"perft {name} depth {depth}: got {nodes}, expected {expected[depth]}")
+        results[f"perft.{name}.d{depth}"] = metric(nodes / secs, "nodes/s", nodes=nodes, seconds=secs)
+    return results
+
+
+def bench_search(args):
+    results = {}
+    for name, fen in SEARCH_POSITIONS.items():
+        board = chess.Board(fen)
+
+        def run():
+            random.seed(0)
+            engine_med.clear_transposition_table()
+            engine_med.reset_node_count()
+            engine_med.best_move(board, depth=args.search_depth)
+            return engine_med.node_count()
+
+        secs, nodes = timed(run, args.repeat)
+        results[f"search.{name}.d{args.search_depth}.nps"] = metric(nodes / secs, "nodes/s", nodes=nodes)
+        results[f"search.{name}.d{args.search_depth}.time"] = metric(secs, "s", higher_is_better=False)
+    return results
+
+
+def bench_see(args):
+    results = {}
+    positions = dict(SEARCH_POSITIONS, kiwipete=PERFT_POSITIONS["kiwipete"][0])
+    for name, fen in positions.items():
+        board = chess.Board(fen)
+        captures = [m for m in board.legal_moves if board.is_capture(m)] or list(board.legal_moves)
+        calls = captures * max(1, 2000 // len(captures))
+        secs, _ = timed(lambda: [see.see(board, m) for m in calls], args.repeat)
+        results[f"see.{name}"] = metric(len(calls) / secs, "calls/s", moves=len(captures))
+    return results
+
+
+def _teach(mem, board, plies, depth):
+    # Record the depth-`depth` best move of `board` and of every position up
+    # to `plies` plies below it, as if earlier games had gone through them
+    if plies == 0 or board.is_game_over():
+        return
+    random.seed(0)
+    engine_med.clear_transposition_table()
+    move, _ = engine_med.search_root(board, depth)
+    if move is None:
+        return
+    key = board.board_fen() + (" w" if board.turn == chess.WHITE else " b")
+    mem.memory[key] = {move.uci(): 1}
+    for child in list(board.legal_moves):
+        board.push(child)
+        _teach(mem, board, plies - 1, max(1, depth - 1))
+        board.pop()
+
+
+def bench_prior(args):
+    """Nodes searched with and without LearningMemory as a move-ordering prior."""
+    results = {}
+    saved = engine_med.get_move_prior()
+    try:
+        for name, fen in SEARCH_POSITIONS.items():
+            board = chess.Board(fen)
+            mem = learning.LearningMemory()
+            mem.memory = {}
+            engine_med.set_move_prior(None)
+            _teach(mem, board, 2, args.search_depth)
+
+            nodes = {}
+            for label, prior in (("off", None), ("on", mem)):
+                engine_med.set_move_prior(prior)
+
+                def run():
+                    random.seed(0)
+                    engine_med.clear_transposition_table()
+                    engine_med.reset_node_count()
+                    engine_med.best_move(board, depth=args.search_depth)
+                    return engine_med.node_count()
+
+                secs, nodes[label] = timed(run, args.repeat)
+                results[f"prior.{name}.d{args.search_depth}.{label}.time"] = metric(
+                    secs, "s", higher_is_better=False, nodes=nodes[label])
+            results[f"prior.{name}.d{args.search_depth}.node_reduction"] = metric(
+                1.0 - nodes["on"] / nodes["off"], "fraction", learned_positions=len(mem.memory))
+    finally:
+        engine_med.set_move_prior(saved)
+    return results
+
+
+def bench_hard(args):
+    engine = engine_hard.HardEngine()
+    if engine.model is None:
+        return {"hard.skipped": metric(0, "n/a", reason="no model loaded (tensorflow or model file missing)")}
+    results = {}
+    board = chess.Board(SEARCH_POSITIONS["middlegame"])
+    secs, _ = timed(lambda: engine.pick(board), args.repeat)
+    n_moves = board.legal_moves.count()
+    results["hard.pick.latency"] = metric(secs, "s", higher_is_better=False, children=n_moves)
+    results["hard.pick.per_child"] = metric(secs / n_moves, "s", higher_is_better=False)
+    for batch in (1, 8, 32, 128):
+        x = np.concatenate([engine_hard.board_to_tensor(board)] * batch, axis=0)
+        secs, _ = timed(lambda: engine.model.predict(x, verbose=0), args.repeat)
+        results[f"hard.predict.batch{batch}"] = metric(secs, "s", higher_is_better=False,
+                                                       per_position=secs / batch)
+    return results
+
+
+def bench_tensor(args):
+    results = {}
+    boards = []
+    board = chess.Board()
+    rng = random.Random(0)
+    # Sample positions from a random playout so piece counts vary
+    while len(boards) < 200:
+        moves = list(board.legal_moves)
+        if not moves or board.is_game_over():
+            board = chess.Board()
+            continue
+        board.push(rng.choice(moves))
+        boards.append(board.copy(stack=False))
+
+    n = len(boards) * 10
+    secs, _ = timed(lambda: [engine_hard.board_to_tensor(b) for b in boards * 10], args.repeat)
+    results["tensor.engine_hard"] = metric(n / secs, "boards/s")
+    secs, _ = timed(lambda: [rep.board_to_tensor(b) for b in boards * 10], args.repeat)
+    results["tensor.rep"] = metric(n / secs, "boards/s")
+    return results
+
+
+def bench_texel(args):
+    results = {}
+    rng = random.Random(0)
+    samples = []
+    board = chess.Board()
+    while len(samples) < 20000:
+        moves = list(board.legal_moves)
+        if not moves or board.is_game_over():
+            board = chess.Board()
+            continue
+        board.push(rng.choice(moves))
+        samples.append((board.fen(), rng.choice((0.0, 0.5, 1.0))))
+
+    secs, (x, mob, y) = timed(lambda: texel.extract_chunk(samples), args.repeat)
+    results["texel.extract"] = metric(len(samples) / secs, "positions/s")
+    secs, _ = timed(lambda: texel.extract_chunk(samples, mobility=False), args.repeat)
+    results["texel.extract.no_mobility"] = metric(len(samples) / secs, "positions/s")
+    w0 = texel.current_weights()
+    secs, _ = timed(lambda: texel.tune(x, mob, y, w0, 1.0, epochs=1), args.repeat)
+    results["texel.epoch"] = metric(len(y) / secs, "positions/s")
+    return results
+
+
+def _fake_memory(size, rng):
+    # Keys follow LearningMemory's "<placement> <turn>" format
+    mem = {}
+    for i in range(size):
+        mem[f"pos{i:08d}/8/8/8/8/8/8/8 {'w' if i % 2 else 'b'}"] = {"e2e4": rng.randint(1, 9)}
+    return mem
+
+
+def bench_persistence(args):
+    results = {}
+    rng = random.Random(0)
+    saved = (learning.DATA_FILE, history.HISTORY_FILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        learning.DATA_FILE = os.path.join(tmp, "memory.json")
+        history.HISTORY_FILE = os.path.join(tmp, "history.json")
+        try:
+            for size in args.sizes:
+                mem = learning.LearningMemory()
+                mem.memory = _fake_memory(size, rng)
+                secs, _ = timed(mem.save, 1)
+                results[f"learning.save.{size}"] = metric(secs, "s", higher_is_better=False,
+                                                          bytes=os.path.getsize(learning.DATA_FILE))
+                secs, _ = timed(mem.load, 1)
+                results[f"learning.load.{size}"] = metric(secs, "s", higher_is_better=False)
+
+                keys = rng.sample(list(mem.memory), min(size, 10000))
+                start = time.perf_counter()
+                for k in keys:
+                    mem.memory.get(k)
+                secs = time.perf_counter() - start
+                results[f"learning.lookup.{size}"] = metric(len(keys) / secs, "lookups/s")
+                del mem
+
+                hist = history.HistoryManager()
+                entry = {"timestamp": "2024-01-01 00:00:00", "result": "1-0", "level": "Medium", "winner": "White"}
+                hist.history = [dict(entry) for _ in range(size)]
+                secs, _ = timed(hist.save, 1)
+                results[f"history.save.{size}"] = metric(secs, "s", higher_is_better=False)
+                secs, _ = timed(hist.load, 1)
+                results[f"history.load.{size}"] = metric(secs, "s", higher_is_better=False)
+                del hist
+        finally:
+            learning.DATA_FILE, history.HISTORY_FILE = saved
+    return results
+
+
+SUITES = {
+    "perft": bench_perft,
+    "search": bench_search,
+    "see": bench_see,
+    "prior": bench_prior,
+    "hard": bench_hard,
+    "tensor": bench_tensor,
+    "texel": bench_texel,
+    "persistence": bench_persistence,
+}
+
+
+# --- Baseline comparison ---
+
+def compare(results, baseline, tolerance):
+    """
+    Compare each metric against the baseline.
+
+    Returns:
+        list of (name, base value, new value, relative change, regressed)
+    """
+    rows = []
+    base = baseline.get("benchmarks", {})
+    for name, m in results["benchmarks"].items():
+        if name not in base or not base[name]["value"]:
+            continue
+        old = base[name]["value"]
+        new = m["value"]
+        change = (new - old) / old
+        if not m["higher_is_better"]:
+            change = -change
+        rows.append((name, old, new, change, change < -tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Chess Game benchmark suite")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per measurement (median is reported)")
+    parser.add_argument("--perft-depth", type=int, default=3)
+    parser.add_argument("--search-depth", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="LearningMemory/HistoryManager sizes (up to 10000000)")
+    parser.add_argument("--out", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="also store results as a baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "chess": chess.__version__,
+            "numpy": np.__version__,
+        },
+        "benchmarks": {},
+    }
+    for name in args.suite or list(SUITES):
+        print(f"Running {name}...", file=sys.stderr)
+        results["benchmarks"].update(SUITES[name](args))
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        regressions = 0
+        print(f"\n{'Benchmark':<40} {'Baseline':>14} {'Current':>14} {'Change':>9}", file=sys.stderr)
+        for name, old, new, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            regressions += regressed
+            print(f"{name:<40} {old:>14.6g} {new:>14.6g} {change:>+8.1%}{flag}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import chess
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model import engine_med
+from app.Model.analysis_cache import EXACT, LOWER, AnalysisCache
+
+E4 = chess.Move.from_uci("e2e4")
+PROMO = chess.Move.from_uci("a7a8n")
+
+
+def test_store_probe_and_reopen(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    cache = AnalysisCache(path, entries=64)
+    cache.store(12345, 6, EXACT, 0.25, E4)
+    cache.store(777, 3, LOWER, -1.5, PROMO)
+    assert cache.probe(99) is None
+    cache.close()
+
+    cache = AnalysisCache(path, entries=64)
+    entry = cache.probe(12345)
+    assert (entry.depth, entry.bound, entry.score, entry.move) == (6, EXACT, 0.25, E4)
+    assert cache.probe(777).move == PROMO
+    cache.close()
+
+
+def test_shallower_result_does_not_replace_deeper(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.bin"), entries=64)
+    cache.store(5, 8, EXACT, 1.0, E4)
+    cache.store(5, 2, EXACT, -3.0, None)
+    assert cache.probe(5).depth == 8
+    cache.store(5, 9, LOWER, 2.0, None)
+    assert cache.probe(5).depth == 9
+    cache.close()
+
+
+def test_full_bucket_evicts_least_recently_used(tmp_path):
+    # One bucket of four ways: every key lands in it
+    cache = AnalysisCache(str(tmp_path / "cache.bin"), entries=4, ways=4)
+    for key in (1, 2, 3, 4):
+        cache.store(key, 1, EXACT, 0.0, None)
+    # Touch 1, so 2 is now the oldest
+    assert cache.probe(1) is not None
+    cache.store(5, 1, EXACT, 0.0, None)
+    assert cache.probe(2) is None
+    assert all(cache.probe(key) is not None for key in (1, 3, 4, 5))
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_tag_change_drops_records(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    cache = AnalysisCache(path, entries=64)
+    cache.set_tag(1)
+    cache.store(42, 4, EXACT, 0.5, E4)
+    cache.set_tag(1)
+    assert cache.probe(42) is not None
+    cache.set_tag(2)
+    assert cache.probe(42) is None
+    cache.close()
+    reopened = AnalysisCache(path, entries=64)
+    assert reopened.tag == 2
+    reopened.close()
+
+
+def test_engine_tags_the_cache_with_its_eval_params(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.bin"), entries=64)
+    cache.store(42, 4, EXACT, 0.5, E4)
+    try:
+        engine_med.set_analysis_cache(cache)
+        assert cache.tag == engine_med.eval_params_tag() & 0xFFFFFFFF
+    finally:
+        engine_med.set_analysis_cache(None)
+        cache.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_store_probe_and_reopen, test_shallower_result_does_not_replace_deeper,
+                 test_full_bucket_evicts_least_recently_used, test_tag_change_drops_records,
+                 test_engine_tags_the_cache_with_its_eval_params):
+        with tempfile.TemporaryDirectory() as folder:
+            test(Path(folder))
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+import time
+
+import chess
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model import engine_hard
+from app.Model.engine_api import SearchLimits
+from app.Model.inference import BatchingEvaluator
+
+
+class ZeroModel:
+    def predict(self, x, verbose=0):
+        return np.zeros((len(x), 1))
+
+
+def stalled_engine(release):
+    # A HardEngine whose batched evaluator never answers until `release` is set
+    def model_fn(x):
+        release.wait()
+        return np.zeros((len(x), 1))
+    engine = engine_hard.HardEngine.__new__(engine_hard.HardEngine)
+    engine.model = ZeroModel()
+    engine.evaluator = BatchingEvaluator(model_fn)
+    return engine
+
+
+def test_batches_are_capped():
+    sizes = []
+
+    def model_fn(x):
+        sizes.append(len(x))
+        return np.arange(len(x)).reshape(-1, 1)
+
+    ev = BatchingEvaluator(model_fn, max_batch=8, max_latency=0.05)
+    futures = [ev.submit(np.zeros((n, 1))) for n in (3, 3, 3, 20)]
+    rows = [f.result(5) for f in futures]
+    ev.close()
+    assert [len(r) for r in rows] == [3, 3, 3, 20]
+    assert max(sizes) <= 8
+
+
+def test_stalled_batch_falls_back_to_direct_predict():
+    release = threading.Event()
+    engine = stalled_engine(release)
+    try:
+        start = time.perf_counter()
+        assert engine.pick(chess.Board()) in chess.Board().legal_moves
+        assert time.perf_counter() - start < engine_hard.BATCH_TIMEOUT + 1.0
+    finally:
+        release.set()
+        engine.evaluator.close()
+
+
+def test_stop_interrupts_batch_wait():
+    release = threading.Event()
+    engine = stalled_engine(release)
+    try:
+        limits = SearchLimits()
+        threading.Timer(0.05, limits.token.cancel).start()
+        start = time.perf_counter()
+        assert engine.pick(chess.Board(), limits=limits) in chess.Board().legal_moves
+        assert time.perf_counter() - start < engine_hard.BATCH_TIMEOUT
+    finally:
+        release.set()
+        engine.evaluator.close()
+
+
+if __name__ == "__main__":
+    test_batches_are_capped()
+    test_stalled_batch_falls_back_to_direct_predict()
+    test_stop_interrupts_batch_wait()
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import chess
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model import engine_med, mate_search
+from app.Model.mate_search import MateSolver, find_mate
+
+BACK_RANK = "6k1/5ppp/8/8/8/8/8/3R2K1 w - - 0 1"
+# Mate in 2 starts with a quiet move; checking first only mates in 3
+QUIET_MATE_IN_2 = "7k/8/5K2/8/8/8/8/3Q4 w - - 0 1"
+
+
+def assert_mating_line(fen, result):
+    board = chess.Board(fen)
+    assert result.pv[0] == result.move
+    assert len(result.pv) == 2 * result.moves - 1
+    for move in result.pv:
+        assert board.is_legal(move), move
+        board.push(move)
+    assert board.is_checkmate()
+
+
+def test_mate_in_one():
+    result = find_mate(chess.Board(BACK_RANK), 3)
+    assert result.moves == 1
+    assert result.move == chess.Move.from_uci("d1d8")
+    assert_mating_line(BACK_RANK, result)
+
+
+def test_shortest_mate_is_found_first():
+    result = find_mate(chess.Board(QUIET_MATE_IN_2), 3)
+    assert result.moves == 2
+    assert_mating_line(QUIET_MATE_IN_2, result)
+
+    # What mate_probe has to correct: checking moves alone take a move longer
+    checks = find_mate(chess.Board(QUIET_MATE_IN_2), 3, checks_only=True)
+    assert checks.moves == 3
+    assert_mating_line(QUIET_MATE_IN_2, checks)
+
+
+def test_no_mate_and_budget():
+    assert find_mate(chess.Board(), 2) is None
+
+    # Out of budget: None means "unknown", which aborted tells apart from "no mate"
+    solver = MateSolver(nodes=mate_search.CHECK_INTERVAL)
+    assert solver.solve(chess.Board(), 3) is None
+    assert solver.aborted
+    solver = MateSolver()
+    assert solver.solve(chess.Board(), 1) is None
+    assert not solver.aborted
+
+
+def test_mate_probe_reports_the_shortest_mate():
+    board = chess.Board(QUIET_MATE_IN_2)
+    assert mate_search.looks_forcing(board)
+    move, score, result = engine_med.mate_probe(board)
+    assert result.moves == 2
+    assert engine_med.mate_in(score) == 2
+    assert_mating_line(QUIET_MATE_IN_2, result)
+
+
+if __name__ == "__main__":
+    test_mate_in_one()
+    test_shortest_mate_is_found_first()
+    test_no_mate_and_budget()
+    test_mate_probe_reports_the_shortest_mate()
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import threading
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model.persistence import PersistenceWorker, write_json_atomic
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = str(tmp_path / "sub" / "state.json")
+    write_json_atomic(path, {"a": 1})
+    write_json_atomic(path, json.dumps({"a": 2}))
+    with open(path) as f:
+        assert json.load(f) == {"a": 2}
+    assert os.listdir(tmp_path / "sub") == ["state.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    write_json_atomic(path, {"a": 1})
+    try:
+        write_json_atomic(path, {"a": object()})
+    except TypeError:
+        pass
+    with open(path) as f:
+        assert json.load(f) == {"a": 1}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_bursts_coalesce_into_one_write():
+    writer = PersistenceWorker(delay=0.05)
+    ran = []
+    gate = threading.Event()
+    writer.submit("block", gate.wait)
+    for i in range(5):
+        writer.submit("file", lambda i=i: ran.append(i))
+    gate.set()
+    assert writer.flush(timeout=5.0)
+    assert ran == [4]
+    assert writer.coalesced == 4
+    writer.shutdown()
+
+
+def test_discard_and_shutdown():
+    writer = PersistenceWorker(delay=0.05)
+    ran = []
+    gate = threading.Event()
+    writer.submit("block", gate.wait)
+    writer.submit("launch", lambda: ran.append("launch"))
+    assert writer.discard("launch")
+    assert not writer.discard("launch")
+    writer.submit("history", lambda: ran.append("history"))
+    gate.set()
+    writer.shutdown()
+    assert ran == ["history"]
+    # Submits after shutdown still run, inline
+    writer.submit("late", lambda: ran.append("late"))
+    assert ran == ["history", "late"]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_atomic_write_replaces_the_file, test_failed_write_keeps_the_old_file):
+        with tempfile.TemporaryDirectory() as folder:
+            test(Path(folder))
+    test_bursts_coalesce_into_one_write()
+    test_discard_and_shutdown()
@@ -0,0 +1,133 @@
+import os
+import sys
+
+import chess
+import chess.polyglot
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model import engine_med
+from app.Model.engine_med import MATE_SCORE, SearchContext, _from_table, _to_table, mate_in
+from app.Model.zobrist import HashStack
+
+# En passant, captures and castling on both sides
+SPECIAL_LINE = ("e2e4 g8f6 e4e5 d7d5 e5d6 e7d6 g1f3 f8e7 f1c4 e8g8 e1g1 b8c6 "
+                "d2d4 c8g4 b1c3 d8d7 c1f4").split()
+# Underpromotions that capture rooks, then castling with the rights that are left
+PROMOTION_FEN = "r3k2r/1P6/8/8/8/8/6p1/R3K2R w KQkq - 0 1"
+
+
+def test_incremental_keys_match_polyglot():
+    board = chess.Board()
+    stack = HashStack(board)
+    for uci in SPECIAL_LINE:
+        stack.push(board, chess.Move.from_uci(uci))
+        assert stack.key == chess.polyglot.zobrist_hash(board), uci
+    while board.move_stack:
+        stack.pop(board)
+        assert stack.key == chess.polyglot.zobrist_hash(board)
+
+
+def test_incremental_keys_with_promotions_and_castling_rights():
+    board = chess.Board(PROMOTION_FEN)
+    stack = HashStack(board)
+    for uci in ("b7a8n", "g2h1n", "e1c1", "e8g8"):
+        move = chess.Move.from_uci(uci)
+        assert board.is_legal(move), uci
+        stack.push(board, move)
+        assert stack.key == chess.polyglot.zobrist_hash(board), uci
+
+
+def test_repetition_along_the_line_and_from_game_history():
+    board = chess.Board()
+    stack = HashStack(board)
+    for uci in ("g1f3", "g8f6", "f3g1"):
+        stack.push(board, chess.Move.from_uci(uci))
+        assert not stack.is_repetition(board.halfmove_clock)
+    stack.push(board, chess.Move.from_uci("f6g8"))
+    assert stack.is_repetition(board.halfmove_clock)
+
+    # Positions played before the search started count too
+    game = chess.Board()
+    for uci in ("g1f3", "g8f6", "f3g1"):
+        game.push_uci(uci)
+    stack = HashStack(game)
+    stack.push(game, chess.Move.from_uci("f6g8"))
+    assert stack.is_repetition(game.halfmove_clock)
+
+
+
+def test_mate_scores_are_stored_relative_to_the_node():
+    score = MATE_SCORE - 5  # mate in 3 from the root
+    assert _from_table(_to_table(score, 4), 4) == score
+    # The same stored entry read two plies closer to the root is two plies longer
+    assert _from_table(_to_table(score, 4), 2) == score + 2
+    assert _from_table(_to_table(-score, 3), 3) == -score
+    assert _to_table(1.5, 7) == 1.5
+    assert mate_in(score) == 3
+    assert mate_in(-(MATE_SCORE - 4)) == -2
+    assert mate_in(2.0) is None
+
+
+def test_mate_distance_survives_the_transposition_table():
+    board = chess.Board("7k/8/5K2/8/8/8/8/3Q4 w - - 0 1")
+    context = SearchContext()
+    for depth in (3, 4, 5):
+        _, score = context.search_root(board, depth)
+        assert mate_in(score) == 2, depth
+
+
+def test_table_does_not_change_root_scores():
+    # Each root move gets a full window, so its score must match a search
+    # without the table; a stored bound used as an exact score would show here
+    board = chess.Board("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+    without_table = SearchContext()
+    without_table._store = lambda *args, **kwargs: None
+    expected = {line.move: line.score for line in without_table.analyse(board, depth=4, multipv=100)}
+    got = {line.move: line.score for line in SearchContext().analyse(board, depth=4, multipv=100)}
+    assert got == expected
+
+
+def test_multipv_lines_are_sorted_and_match_the_single_best():
+    board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR b KQkq - 5 4")
+    lines = SearchContext().analyse(board, depth=2, multipv=3)
+    assert len(lines) == 3
+    assert [line.score for line in lines] == sorted((line.score for line in lines), reverse=True)
+    for line in lines:
+        assert line.pv[0] == line.move
+        assert line.depth == 2
+        b = board.copy()
+        for move in line.pv:
+            assert b.is_legal(move)
+            b.push(move)
+    _, best = SearchContext().search_root(board, 2)
+    assert lines[0].score == best
+    # Asking for more lines than there are moves returns every move once
+    assert len(SearchContext().analyse(board, depth=1, multipv=500)) == board.legal_moves.count()
+
+
+def test_prior_skips_corrupt_learned_moves():
+    class Prior:
+        def move_counts(self, board):
+            return {"zz99": 9, "e2e5": 7, "g1f3": 3}
+
+    try:
+        engine_med.set_move_prior(Prior())
+        context = SearchContext()
+        board = chess.Board()
+        assert context._learned_moves(board, chess.polyglot.zobrist_hash(board)) == [chess.Move.from_uci("g1f3")]
+        assert board.is_legal(context.best_move(board, depth=2))
+    finally:
+        engine_med.set_move_prior(None)
+
+
+if __name__ == "__main__":
+    test_incremental_keys_match_polyglot()
+    test_incremental_keys_with_promotions_and_castling_rights()
+    test_repetition_along_the_line_and_from_game_history()
+    test_mate_scores_are_stored_relative_to_the_node()
+    test_mate_distance_survives_the_transposition_table()
+    test_table_does_not_change_root_scores()
+    test_multipv_lines_are_sorted_and_match_the_single_best()
+    test_prior_skips_corrupt_learned_moves()
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import chess
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model.see import see, see_ge
+
+
+def value(fen, uci):
+    return see(chess.Board(fen), chess.Move.from_uci(uci))
+
+
+def test_undefended_capture_wins_the_piece():
+    assert value("4k3/8/8/3p4/8/8/8/3RK3 w - - 0 1", "d1d5") == 1
+
+
+def test_defended_pawn_costs_the_rook():
+    # RxP, pxR: +1 - 5
+    assert value("4k3/8/2p5/3p4/8/8/8/3RK3 w - - 0 1", "d1d5") == -4
+
+
+def test_xray_attacker_joins_the_exchange():
+    # Doubled rooks win the pawn defended once by a rook
+    assert value("3rk3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1", "d2d5") == 1
+    # The same capture with a single rook loses it
+    assert value("3rk3/8/8/3p4/8/8/3R4/4K3 w - - 0 1", "d2d5") == -4
+
+
+def test_king_cannot_recapture_into_a_defended_square():
+    # The king takes back the rook...
+    assert value("6k1/5p2/8/8/8/8/8/5RK1 w - - 0 1", "f1f7") == -4
+    # ...unless the bishop covers f7
+    assert value("6k1/5p2/8/8/8/1B6/8/5RK1 w - - 0 1", "f1f7") == 1
+
+
+def test_en_passant_and_promotion():
+    assert value("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6") == 1
+    # Promoting on an empty, undefended square gains queen minus pawn
+    assert value("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7a8q") == 8
+
+
+def test_see_ge_threshold():
+    board = chess.Board("4k3/8/2p5/3p4/8/8/8/3RK3 w - - 0 1")
+    move = chess.Move.from_uci("d1d5")
+    assert not see_ge(board, move)
+    assert see_ge(board, move, -4)
+
+
+if __name__ == "__main__":
+    test_undefended_capture_wins_the_piece()
+    test_defended_pawn_costs_the_rook()
+    test_xray_attacker_joins_the_exchange()
+    test_king_cannot_recapture_into_a_defended_square()
+    test_en_passant_and_promotion()
+    test_see_ge_threshold()
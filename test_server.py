@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import chess
+from app.Controller import server as game_server
+from app.Controller.server import GameServer
+from app.Model.engine_api import get_engine
+
+
+async def request(reader, writer, payload):
+    writer.write((json.dumps(payload) + "\n").encode())
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def session_roundtrip():
+    server = GameServer(workers=1, movetime=0.2)
+    srv = await server.start("127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        new = await request(reader, writer, {"op": "new", "engine": "med:1", "id": 7})
+        assert new["id"] == 7
+        sid = new["session"]
+
+        played = await request(reader, writer, {"op": "move", "session": sid, "move": "e2e4"})
+        assert played["moves"][0] == "e2e4"
+        assert played["moves"][1] == played["ai_move"]
+        assert played["turn"] == "white"
+
+        illegal = await request(reader, writer, {"op": "move", "session": sid, "move": "e2e5"})
+        assert "error" in illegal
+
+        assert "error" in await request(reader, writer, {"op": "new", "engine": "med:abc"})
+        assert "error" in await request(reader, writer, {"op": "state", "session": "nope"})
+        assert "error" in await request(reader, writer, {"op": "fly"})
+        writer.write(b"not json\n")
+        await writer.drain()
+        assert "error" in json.loads(await reader.readline())
+
+        closed = await request(reader, writer, {"op": "close", "session": sid})
+        assert closed["closed"]
+        metrics = await request(reader, writer, {"op": "metrics"})
+        assert metrics["completed"] == 1
+        assert metrics["sessions"] == 0
+    finally:
+        writer.close()
+        await server.close()
+
+
+def test_session_roundtrip():
+    asyncio.run(session_roundtrip())
+
+
+def test_worker_engine_reset_between_sessions():
+    engine = get_engine("med:2")
+    game_server._search_job("med:2", "a", chess.STARTING_FEN, ["e2e4"], None)
+    marker = -1  # no real Zobrist key collides with this in a depth-2 search
+    engine.context.table[marker] = (0, 0.0, None, 0)
+    game_server._search_job("med:2", "a", chess.STARTING_FEN, ["e2e4", "e7e5"], None)
+    assert marker in engine.context.table
+    game_server._search_job("med:2", "b", chess.STARTING_FEN, [], None)
+    assert marker not in engine.context.table
+
+
+if __name__ == "__main__":
+    test_session_roundtrip()
+    test_worker_engine_reset_between_sessions()
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import chess
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Model.tablebase import Tablebase
+
+
+class FakeTables:
+    """Every child is lost for the side to move; DTZ per position from a dict."""
+
+    def __init__(self, dtz):
+        self.dtz = dtz
+        self.wdl = {}
+
+    def probe_wdl(self, board):
+        return -2
+
+    def probe_dtz(self, board):
+        return self.dtz.get(board.fen(), -10)
+
+    def close(self):
+        pass
+
+
+def tablebase_for(board, dtz_after):
+    dtz = {}
+    for uci, value in dtz_after.items():
+        board.push_uci(uci)
+        dtz[board.fen()] = value
+        board.pop()
+    tb = Tablebase([])
+    tb._tb = FakeTables(dtz)
+    tb.max_pieces = 5
+    return tb
+
+
+def test_root_move_prefers_fastest_zeroing():
+    board = chess.Board("8/8/8/8/8/2k5/8/K6Q w - - 0 1")
+    tb = tablebase_for(board, {"h1h8": -3})
+    move, wdl = tb.root_move(board)
+    assert move == chess.Move.from_uci("h1h8")
+    assert wdl == 2
+
+
+def test_root_move_accounts_for_the_fifty_move_clock():
+    board = chess.Board("8/8/8/8/8/2k5/8/K6Q w - - 90 120")
+    # Only h1h8 keeps the win inside the 50-move rule; every other move is cursed
+    tb = tablebase_for(board, {"h1h8": -9})
+    move, wdl = tb.root_move(board)
+    assert move == chess.Move.from_uci("h1h8")
+    assert wdl == 2
+
+    board = chess.Board("8/8/8/8/8/2k5/8/K6Q w - - 95 120")
+    tb = tablebase_for(board, {"h1h8": -9})
+    move, wdl = tb.root_move(board)
+    assert wdl == 1
+    assert tb.stats()["probes"] > 0
+
+
+if __name__ == "__main__":
+    test_root_move_prefers_fastest_zeroing()
+    test_root_move_accounts_for_the_fifty_move_clock()
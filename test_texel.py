@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Controller import texel
+
+def test_parse_epd_with_opcode():
+    line = 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - c9 "1-0";'
+    fen, result = texel.parse_labelled(line)
+    assert fen == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+    assert result == 1.0
+
+    x, mob, y = texel.extract_chunk([(fen, result)])
+    assert len(y) == 1
+
+def test_parse_fen_with_result():
+    fen, result = texel.parse_labelled("8/8/4k3/8/8/4K3/4P3/8 w - - 0 1 [0.5]")
+    assert fen == "8/8/4k3/8/8/4K3/4P3/8 w - - 0 1"
+    assert result == 0.5
+    assert texel.parse_labelled("not a position") is None
+
+if __name__ == "__main__":
+    test_parse_epd_with_opcode()
+    test_parse_fen_with_result()
@@ -0,0 +1,81 @@
+import math
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Controller import tournament
+from app.Controller.tournament import PairStats, elo_from_score, score_from_elo, sprt_bounds
+
+
+def game(white, black, result):
+    return {"white": white, "black": black, "result": result}
+
+
+def test_elo_and_score_are_inverse():
+    assert elo_from_score(0.5) == 0.0
+    assert math.isclose(elo_from_score(0.75), 190.848, abs_tol=0.01)
+    for elo in (-300, -50, 0, 10, 400):
+        assert math.isclose(elo_from_score(score_from_elo(elo)), elo, abs_tol=1e-9)
+
+
+def test_pair_stats_credit_the_right_side():
+    stats = PairStats("med:2", "easy")
+    stats.add(game("med:2", "easy", "1-0"))
+    stats.add(game("easy", "med:2", "0-1"))
+    stats.add(game("easy", "med:2", "1-0"))
+    stats.add(game("med:2", "easy", "1/2-1/2"))
+    assert (stats.wins, stats.draws, stats.losses) == (2, 1, 1)
+    assert stats.score() == 0.625
+
+
+def test_error_bar_shrinks_with_more_games():
+    few, many = PairStats("a", "b"), PairStats("a", "b")
+    for stats, n in ((few, 10), (many, 1000)):
+        for i in range(n):
+            stats.add(game("a", "b", ("1-0", "1/2-1/2", "0-1", "1-0")[i % 4]))
+    elo_few, err_few = few.elo()
+    elo_many, err_many = many.elo()
+    assert err_many < err_few
+    assert elo_many - err_many < elo_from_score(0.625) < elo_many + err_many
+
+
+def test_sprt_accepts_a_clearly_stronger_engine():
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert math.isclose(lower, -upper)
+    assert math.isclose(upper, math.log(19))
+    strong, equal = PairStats("a", "b"), PairStats("a", "b")
+    for i in range(400):
+        strong.add(game("a", "b", "1-0" if i % 3 else "1/2-1/2"))
+        equal.add(game("a", "b", ("1-0", "0-1", "1/2-1/2")[i % 3]))
+    assert strong.llr(0, 10) > upper
+    assert equal.llr(0, 10) < 0
+
+
+def test_tasks_swap_colours_and_duplicate_specs_are_rejected():
+    tasks = tournament.build_tasks(["easy", "med:1"], ["e2e4"], 4, 0.0, 100, 0)
+    assert [(t["white"], t["black"]) for t in tasks] == [("easy", "med:1"), ("med:1", "easy")] * 2
+    try:
+        tournament.run_tournament(["med:1", "med:1"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate engine specs were accepted")
+
+
+def test_opening_formats():
+    assert tournament.opening_board("e2e4 e7e5").fen() == \
+        "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+    fen = "8/8/4k3/8/8/4K3/4P3/8 w - - 0 1"
+    assert tournament.opening_board(fen).fen() == fen
+    assert tournament.opening_board('8/8/4k3/8/8/4K3/4P3/8 w - - bm Kd3; id "kp";').fen() == fen
+
+
+if __name__ == "__main__":
+    test_elo_and_score_are_inverse()
+    test_pair_stats_credit_the_right_side()
+    test_error_bar_shrinks_with_more_games()
+    test_sprt_accepts_a_clearly_stronger_engine()
+    test_tasks_swap_colours_and_duplicate_specs_are_rejected()
+    test_opening_formats()
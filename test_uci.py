@@ -0,0 +1,59 @@
+import io
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.Controller import uci
+
+# First word of every line a UCI GUI accepts from the engine
+UCI_RESPONSES = ("id", "option", "uciok", "readyok", "info", "bestmove", "copyprotection", "registration")
+
+
+def run_session(commands, monkeypatch):
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    uci.main(io.StringIO("".join(line + "\n" for line in commands)))
+    return out.getvalue().splitlines()
+
+
+def test_only_protocol_lines_on_stdout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    # A learned move for the start position makes the book print its diagnostic
+    with open("data/memory.json", "w") as f:
+        json.dump({"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w": {"e2e4": 3}}, f)
+
+    lines = run_session([
+        "uci",
+        "isready",
+        "position startpos",
+        "go depth 1",
+        "position startpos moves e2e4 e7e9",
+        "position fen not-a-fen",
+        "setoption name OwnBook value false",
+        "position startpos moves e2e4",
+        "go depth 2",
+        "quit",
+    ], monkeypatch)
+
+    assert lines
+    for line in lines:
+        assert line.split()[0] in UCI_RESPONSES, line
+    bestmoves = [line for line in lines if line.startswith("bestmove")]
+    assert bestmoves[0] == "bestmove e2e4"
+    assert len(bestmoves) == 2
+
+
+def test_bare_go_has_a_time_limit():
+    engine = uci.UciEngine(out=io.StringIO())
+    limits = engine._make_limits(engine.board, {})
+    assert limits.hard_deadline is not None
+    assert engine._make_limits(engine.board, {}, infinite=True).hard_deadline is None
+    assert engine._make_limits(engine.board, {"depth": 3}).depth == 3
+
+
+if __name__ == "__main__":
+    test_bare_go_has_a_time_limit()